@@ -0,0 +1 @@
+# backend/common: code shared by the server and the database generator
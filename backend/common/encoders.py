@@ -0,0 +1,192 @@
+# backend/common/encoders.py
+import os
+import numpy as np
+
+# "torch" is the fp32 reference; "torch_int8" dynamically quantizes its Linear layers
+# (CPU only); "onnx" / "onnx_int8" run the towers written by export_onnx() on ONNX Runtime.
+# All take preprocessed image tensors / clip.tokenize() tokens and return unnormalized
+# float32 numpy embeddings.
+ENCODER_BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+
+
+def configure_threads(intra_op_threads=0, inter_op_threads=0):
+    """Sets torch's intra-/inter-op thread pools; 0 keeps torch's default."""
+    import torch
+
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            pass  # Only allowed before the first parallel op; keep the current pool
+
+
+def onnx_paths(onnx_dir, model_name, quantized=False):
+    """Paths of the exported image and text ONNX models for a CLIP model name."""
+    slug = model_name.replace("/", "-")
+    suffix = ".int8.onnx" if quantized else ".onnx"
+    return (
+        os.path.join(onnx_dir, f"{slug}-image{suffix}"),
+        os.path.join(onnx_dir, f"{slug}-text{suffix}"),
+    )
+
+
+class TorchEncoder:
+    """CLIP in PyTorch eager mode, optionally dynamically quantized."""
+
+    def __init__(self, model, preprocess, device, backend="torch"):
+        self.model = model
+        self.preprocess = preprocess
+        self.device = device
+        self.backend = backend
+
+    def encode_image(self, images):
+        import torch
+
+        with torch.no_grad():
+            return self.model.encode_image(images.to(self.device)).float().cpu().numpy()
+
+    def encode_text(self, tokens):
+        import torch
+
+        with torch.no_grad():
+            return self.model.encode_text(tokens.to(self.device)).float().cpu().numpy()
+
+
+class OnnxEncoder:
+    """CLIP image and text towers on ONNX Runtime (CPU)."""
+
+    def __init__(self, image_path, text_path, backend="onnx", intra_op_threads=0, inter_op_threads=0):
+        import onnxruntime as ort
+        from clip.clip import _transform
+
+        for path in (image_path, text_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"{path} not found; export it with the generator's export_onnx.py")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        if inter_op_threads:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        providers = ["CPUExecutionProvider"]
+        self.image_session = ort.InferenceSession(image_path, options, providers=providers)
+        self.text_session = ort.InferenceSession(text_path, options, providers=providers)
+        self.backend = backend
+        self.device = "cpu"
+
+        # Same resize/crop/normalize as clip.load() returns, at the exported input size
+        self.preprocess = _transform(self.image_session.get_inputs()[0].shape[-1])
+
+    def encode_image(self, images):
+        pixels = images.cpu().numpy().astype(np.float32)
+        return self.image_session.run(None, {"pixels": pixels})[0].astype(np.float32)
+
+    def encode_text(self, tokens):
+        return self.text_session.run(None, {"tokens": tokens.cpu().numpy().astype(np.int64)})[0].astype(np.float32)
+
+
+def load_encoder(backend, model_name, device="cpu", onnx_dir=None, intra_op_threads=0, inter_op_threads=0):
+    """
+    Loads a CLIP encoder.
+
+    Args:
+        backend (str): One of ENCODER_BACKENDS.
+        model_name (str): CLIP model name, e.g. "ViT-B/32".
+        device (str): Torch device for the "torch" backend; the others run on CPU.
+        onnx_dir (str): Directory holding the exported ONNX models.
+        intra_op_threads (int): Threads used inside one op (0 = library default).
+        inter_op_threads (int): Threads running independent ops in parallel (0 = library default).
+
+    Returns:
+        TorchEncoder | OnnxEncoder: The encoder, with a matching `preprocess`.
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}, expected one of {', '.join(ENCODER_BACKENDS)}")
+
+    if backend in ("onnx", "onnx_int8"):
+        image_path, text_path = onnx_paths(onnx_dir, model_name, quantized=backend == "onnx_int8")
+        return OnnxEncoder(image_path, text_path, backend, intra_op_threads, inter_op_threads)
+
+    import clip
+    import torch
+
+    configure_threads(intra_op_threads, inter_op_threads)
+    if backend == "torch":
+        model, preprocess = clip.load(model_name, device=device)
+        return TorchEncoder(model.eval(), preprocess, device, backend)
+
+    # Dynamic quantization kernels are CPU only; clip.load gives fp32 weights on CPU
+    model, preprocess = clip.load(model_name, device="cpu")
+    model = torch.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+    return TorchEncoder(model, preprocess, "cpu", backend)
+
+
+def export_onnx(model_name, onnx_dir, opset=17, quantize=True):
+    """
+    Exports the CLIP image and text towers to ONNX, plus dynamically int8-quantized copies.
+
+    Args:
+        model_name (str): CLIP model name.
+        onnx_dir (str): Output directory.
+        opset (int): ONNX opset version.
+        quantize (bool): Also write the ".int8.onnx" variants.
+
+    Returns:
+        list: Paths written.
+    """
+    import clip
+    import torch
+
+    model, _ = clip.load(model_name, device="cpu")
+    model.eval()
+    resolution = model.visual.input_resolution
+
+    class ImageTower(torch.nn.Module):
+        def forward(self, pixels):
+            return model.encode_image(pixels)
+
+    class TextTower(torch.nn.Module):
+        def forward(self, tokens):
+            return model.encode_text(tokens)
+
+    os.makedirs(onnx_dir, exist_ok=True)
+    image_path, text_path = onnx_paths(onnx_dir, model_name)
+    exports = (
+        (ImageTower(), torch.randn(2, 3, resolution, resolution), "pixels", image_path),
+        (TextTower(), clip.tokenize(["a photo", "of a landmark"]).long(), "tokens", text_path),
+    )
+
+    written = []
+    for tower, example, input_name, path in exports:
+        # Write next to the target and swap in, so a running server never sees half a file
+        tmp_path = path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                tower, (example,), tmp_path,
+                input_names=[input_name], output_names=["embeddings"],
+                dynamic_axes={input_name: {0: "batch"}, "embeddings": {0: "batch"}},
+                opset_version=opset,
+            )
+        os.replace(tmp_path, path)
+        written.append(path)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        for path, quantized_path in zip((image_path, text_path), onnx_paths(onnx_dir, model_name, quantized=True)):
+            quantize_dynamic(path, quantized_path + ".tmp", weight_type=QuantType.QInt8)
+            os.replace(quantized_path + ".tmp", quantized_path)
+            written.append(quantized_path)
+
+    return written
+
+
+def cosine_similarities(reference, candidate):
+    """Row-wise cosine similarity between two (N, D) embedding matrices."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
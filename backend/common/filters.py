@@ -0,0 +1,258 @@
+# backend/common/filters.py
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from common.metadata_store import caption_attributes
+
+# Per-attribute inverted lists (value -> sorted FAISS ids) written by the generator as
+# <index>.filters.npz. A filtered search turns them into a bitmap IDSelector that FAISS
+# checks while it scans, so filtering doesn't re-rank or over-fetch, and shards, IVF
+# and HNSW indexes all skip non-matching ids in place. Plain PQ indexes don't take a
+# selector; they over-fetch and drop non-matching ids instead.
+FILTER_ATTRIBUTES = ("landmark", "state", "country", "category")
+
+# Shared by filtered searches over sharded indexes, created on first use
+_shard_pool = None
+_shard_pool_lock = threading.Lock()
+
+
+def filter_index_path(index_path):
+    return os.path.splitext(index_path)[0] + ".filters.npz"
+
+
+def build_inverted_lists(records):
+    """
+    Groups FAISS ids by attribute value.
+
+    Args:
+        records (iterable): Metadata records in FAISS id order, None for unused ids.
+
+    Returns:
+        dict: attribute -> {value: list of ids}; empty values are left out.
+    """
+    lists = {attribute: {} for attribute in FILTER_ATTRIBUTES}
+    for row_id, record in enumerate(records):
+        if record is None:
+            continue
+        # Records written before filtering existed only carry the landmark
+        attributes = caption_attributes(record.get("captions", []))
+        for attribute in FILTER_ATTRIBUTES:
+            value = record.get(attribute, attributes[attribute])
+            if value:
+                lists[attribute].setdefault(value, []).append(row_id)
+    return lists
+
+
+def write_filter_index(path, records):
+    """Writes the inverted lists of `records` to a temporary file next to `path` and swaps it in."""
+    arrays = {}
+    for attribute, values in build_inverted_lists(records).items():
+        names = sorted(values)
+        arrays[f"{attribute}.values"] = np.array(names, dtype=str)
+        arrays[f"{attribute}.offsets"] = np.cumsum([0] + [len(values[name]) for name in names], dtype=np.int64)
+        arrays[f"{attribute}.ids"] = np.array([row_id for name in names for row_id in values[name]], dtype=np.int64)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+class Selection:
+    """The ids matching one filter, as a sorted array and as a FAISS bitmap selector."""
+
+    def __init__(self, ids):
+        import faiss
+
+        self.ids = ids
+        size = int(ids[-1]) + 1 if len(ids) else 0
+        mask = np.zeros(size, dtype=bool)
+        mask[ids] = True
+        # Bit i % 8 of byte i // 8 is id i; the selector only borrows the buffer
+        self.bitmap = np.packbits(mask, bitorder="little")
+        self.selector = faiss.IDSelectorBitmap(len(self.bitmap), faiss.swig_ptr(self.bitmap)) if size else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def contains(self, ids):
+        """Boolean mask of which `ids` (any shape, -1 for none) are selected."""
+        ids = np.asarray(ids, dtype=np.int64)
+        inside = (ids >= 0) & (ids < len(self.bitmap) * 8)
+        mask = np.zeros(ids.shape, dtype=bool)
+        mask[inside] = ((self.bitmap[ids[inside] >> 3] >> (ids[inside] & 7)) & 1).astype(bool)
+        return mask
+
+
+class FilterIndex:
+    """
+    Attribute filters over one index version.
+
+    Values match case-insensitively; several values of one attribute are OR-ed and
+    different attributes AND-ed. Selections are cached, since the same few filters
+    (a state, a category) are asked for over and over.
+    """
+
+    def __init__(self, lists, cache_size=64):
+        self._lists = {
+            attribute: {value.lower(): (value, np.asarray(ids, dtype=np.int64)) for value, ids in lists.get(attribute, {}).items()}
+            for attribute in FILTER_ATTRIBUTES
+        }
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            lists = {}
+            for attribute in FILTER_ATTRIBUTES:
+                if f"{attribute}.values" not in arrays:
+                    continue
+                offsets, ids = arrays[f"{attribute}.offsets"], arrays[f"{attribute}.ids"]
+                lists[attribute] = {str(value): ids[offsets[i]:offsets[i + 1]] for i, value in enumerate(arrays[f"{attribute}.values"])}
+        return cls(lists)
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(build_inverted_lists(records))
+
+    def values(self, attribute):
+        """[(value, image count)] of an attribute, most common first."""
+        return sorted(((value, len(ids)) for value, ids in self._lists[attribute].values()), key=lambda item: (-item[1], item[0]))
+
+    def select(self, filters):
+        """
+        Resolves filters to the ids they match.
+
+        Args:
+            filters (dict): attribute -> list of accepted values.
+
+        Returns:
+            Selection: The matching ids, or None when `filters` is empty (no filtering).
+        """
+        key = tuple(sorted((attribute, tuple(sorted(value.lower() for value in values))) for attribute, values in filters.items() if values))
+        if not key:
+            return None
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        ids = None
+        for attribute, values in key:
+            if attribute not in self._lists:
+                raise ValueError(f"Unknown filter {attribute!r}, expected one of {', '.join(FILTER_ATTRIBUTES)}")
+            matches = [self._lists[attribute][value][1] for value in values if value in self._lists[attribute]]
+            matched = np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int64)
+            ids = matched if ids is None else np.intersect1d(ids, matched, assume_unique=True)
+        selection = Selection(ids)
+
+        with self._lock:
+            self._cache[key] = selection
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return selection
+
+
+def _inner_index(index):
+    import faiss
+
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+
+def accepts_selector(index):
+    """Whether one (ID-mapped) index can skip ids while it searches; IndexPQ rejects any SearchParameters."""
+    import faiss
+
+    return not isinstance(_inner_index(index), faiss.IndexPQ)
+
+
+def search_parameters(index, selector):
+    """SearchParameters for one (ID-mapped) index that keep its nprobe / efSearch."""
+    import faiss
+
+    inner = _inner_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=inner.nprobe)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def _post_filtered_search(index, queries, k, selection):
+    """
+    Filtered search for an index that can't take a selector: searches for more than k
+    results and keeps the selected ones, doubling the fetch until every query has k or
+    the whole index was ranked.
+    """
+    ntotal = index.ntotal
+    # Enough for k matches if the selected ids are spread evenly, with 2x headroom
+    fetch = min(ntotal, max(k, 2 * k * ntotal // max(1, len(selection))))
+    while True:
+        scores, ids = index.search(queries, max(1, fetch))
+        keep = selection.contains(ids)
+        if fetch >= ntotal or not len(keep) or keep.sum(axis=1).min() >= k:
+            break
+        fetch = min(ntotal, fetch * 2)
+
+    # Selected results first, each row still in score order
+    order = np.argsort(~keep, axis=1, kind="stable")[:, :k]
+    keep = np.take_along_axis(keep, order, axis=1)
+    scores = np.where(keep, np.take_along_axis(scores, order, axis=1), -np.inf).astype(np.float32)
+    ids = np.where(keep, np.take_along_axis(ids, order, axis=1), -1)
+    if ids.shape[1] < k:
+        padding = k - ids.shape[1]
+        scores = np.pad(scores, ((0, 0), (0, padding)), constant_values=-np.inf)
+        ids = np.pad(ids, ((0, 0), (0, padding)), constant_values=-1)
+    return scores, ids
+
+
+def _search_selected(index, queries, k, selection):
+    if accepts_selector(index):
+        return index.search(queries, k, params=search_parameters(index, selection.selector))
+    return _post_filtered_search(index, queries, k, selection)
+
+
+def _shard_executor():
+    global _shard_pool
+    with _shard_pool_lock:
+        if _shard_pool is None:
+            _shard_pool = ThreadPoolExecutor(thread_name_prefix="faiss-shard")
+        return _shard_pool
+
+
+def filtered_search(index, queries, k, selection=None, threaded=True):
+    """
+    index.search() restricted to a Selection; unfiltered when `selection` is None.
+
+    IndexShards can't pass SearchParameters through, so its shards are searched
+    separately (in parallel on a shared thread pool when `threaded`, like IndexShards
+    itself; FAISS releases the GIL while searching) and their top-k merged (inner
+    product: higher is better).
+
+    Returns:
+        tuple: (scores, ids) like index.search(), padded with -inf / -1.
+    """
+    import faiss
+
+    if selection is None:
+        return index.search(queries, k)
+    if len(selection) == 0:
+        return np.full((len(queries), k), -np.inf, dtype=np.float32), np.full((len(queries), k), -1, dtype=np.int64)
+
+    if not isinstance(index, faiss.IndexShards):
+        return _search_selected(index, queries, k, selection)
+
+    shards = [faiss.downcast_index(index.at(i)) for i in range(index.count())]
+    if threaded and len(shards) > 1:
+        futures = [_shard_executor().submit(_search_selected, shard, queries, k, selection) for shard in shards]
+        results = [future.result() for future in futures]
+    else:
+        results = [_search_selected(shard, queries, k, selection) for shard in shards]
+    scores = np.concatenate([result[0] for result in results], axis=1)
+    ids = np.concatenate([result[1] for result in results], axis=1)
+    scores[ids < 0] = -np.inf
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
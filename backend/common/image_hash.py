@@ -0,0 +1,163 @@
+# backend/common/image_hash.py
+import hashlib
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 bits -> 64-bit hashes
+
+# Near-duplicate thresholds (Hamming distance in bits). Both hashes must agree,
+# which keeps false positives low for photos of the same landmark from different angles.
+PHASH_THRESHOLD = 6
+DHASH_THRESHOLD = 10
+
+
+def bytes_sha256(data):
+    """Hex SHA-256 of raw bytes, for exact-duplicate detection."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def _dct_matrix(size):
+    # Orthonormal DCT-II basis, so the 2D DCT is D @ X @ D.T (no scipy dependency)
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.sqrt(2 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(HASH_SIZE * 4)
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """
+    Difference hash: compares neighbouring pixels of a tiny grayscale thumbnail.
+
+    Args:
+        image (PIL.Image.Image): The image.
+        hash_size (int): Hash is hash_size * hash_size bits.
+
+    Returns:
+        int: The hash.
+    """
+    pixels = np.asarray(image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image, hash_size=HASH_SIZE):
+    """
+    Perceptual hash: signs of the low-frequency DCT coefficients of a 32x32 thumbnail.
+    Robust to re-encoding, resizing and small colour changes.
+
+    Args:
+        image (PIL.Image.Image): The image.
+        hash_size (int): Hash is hash_size * hash_size bits.
+
+    Returns:
+        int: The hash.
+    """
+    size = hash_size * 4
+    dct_matrix = _DCT_32 if size == len(_DCT_32) else _dct_matrix(size)
+    pixels = np.asarray(image.convert("L").resize((size, size), Image.LANCZOS), dtype=np.float64)
+    low_frequencies = (dct_matrix @ pixels @ dct_matrix.T)[:hash_size, :hash_size]
+    return _bits_to_int(low_frequencies > np.median(low_frequencies))
+
+
+def image_hashes(image):
+    """
+    Both perceptual hashes of an image.
+
+    Returns:
+        tuple: (phash, dhash)
+    """
+    return phash(image), dhash(image)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def is_near_duplicate(hashes_a, hashes_b, phash_threshold=PHASH_THRESHOLD, dhash_threshold=DHASH_THRESHOLD):
+    """
+    Whether two (phash, dhash) pairs describe the same picture.
+    """
+    return (
+        hamming_distance(hashes_a[0], hashes_b[0]) <= phash_threshold
+        and hamming_distance(hashes_a[1], hashes_b[1]) <= dhash_threshold
+    )
+
+
+def _popcount(values):
+    # Set bits per uint64, vectorized
+    return np.unpackbits(values.view(np.uint8).reshape(*values.shape, 8), axis=-1).sum(axis=-1)
+
+
+def pack_hashes(hashes):
+    """
+    (phash, dhash) pairs as two uint64 arrays, for vectorized comparisons.
+
+    Returns:
+        tuple: (phashes, dhashes)
+    """
+    phashes = np.array([h[0] for h in hashes], dtype=np.uint64)
+    dhashes = np.array([h[1] for h in hashes], dtype=np.uint64)
+    return phashes, dhashes
+
+
+def nearest_duplicate(hashes, phashes, dhashes, phash_threshold=PHASH_THRESHOLD, dhash_threshold=DHASH_THRESHOLD):
+    """
+    Finds the closest near duplicate of one image among many, in one vectorized pass.
+
+    Args:
+        hashes (tuple): (phash, dhash) of the image.
+        phashes (np.ndarray): uint64 pHashes to compare against, see pack_hashes().
+        dhashes (np.ndarray): uint64 dHashes, aligned with phashes.
+
+    Returns:
+        int: Position of the closest match (the first on ties), or None.
+    """
+    if not len(phashes):
+        return None
+    phash_distances = _popcount(phashes ^ np.uint64(hashes[0]))
+    dhash_distances = _popcount(dhashes ^ np.uint64(hashes[1]))
+    matches = np.flatnonzero((phash_distances <= phash_threshold) & (dhash_distances <= dhash_threshold))
+    if not len(matches):
+        return None
+    return int(matches[np.argmin(phash_distances[matches] + dhash_distances[matches])])
+
+
+def near_duplicate_pairs(hashes, phash_threshold=PHASH_THRESHOLD, dhash_threshold=DHASH_THRESHOLD, chunk_size=1024):
+    """
+    All index pairs (i, j), i < j, whose hashes are near duplicates.
+
+    Distances are computed with vectorized XOR + popcount in chunks, so memory stays
+    bounded at chunk_size * len(hashes).
+
+    Args:
+        hashes (list): (phash, dhash) pairs.
+
+    Returns:
+        list: (i, j, phash_distance) tuples.
+    """
+    if not hashes:
+        return []
+
+    phashes, dhashes = pack_hashes(hashes)
+
+    pairs = []
+    for start in range(0, len(hashes), chunk_size):
+        stop = min(start + chunk_size, len(hashes))
+        phash_distances = _popcount(phashes[start:stop, None] ^ phashes[None, :])
+        dhash_distances = _popcount(dhashes[start:stop, None] ^ dhashes[None, :])
+        rows, cols = np.nonzero((phash_distances <= phash_threshold) & (dhash_distances <= dhash_threshold))
+        for row, col in zip(rows, cols):
+            i = start + row
+            if i < col:
+                pairs.append((int(i), int(col), int(phash_distances[row, col])))
+    return pairs
@@ -0,0 +1,67 @@
+# backend/common/image_io.py
+import io
+from PIL import Image, UnidentifiedImageError
+
+# CLIP resizes every image so its shorter side matches the model input (224 px for
+# ViT-B/32), so decoding a 12 MP JPEG at full resolution only to throw most pixels away
+# is wasted work. JPEGs are decoded straight to the smallest 1/2, 1/4 or 1/8 DCT scale
+# that still covers the target size; other formats decode normally.
+DEFAULT_TARGET_SIZE = 224
+
+# Bump whenever decode_image() changes the pixels CLIP sees, so cached catalog embeddings
+# and incremental builds made with the old decode are not mixed with new ones.
+# 0: full-resolution decode; 1: reduced-size JPEG decode (draft)
+DECODE_VERSION = 1
+
+
+class InvalidImageError(ValueError):
+    """The data isn't a decodable image."""
+
+
+class ImageTooLargeError(ValueError):
+    """The image has more pixels than allowed."""
+
+
+def preprocess_size(preprocess, default=DEFAULT_TARGET_SIZE):
+    """Input size of a CLIP preprocess pipeline (its Resize), e.g. 224."""
+    for transform in getattr(preprocess, "transforms", []):
+        size = getattr(transform, "size", None)
+        if size:
+            return size if isinstance(size, int) else max(size)
+    return default
+
+
+def decode_image(source, target_size=None, max_pixels=None):
+    """
+    Validates and decodes an image in one pass, as RGB.
+
+    The header is read first, so oversized images are refused before any pixel is
+    decoded; the single full decode then also catches truncated or corrupt data, which
+    is what a separate verify() pass would check.
+
+    Args:
+        source (str | bytes | file): Image path, encoded bytes or binary file object.
+        target_size (int): Smallest side the caller needs; JPEGs decode at reduced size down to it. None decodes in full.
+        max_pixels (int): Refuse images with more pixels (width x height). None for no limit.
+
+    Returns:
+        PIL.Image.Image: The decoded RGB image.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+            if max_pixels and width * height > max_pixels:
+                raise ImageTooLargeError(f"Image is {width}x{height}, more than {max_pixels} pixels")
+            if target_size:
+                # Keeps both sides >= target_size, so the later resize never upsamples
+                image.draft("RGB", (target_size, target_size))
+            image.load()
+            return image.convert("RGB")
+    except ImageTooLargeError:
+        raise
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(str(e)) from e
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError) as e:
+        raise InvalidImageError(str(e) or "Not a valid image") from e
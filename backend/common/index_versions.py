@@ -0,0 +1,80 @@
+# backend/common/index_versions.py
+import os
+import shutil
+from datetime import datetime, timezone
+
+# Every generator build writes its index, paths file, metadata store, re-rank vectors and
+# manifest into a fresh database/versions/<version>/ directory, then atomically points
+# database/CURRENT at it. Readers resolve files through CURRENT, so they always see one
+# complete build and never a mix of two. Without CURRENT (indexes built before versioning)
+# the files are read from the database directory itself.
+VERSIONS_DIRNAME = "versions"
+CURRENT_FILENAME = "CURRENT"
+
+
+def current_version(database_dir):
+    """Name of the published version, or None if the database isn't versioned yet."""
+    try:
+        with open(os.path.join(database_dir, CURRENT_FILENAME), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_dir(database_dir, version):
+    """Directory holding a version's files; the database directory itself for None."""
+    return database_dir if version is None else os.path.join(database_dir, VERSIONS_DIRNAME, version)
+
+
+def resolve(path, version=None):
+    """
+    Location of a database file within a version.
+
+    Args:
+        path (str): Unversioned path, e.g. ../database/flickr8k_faiss_index.faiss.
+        version (str): Version name; defaults to the published one.
+
+    Returns:
+        str: The path inside that version's directory.
+    """
+    database_dir, filename = os.path.split(path)
+    if version is None:
+        version = current_version(database_dir)
+    return os.path.join(version_dir(database_dir, version), filename)
+
+
+def new_version(database_dir):
+    """Creates an empty, not yet published version directory. Returns (name, path)."""
+    name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = version_dir(database_dir, name)
+    os.makedirs(path)
+    return name, path
+
+
+def publish(database_dir, version):
+    """Atomically makes `version` the one readers resolve to."""
+    current_path = os.path.join(database_dir, CURRENT_FILENAME)
+    with open(current_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(current_path + ".tmp", current_path)
+
+
+def prune_versions(database_dir, keep):
+    """
+    Deletes all but the newest `keep` versions, never the published one.
+
+    Servers still draining an older version keep their open and memory-mapped files
+    readable after deletion.
+
+    Returns:
+        list: Names of the deleted versions.
+    """
+    versions_root = os.path.join(database_dir, VERSIONS_DIRNAME)
+    if not os.path.isdir(versions_root):
+        return []
+    current = current_version(database_dir)
+    versions = sorted(os.listdir(versions_root), reverse=True)  # Names sort by build time
+    deleted = [name for name in versions[max(keep, 0):] if name != current]
+    for name in deleted:
+        shutil.rmtree(os.path.join(versions_root, name), ignore_errors=True)
+    return deleted
@@ -0,0 +1,20 @@
+# backend/common/media.py
+import os
+
+# Thumbnail variants generated at index build time: name -> longest side in pixels
+THUMBNAIL_SIZES = {"small": 256, "medium": 640}
+
+# Encoded formats per variant, preferred first. Clients that accept WebP get it.
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+def thumbnail_path(thumbnail_dir, variant, filename, fmt):
+    """
+    Location of one thumbnail: <thumbnail_dir>/<variant>/<catalog filename>.<fmt>
+
+    Keeping the full catalog filename (extension included) makes the thumbnail name a
+    stable function of the image ID, even for "1.jpg" and "1.jpeg" side by side.
+    """
+    return os.path.join(thumbnail_dir, variant, f"{filename}.{fmt}")
@@ -0,0 +1,212 @@
+# backend/common/metadata_store.py
+import json
+import mmap
+import os
+import re
+import struct
+from itertools import accumulate
+from common.media import THUMBNAIL_FORMATS, THUMBNAIL_SIZES, thumbnail_path
+
+# Layout: header (magic, row count) | (rows + 1) little-endian uint64 record offsets |
+# UTF-8 JSON records. Record N describes FAISS id N; removed ids are empty records.
+# Readers map the file and only decode the records a search actually returns.
+MAGIC = b"SSMETA01"
+_HEADER = struct.Struct("<8sQ")
+_OFFSETS = struct.Struct("<2Q")
+_END = struct.Struct("<Q")
+
+
+def parse_captions(captions_file):
+    """
+    Parses a captions file of "image_name,caption" lines.
+
+    Returns:
+        dict: Image filename -> list of its captions, in file order.
+    """
+    captions = {}
+    with open(captions_file, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split(",", 1)
+            if len(parts) == 2:
+                captions.setdefault(parts[0].strip(), []).append(parts[1].strip())
+    return captions
+
+
+# Searchable attributes are derived from the captions, which name the landmark first and
+# usually its state (Indian sites) or country further on.
+STATES = (
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan",
+    "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+    "Andaman and Nicobar Islands", "Chandigarh", "Delhi", "Jammu and Kashmir", "Ladakh", "Puducherry",
+)
+STATE_ALIASES = {
+    "Orissa": "Odisha", "Kashmir": "Jammu and Kashmir", "Pondicherry": "Puducherry",
+    "Mumbai": "Maharashtra", "Kolkata": "West Bengal", "Chennai": "Tamil Nadu",
+    "Bengaluru": "Karnataka", "Hyderabad": "Telangana", "Agra": "Uttar Pradesh",
+    "Varanasi": "Uttar Pradesh", "Jaipur": "Rajasthan", "Udaipur": "Rajasthan", "Amritsar": "Punjab",
+}
+COUNTRIES = (
+    "India", "Armenia", "Australia", "Brazil", "Cambodia", "Canada", "Chile", "China", "Egypt",
+    "France", "Germany", "Greece", "Indonesia", "Italy", "Japan", "Jordan", "Kazakhstan", "Malaysia",
+    "Mexico", "Nepal", "Netherlands", "New Zealand", "Peru", "Portugal", "Russia", "Singapore",
+    "South Africa", "Spain", "Sri Lanka", "Thailand", "Turkey", "United Arab Emirates",
+    "United Kingdom", "United States", "Vietnam", "Zambia", "Zimbabwe",
+)
+COUNTRY_ALIASES = {
+    "USA": "United States", "U.S.": "United States", "UK": "United Kingdom", "England": "United Kingdom",
+    "Scotland": "United Kingdom", "London": "United Kingdom", "Paris": "France", "Rome": "Italy",
+    "Moscow": "Russia", "Kyoto": "Japan", "Tokyo": "Japan", "Dubai": "United Arab Emirates", "UAE": "United Arab Emirates",
+}
+# Checked in order, first in the landmark name and then in the whole caption, so
+# "Taj Mahal ... mausoleum" is a tomb and "Kailasa Temple ... caves" a temple.
+CATEGORY_KEYWORDS = (
+    ("tomb", ("tomb", "mausoleum", "cenotaph", "maqbara")),
+    ("mosque", ("mosque", "masjid", "dargah")),
+    ("church", ("church", "cathedral", "basilica", "chapel")),
+    ("temple", ("temple", "mandir", "stupa", "monastery", "gompa", "pagoda", "shrine", "wat")),
+    ("fort", ("fort", "fortress", "citadel", "castle", "kremlin")),
+    ("palace", ("palace", "haveli")),
+    ("cave", ("cave", "caves", "grotto")),
+    ("tower", ("tower", "minar", "minaret", "skyscraper")),
+    ("monument", ("monument", "memorial", "statue", "gate", "arch", "ruins", "jail")),
+    ("nature", ("falls", "waterfall", "waterfalls", "lake", "river", "island", "beach", "valley", "mountain",
+                "mount", "peak", "volcano", "canyon", "national park", "forest", "desert", "hill", "hills")),
+)
+
+
+def _phrase_pattern(phrases):
+    return re.compile(r"\b(" + "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True)) + r")(?!\w)", re.IGNORECASE)
+
+
+_STATE_PATTERN = _phrase_pattern([*STATES, *STATE_ALIASES])
+_COUNTRY_PATTERN = _phrase_pattern([*COUNTRIES, *COUNTRY_ALIASES])
+_CANONICAL = {name.lower(): name for name in (*STATES, *COUNTRIES)}
+_CANONICAL.update({alias.lower(): name for alias, name in (*STATE_ALIASES.items(), *COUNTRY_ALIASES.items())})
+_CATEGORY_PATTERNS = [(category, _phrase_pattern(keywords)) for category, keywords in CATEGORY_KEYWORDS]
+
+
+def landmark_name(caption):
+    """The landmark a caption is about: its first clause, e.g. "Ajanta Caves"."""
+    return re.split(r",| – | - |\(", caption, maxsplit=1)[0].strip() if caption else ""
+
+
+def _first_match(pattern, text):
+    match = pattern.search(text)
+    return _CANONICAL[match.group(1).lower()] if match else ""
+
+
+def caption_attributes(captions):
+    """
+    Derives the filterable attributes of an image from its captions.
+
+    Returns:
+        dict: landmark, state, country and category; "" where a caption doesn't say.
+    """
+    landmark = landmark_name(captions[0]) if captions else ""
+    text = " ".join(captions)
+    state = _first_match(_STATE_PATTERN, text)
+    country = "India" if state else _first_match(_COUNTRY_PATTERN, text)
+    category = next((name for name, pattern in _CATEGORY_PATTERNS if pattern.search(landmark)), "")
+    if not category:
+        category = next((name for name, pattern in _CATEGORY_PATTERNS if pattern.search(text)), "")
+    return {"landmark": landmark, "state": state, "country": country, "category": category}
+
+
+def image_filename(image_path):
+    # Paths files written on Windows use backslashes
+    return os.path.basename(image_path.replace("\\", "/"))
+
+
+def build_record(image_path, captions, width=None, height=None):
+    """
+    Builds the metadata record of one catalog image.
+
+    Args:
+        image_path (str): Image path as stored in the paths file.
+        captions (list): All captions of the image.
+        width (int): Image width in pixels, if known.
+        height (int): Image height in pixels, if known.
+
+    Returns:
+        dict: The record.
+    """
+    filename = image_filename(image_path)
+    return {
+        "path": image_path,
+        "filename": filename,
+        "captions": list(captions),
+        **caption_attributes(captions),
+        "width": width,
+        "height": height,
+        # Relative to the thumbnail directory, per variant and format
+        "thumbnails": {
+            variant: {fmt: thumbnail_path("", variant, filename, fmt).replace(os.sep, "/") for fmt in THUMBNAIL_FORMATS}
+            for variant in THUMBNAIL_SIZES
+        },
+    }
+
+
+def encode_metadata(records):
+    """
+    Serializes records (one per FAISS id, None for unused ids) into the store format.
+
+    Returns:
+        bytes: The encoded store.
+    """
+    blobs = [b"" if record is None else json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for record in records]
+    offsets = list(accumulate((len(blob) for blob in blobs), initial=0))
+    return _HEADER.pack(MAGIC, len(blobs)) + struct.pack(f"<{len(offsets)}Q", *offsets) + b"".join(blobs)
+
+
+def write_metadata_store(path, records):
+    """Writes a metadata store to a temporary file next to `path` and swaps it in."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_metadata(records))
+    os.replace(tmp_path, path)
+
+
+class MetadataStore:
+    """
+    Read-only, row-aligned image metadata with O(1) lookup by FAISS id.
+
+    Opening a store only maps the file and validates the header, so it takes the same
+    time for ten images as for ten million; records are decoded on access.
+    """
+
+    def __init__(self, buffer):
+        magic, rows = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a metadata store (bad magic)")
+        self._buffer = buffer
+        self._rows = rows
+        self._data_start = _HEADER.size + (rows + 1) * 8
+        if self._data_start > len(buffer) or self._data_start + _END.unpack_from(buffer, self._data_start - 8)[0] > len(buffer):
+            raise ValueError("Metadata store is truncated")
+
+    def _offsets(self, row_id):
+        # (start, end) of a record, relative to the first record
+        return _OFFSETS.unpack_from(self._buffer, _HEADER.size + row_id * 8)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(encode_metadata(records))
+
+    def __len__(self):
+        return self._rows
+
+    def get(self, row_id):
+        """The record of a FAISS id, or None if the id is unused or out of range."""
+        if not 0 <= row_id < len(self):
+            return None
+        start, end = self._offsets(row_id)
+        if start == end:
+            return None
+        return json.loads(self._buffer[self._data_start + start:self._data_start + end].decode("utf-8"))
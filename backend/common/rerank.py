@@ -0,0 +1,30 @@
+# backend/common/rerank.py
+import numpy as np
+
+
+def rerank(ids, queries, vectors, k):
+    """
+    Re-scores search candidates with full-precision vectors and keeps the best k.
+
+    Args:
+        ids (np.ndarray): Candidate ids from an approximate search (-1 for none), shape (Q, C).
+        queries (np.ndarray): Query vectors, shape (Q, D).
+        vectors (np.ndarray): Full-precision vectors indexed by id, usually memory-mapped.
+        k (int): Number of results to keep per query.
+
+    Returns:
+        np.ndarray: Exact inner-product scores, shape (Q, k), -inf where fewer than k candidates.
+        np.ndarray: Their ids, shape (Q, k), -1 where fewer than k candidates.
+    """
+    exact_scores = np.full((len(ids), k), -np.inf, dtype=np.float32)
+    exact_ids = np.full((len(ids), k), -1, dtype=np.int64)
+    for row, (query, candidates) in enumerate(zip(queries, ids)):
+        # Ascending ids read the memory-mapped side file front to back
+        candidates = np.sort(candidates[(candidates >= 0) & (candidates < len(vectors))])
+        if not len(candidates):
+            continue
+        candidate_scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+        best = np.argsort(-candidate_scores, kind="stable")[:k]
+        exact_scores[row, :len(best)] = candidate_scores[best]
+        exact_ids[row, :len(best)] = candidates[best]
+    return exact_scores, exact_ids
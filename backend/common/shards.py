@@ -0,0 +1,64 @@
+# backend/common/shards.py
+import json
+import os
+import zlib
+
+# A sharded index is N ID-mapped FAISS files next to the index path, listed in a small
+# JSON file. Every shard keeps the global FAISS ids, so the paths file, metadata store
+# and re-rank vectors stay shared and a merged search needs no id translation.
+SHARD_KEYS = ("hash", "landmark")
+
+
+def shard_list_path(index_path):
+    """<index>.shards.json, written instead of <index>.faiss for sharded builds."""
+    return os.path.splitext(index_path)[0] + ".shards.json"
+
+
+def shard_path(index_path, shard, count):
+    root, ext = os.path.splitext(index_path)
+    return f"{root}.shard-{shard}-of-{count}{ext}"
+
+
+def assign_shard(key, count):
+    """Stable shard number of a key (an image filename or landmark name)."""
+    return zlib.crc32(key.encode("utf-8")) % count
+
+
+def read_shard_list(index_path):
+    """
+    Reads the shard list of an index.
+
+    Returns:
+        list: Absolute paths of the shard files, or None if the index is not sharded.
+    """
+    list_path = shard_list_path(index_path)
+    if not os.path.exists(list_path):
+        return None
+    with open(list_path, "r", encoding="utf-8") as f:
+        shard_list = json.load(f)
+    directory = os.path.dirname(list_path)
+    return [os.path.join(directory, name) for name in shard_list["files"]]
+
+
+def write_shard_list(index_path, files, shard_by):
+    """Writes the shard list to a temporary file next to it and swaps it in."""
+    list_path = shard_list_path(index_path)
+    with open(list_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"count": len(files), "shard_by": shard_by, "files": [os.path.basename(path) for path in files]}, f)
+    os.replace(list_path + ".tmp", list_path)
+
+
+def merge_shards(shards, threaded=True):
+    """
+    Wraps shard indexes in one faiss.IndexShards.
+
+    A search fans the queries out to every shard (one thread per shard when `threaded`)
+    and merges the per-shard top-k into the global top-k.
+    """
+    import faiss
+
+    merged = faiss.IndexShards(shards[0].d, threaded, False)  # successive_ids=False: shards keep global ids
+    for shard in shards:
+        merged.add_shard(shard)
+    merged.referenced_objects = list(shards)  # IndexShards doesn't own its shards
+    return merged
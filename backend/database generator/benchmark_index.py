@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import time
+import faiss
+import numpy as np
+from src.index_factory import INDEX_TYPES, build_index, choose_nlist, set_search_parameters
+from config import OUTPUT_INDEX_PATH, OUTPUT_VECTORS_PATH
+from common.index_versions import resolve
+
+NPROBE_SWEEP = (1, 2, 4, 8, 16, 32, 64, 128)
+EF_SEARCH_SWEEP = (16, 32, 64, 128, 256)
+
+
+def load_catalog_vectors(index_path=OUTPUT_INDEX_PATH, vectors_path=OUTPUT_VECTORS_PATH):
+    """
+    Reads the embeddings back out of the saved flat index, or the re-rank side file of a
+    compressed one.
+
+    Args:
+        index_path (str): Path to a FAISS index built with index type "flat".
+        vectors_path (str): Full-precision vectors written next to compressed indexes.
+
+    Returns:
+        np.ndarray: The catalog embeddings.
+    """
+    index_path, vectors_path = resolve(index_path), resolve(vectors_path)
+    if os.path.exists(vectors_path):
+        vectors = np.load(vectors_path)
+        return np.ascontiguousarray(vectors[np.any(vectors != 0, axis=1)])  # Skip removed ids
+
+    index = faiss.read_index(index_path)
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if not isinstance(inner, faiss.IndexFlat):
+        raise SystemExit("❌ Recall needs exact vectors: rebuild with --index-type flat (or a compressed type with re-rank vectors) or use --synthetic.")
+    return inner.reconstruct_n(0, inner.ntotal)
+
+
+def make_synthetic_vectors(num_vectors, dimension, seed=0):
+    """
+    Generates clustered, normalized random vectors that roughly mimic CLIP embeddings.
+
+    Args:
+        num_vectors (int): Number of vectors.
+        dimension (int): Vector dimension.
+        seed (int): Random seed.
+
+    Returns:
+        np.ndarray: Normalized vectors of shape (num_vectors, dimension).
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, num_vectors // 100), dimension)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=num_vectors)]
+    vectors += 0.5 * rng.standard_normal((num_vectors, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors, num_queries, noise=0.05, seed=1):
+    """
+    Builds queries by perturbing random catalog vectors.
+
+    Args:
+        vectors (np.ndarray): Catalog embeddings.
+        num_queries (int): Number of queries.
+        noise (float): Standard deviation of the Gaussian noise added.
+        seed (int): Random seed.
+
+    Returns:
+        np.ndarray: Normalized query vectors.
+    """
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(len(vectors), size=num_queries)].copy()
+    queries += noise * rng.standard_normal(queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def recall_at_k(found_ids, true_ids):
+    """
+    Computes the mean fraction of the exact top-k that the index returned.
+
+    Args:
+        found_ids (np.ndarray): Ids returned by the index, shape (Q, k).
+        true_ids (np.ndarray): Exact ids from the flat baseline, shape (Q, k).
+
+    Returns:
+        float: Mean recall@k.
+    """
+    hits = [len(set(found[found >= 0]) & set(truth)) for found, truth in zip(found_ids, true_ids)]
+    return float(np.mean(hits)) / true_ids.shape[1]
+
+
+def time_queries(index, queries, k):
+    """
+    Searches one query at a time, as the server does.
+
+    Args:
+        index (faiss.Index): The index to search.
+        queries (np.ndarray): Query vectors.
+        k (int): Number of neighbours.
+
+    Returns:
+        np.ndarray: Returned ids, shape (Q, k).
+        float: Mean latency per query in milliseconds.
+    """
+    found_ids = np.empty((len(queries), k), dtype=np.int64)
+    start_time = time.perf_counter()
+    for i in range(len(queries)):
+        _, found_ids[i:i + 1] = index.search(queries[i:i + 1], k)
+    elapsed = time.perf_counter() - start_time
+    return found_ids, 1000 * elapsed / len(queries)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recall@k vs latency of FAISS index types against the flat baseline.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark N synthetic vectors instead of the catalog")
+    parser.add_argument("--dimension", type=int, default=512, help="Dimension of synthetic vectors (default: 512)")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries (default: 500)")
+    parser.add_argument("-k", type=int, default=5, help="Neighbours per query (default: 5)")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES[1:]))
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    faiss.omp_set_num_threads(1)  # Per-query latency, like a single server request
+
+    if args.synthetic:
+        vectors = make_synthetic_vectors(args.synthetic, args.dimension)
+    else:
+        vectors = load_catalog_vectors()
+    queries = make_queries(vectors, args.queries)
+    ids = np.arange(len(vectors), dtype=np.int64)
+    k = min(args.k, len(vectors))
+
+    print(f"📏 {len(vectors)} vectors, {len(queries)} queries, k={k}")
+
+    baseline = build_index("flat", vectors, ids)
+    true_ids, flat_ms = time_queries(baseline, queries, k)
+    results = [{"index_type": "flat", "parameter": None, "value": None, "recall": 1.0, "latency_ms": flat_ms}]
+
+    for index_type in args.types:
+        start_time = time.perf_counter()
+        index = build_index(index_type, vectors, ids)
+        build_seconds = time.perf_counter() - start_time
+
+        if index_type == "hnsw":
+            parameter, sweep = "efSearch", EF_SEARCH_SWEEP
+        elif index_type.startswith("ivf"):
+            parameter, sweep = "nprobe", [n for n in NPROBE_SWEEP if n <= choose_nlist(len(vectors))]
+        else:
+            parameter, sweep = None, [None]  # Compressed flat codes have no search-time knob
+
+        for value in sweep:
+            if parameter:
+                set_search_parameters(index, **{"nprobe" if parameter == "nprobe" else "ef_search": value})
+            found_ids, latency_ms = time_queries(index, queries, k)
+            results.append({
+                "index_type": index_type,
+                "parameter": parameter,
+                "value": value,
+                "recall": recall_at_k(found_ids, true_ids),
+                "latency_ms": latency_ms,
+                "build_seconds": build_seconds,
+            })
+
+    print(f"\n{'index':<10} {'param':<14} {'recall@' + str(k):>10} {'ms/query':>10} {'speedup':>8}")
+    for result in results:
+        param = f"{result['parameter']}={result['value']}" if result["parameter"] else "-"
+        speedup = flat_ms / result["latency_ms"] if result["latency_ms"] else float("inf")
+        print(f"{result['index_type']:<10} {param:<14} {result['recall']:>10.3f} {result['latency_ms']:>10.3f} {speedup:>7.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"num_vectors": len(vectors), "num_queries": len(queries), "k": k, "results": results}, f, indent=2)
+        print(f"\n✅ Results saved at {args.output}")
+
+
+if __name__ == "__main__":
+    main()
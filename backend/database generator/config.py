@@ -1,11 +1,71 @@
 import torch
 import os
+import sys
+
+# Make backend/common (shared with the server) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Database paths (relative to backend directory)
+DATABASE_DIR = os.path.join("..", "database")
 BASE_PATH = os.path.join("..", "database", "images")
 CAPTIONS_FILE_PATH = os.path.join("..", "database", "captions.txt")
 OUTPUT_INDEX_PATH = os.path.join("..", "database", "flickr8k_faiss_index.faiss")
 OUTPUT_PATHS_FILE = os.path.join("..", "database", "flickr8k_faiss_index.paths")
+# Row-aligned image metadata (path, captions, landmark, size, thumbnails) read by the server
+OUTPUT_METADATA_PATH = os.path.join("..", "database", "flickr8k_faiss_index.meta")
+# Per-attribute id lists (landmark, state, country, category from the captions) behind
+# the server's filtered search
+OUTPUT_FILTERS_PATH = os.path.join("..", "database", "flickr8k_faiss_index.filters.npz")
+
+# CLIP model used for all embeddings
+MODEL_NAME = "ViT-B/32"
 
 # Device (CPU or GPU)
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+# CLIP encoder backend: "torch", "torch_int8", "onnx" or "onnx_int8" (see backend/common/encoders.py).
+# Use the same backend as the server so catalog and query embeddings match.
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.path.join("..", "database", "onnx")  # Written by export_onnx.py
+ENCODER_INTRA_OP_THREADS = int(os.getenv("ENCODER_INTRA_OP_THREADS", "0"))  # 0 = library default
+ENCODER_INTER_OP_THREADS = int(os.getenv("ENCODER_INTER_OP_THREADS", "0"))
+
+# Batched embedding pipeline
+BATCH_SIZE = 32  # Images per encode_image forward pass
+TEXT_BATCH_SIZE = 256  # Captions per encode_text forward pass
+NUM_WORKERS = min(4, os.cpu_count() or 1)  # DataLoader processes decoding/preprocessing images
+
+# Each build is written to DATABASE_DIR/versions/<version>/ and published through
+# DATABASE_DIR/CURRENT; the OUTPUT_* paths name the files inside a version
+# (see backend/common/index_versions.py). Older versions beyond this many are deleted.
+KEEP_INDEX_VERSIONS = 3
+
+# Incremental updates: per-image state (size, mtime, content hash, FAISS id) of the last build
+OUTPUT_MANIFEST_PATH = os.path.join("..", "database", "flickr8k_faiss_index.manifest.json")
+
+# Content-addressed embedding cache, one memory-mapped store per model
+EMBEDDING_CACHE_DIR = os.path.join("..", "database", "embedding_cache")
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000  # Least recently used vectors are evicted beyond this
+
+# FAISS index type: "flat" (exact), "sq_fp16", "sq8" or "pq" (compressed codes),
+# "ivf_flat", "ivf_pq" or "hnsw"
+INDEX_TYPE = "flat"
+IVF_NLIST = None  # Inverted lists for IVF indexes; None picks ~4 * sqrt(N)
+PQ_M = 64  # Sub-quantizers for IVF-PQ (rounded down to a divisor of the dimension)
+HNSW_M = 32  # Graph neighbours per node for HNSW
+TRAIN_SAMPLE_SIZE = 100_000  # Vectors sampled to train IVF/PQ indexes
+
+# Split the index into SHARDS files the server searches in parallel. SHARD_BY "hash" spreads
+# images evenly by filename; "landmark" keeps each landmark's images in one shard.
+SHARDS = 1
+SHARD_BY = "hash"
+
+# Compressed index types also get the float32 vectors in a side file (row N = FAISS id N),
+# memory-mapped by the server to re-rank the approximate top candidates exactly
+OUTPUT_VECTORS_PATH = os.path.join("..", "database", "flickr8k_faiss_index.vectors.npy")
+WRITE_RERANK_VECTORS = True
+RERANK_CANDIDATES = 50  # Candidates re-ranked when the build measures recall after re-ranking
+
+# Thumbnails served by the API instead of full-size originals (sizes live in common/media.py)
+THUMBNAIL_DIR = os.path.join("..", "database", "thumbnails")
+THUMBNAIL_QUALITY = 80
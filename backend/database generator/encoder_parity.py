@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import time
+from glob import glob
+import numpy as np
+import torch
+from config import BASE_PATH, ENCODER_INTER_OP_THREADS, ENCODER_INTRA_OP_THREADS, MODEL_NAME, ONNX_MODEL_DIR
+from common.encoders import ENCODER_BACKENDS, cosine_similarities, load_encoder
+from src.captions_loader import load_captions
+from src.preprocess import preprocess_image, tokenize_text
+
+
+def load_inputs(num_images, num_captions, preprocess):
+    """
+    Preprocesses bundled images and tokenizes bundled captions once, for every backend.
+
+    Args:
+        num_images (int): Number of catalog images to use.
+        num_captions (int): Number of distinct captions to use.
+        preprocess (function): CLIP's preprocessing function.
+
+    Returns:
+        torch.Tensor: Preprocessed images of shape (N, 3, H, W).
+        torch.Tensor: Caption tokens.
+    """
+    image_paths = sorted(glob(os.path.join(BASE_PATH, "*.jpg")) + glob(os.path.join(BASE_PATH, "*.jpeg")))[:num_images]
+    tensors = [preprocess_image(path, preprocess) for path in image_paths]
+    images = torch.cat([tensor.cpu() for tensor in tensors if tensor is not None])
+
+    captions = list(dict.fromkeys(caption for captions in load_captions().values() for caption in captions))[:num_captions]
+    tokens = tokenize_text(captions).cpu()
+    return images, tokens
+
+
+def encode(encoder, images, tokens, batch_size):
+    """
+    Encodes images and captions in batches and times the image encoder.
+
+    Returns:
+        np.ndarray: Image embeddings.
+        np.ndarray: Text embeddings.
+        float: Mean image encode time per image in milliseconds.
+    """
+    encoder.encode_image(images[:batch_size])  # Warm-up
+    start_time = time.perf_counter()
+    image_embeddings = np.concatenate([encoder.encode_image(images[i:i + batch_size]) for i in range(0, len(images), batch_size)])
+    image_ms = 1000 * (time.perf_counter() - start_time) / len(images)
+    text_embeddings = np.concatenate([encoder.encode_text(tokens[i:i + batch_size]) for i in range(0, len(tokens), batch_size)])
+    return image_embeddings, text_embeddings, image_ms
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare encoder backends with the fp32 PyTorch reference.")
+    parser.add_argument("--backends", nargs="+", choices=ENCODER_BACKENDS[1:], default=list(ENCODER_BACKENDS[1:]))
+    parser.add_argument("--images", type=int, default=64, help="Catalog images to encode (default: 64)")
+    parser.add_argument("--captions", type=int, default=128, help="Captions to encode (default: 128)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Images/captions per forward pass (default: 16)")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Fail below this cosine similarity (default: 0.98)")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    threads = (ENCODER_INTRA_OP_THREADS, ENCODER_INTER_OP_THREADS)
+
+    # Reference on CPU in fp32, the precision the other backends are measured against
+    reference = load_encoder("torch", MODEL_NAME, "cpu", ONNX_MODEL_DIR, *threads)
+    images, tokens = load_inputs(args.images, args.captions, reference.preprocess)
+    reference_images, reference_texts, reference_ms = encode(reference, images, tokens, args.batch_size)
+    print(f"📏 torch (reference): {reference_ms:.1f} ms/image on {len(images)} images")
+
+    results = [{"backend": "torch", "image_ms": reference_ms, "image_cosine_min": 1.0, "text_cosine_min": 1.0}]
+    failed = []
+    for backend in args.backends:
+        try:
+            encoder = load_encoder(backend, MODEL_NAME, "cpu", ONNX_MODEL_DIR, *threads)
+        except (FileNotFoundError, ImportError) as e:
+            print(f"⚠️ Skipping {backend}: {e}")
+            continue
+
+        image_embeddings, text_embeddings, image_ms = encode(encoder, images, tokens, args.batch_size)
+        image_cosine = cosine_similarities(reference_images, image_embeddings)
+        text_cosine = cosine_similarities(reference_texts, text_embeddings)
+        result = {
+            "backend": backend,
+            "image_ms": image_ms,
+            "speedup": reference_ms / image_ms,
+            "image_cosine_mean": float(image_cosine.mean()),
+            "image_cosine_min": float(image_cosine.min()),
+            "text_cosine_mean": float(text_cosine.mean()),
+            "text_cosine_min": float(text_cosine.min()),
+        }
+        results.append(result)
+
+        ok = min(result["image_cosine_min"], result["text_cosine_min"]) >= args.min_cosine
+        if not ok:
+            failed.append(backend)
+        print(
+            f"{'✅' if ok else '❌'} {backend}: {image_ms:.1f} ms/image ({result['speedup']:.2f}x), "
+            f"cosine image min {result['image_cosine_min']:.4f} / text min {result['text_cosine_min']:.4f}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"model": MODEL_NAME, "threads": threads, "results": results}, f, indent=2)
+        print(f"✅ Results saved at {args.output}")
+
+    if failed:
+        raise SystemExit(f"❌ Below cosine {args.min_cosine}: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+from config import MODEL_NAME, ONNX_MODEL_DIR
+from common.encoders import export_onnx
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the CLIP image and text encoders to ONNX for the onnx backends.")
+    parser.add_argument("--model", default=MODEL_NAME, help=f"CLIP model name (default: {MODEL_NAME})")
+    parser.add_argument("--output-dir", default=ONNX_MODEL_DIR, help=f"Where to write the models (default: {ONNX_MODEL_DIR})")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version (default: 17)")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the dynamically int8-quantized variants")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"🔄 Exporting {args.model} to ONNX...")
+    for path in export_onnx(args.model, args.output_dir, opset=args.opset, quantize=not args.no_quantize):
+        print(f"✅ Wrote {path}")
+    print("ℹ️ Run encoder_parity.py to check the exported models against the PyTorch reference.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
+import argparse
 import os
 from glob import glob
 from src.captions_loader import load_captions
-from src.faiss_index import create_faiss_index, load_faiss_index
-from config import BASE_PATH
+from src.dedup import report_duplicate_images
+from src.embedding_cache import EmbeddingCache
+from src.faiss_index import create_faiss_index, load_faiss_index, update_faiss_index
+from src.index_factory import INDEX_TYPES
+from src.thumbnails import generate_thumbnails
+from config import BASE_PATH, BATCH_SIZE, INDEX_TYPE, NUM_WORKERS, SHARD_BY, SHARDS
+from common.shards import SHARD_KEYS
 
 
 def validate_images_with_captions(image_paths, captions_dict):
@@ -33,7 +39,54 @@ def validate_images_with_captions(image_paths, captions_dict):
         print("\n✅ All images match with captions.txt")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the Smart Sight FAISS index.")
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help=f"Images per CLIP forward pass (default: {BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=NUM_WORKERS,
+        help=f"DataLoader processes decoding images, 0 to decode in-process (default: {NUM_WORKERS})",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only embed new or changed images and drop deleted ones, using the manifest of the last build",
+    )
+    parser.add_argument(
+        "--index-type", choices=INDEX_TYPES, default=INDEX_TYPE,
+        help=f"FAISS index type; compare them with benchmark_index.py (default: {INDEX_TYPE})",
+    )
+    parser.add_argument(
+        "--shards", type=int, default=SHARDS,
+        help=f"Split the index into N shard files the server searches in parallel; sharded builds are never incremental (default: {SHARDS})",
+    )
+    parser.add_argument(
+        "--shard-by", choices=SHARD_KEYS, default=SHARD_BY,
+        help=f"Assign images to shards by filename hash or by landmark (default: {SHARD_BY})",
+    )
+    parser.add_argument(
+        "--no-rerank-vectors", action="store_true",
+        help="With a compressed index type (sq_fp16, sq8, pq, ivf_pq), don't write the float32 side file used for exact re-ranking",
+    )
+    parser.add_argument(
+        "--check-duplicates", action="store_true",
+        help="Report exact and near-duplicate images (perceptual hashes) before building",
+    )
+    parser.add_argument(
+        "--no-thumbnails", action="store_true",
+        help="Skip generating the thumbnails the API serves instead of full-size images",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Recompute every embedding instead of reusing the on-disk embedding cache",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     # Load captions
     captions_dict = load_captions()
 
@@ -45,8 +98,21 @@ def main():
     # Validate images with captions.txt
     validate_images_with_captions(image_paths, captions_dict)
 
-    # Create and save FAISS index
-    create_faiss_index(image_paths, captions_dict)
+    if args.check_duplicates:
+        report_duplicate_images(image_paths)
+
+    cache = None if args.no_cache else EmbeddingCache()
+
+    # Create (or update) and save FAISS index
+    build = update_faiss_index if args.incremental else create_faiss_index
+    build(
+        image_paths, captions_dict,
+        batch_size=args.batch_size, num_workers=args.workers, cache=cache, index_type=args.index_type,
+        rerank_vectors=not args.no_rerank_vectors, shards=max(1, args.shards), shard_by=args.shard_by,
+    )
+
+    if not args.no_thumbnails:
+        generate_thumbnails(image_paths, num_workers=args.workers)
 
     # Load FAISS index (for verification)
     index, paths = load_faiss_index()
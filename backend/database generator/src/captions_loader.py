@@ -1,6 +1,7 @@
 from collections import defaultdict
 import os
 from config import CAPTIONS_FILE_PATH
+from common.metadata_store import parse_captions
 
 def load_captions(captions_file=CAPTIONS_FILE_PATH):
     """
@@ -10,7 +11,7 @@ def load_captions(captions_file=CAPTIONS_FILE_PATH):
         captions_file (str): Path to the captions file.
 
     Returns:
-        dict: A dictionary mapping image filenames to their captions.
+        dict: A dictionary mapping image filenames to the list of their captions.
     """
     captions_dict = defaultdict(list)
 
@@ -19,13 +20,8 @@ def load_captions(captions_file=CAPTIONS_FILE_PATH):
         return captions_dict
 
     try:
-        with open(captions_file, 'r', encoding="utf-8") as f:
-            for line in f:
-                parts = line.strip().split(',', 1)  # Expect "image_name,caption"
-                if len(parts) == 2:
-                    img_name, caption = parts
-                    captions_dict[img_name].append(caption)
-
+        # Same parser the metadata store is built with; expects "image_name,caption" lines
+        captions_dict.update(parse_captions(captions_file))
         print(f"✅ Loaded captions for {len(captions_dict)} images.")
 
     except Exception as e:
@@ -0,0 +1,50 @@
+import torch
+from torch.utils.data import Dataset
+from common.image_io import decode_image, preprocess_size
+
+
+class ImagePathDataset(Dataset):
+    """
+    Decodes and preprocesses catalog images so a DataLoader can feed them to CLIP in batches.
+    JPEGs are decoded at reduced size, just large enough for `preprocess`.
+
+    Args:
+        image_paths (list): List of image file paths.
+        preprocess (function): CLIP's preprocessing function.
+    """
+
+    def __init__(self, image_paths, preprocess):
+        self.image_paths = list(image_paths)
+        self.preprocess = preprocess
+        self.target_size = preprocess_size(preprocess)
+
+    def __len__(self):
+        return len(self.image_paths)
+
+    def __getitem__(self, idx):
+        image_path = self.image_paths[idx]
+        try:
+            image = decode_image(image_path, self.target_size)
+            return idx, self.preprocess(image)
+        except Exception as e:
+            print(f"❌ Error preprocessing image {image_path}: {e}")
+            return idx, None
+
+
+def collate_images(batch):
+    """
+    Stacks preprocessed images into a single tensor, dropping images that failed to load.
+
+    Args:
+        batch (list): List of (index, tensor) samples from ImagePathDataset.
+
+    Returns:
+        list: Dataset indices of the stacked images.
+        torch.Tensor: Batch tensor, or None if every image in the batch failed.
+    """
+    batch = [(idx, tensor) for idx, tensor in batch if tensor is not None]
+    if not batch:
+        return [], None
+
+    indices, tensors = zip(*batch)
+    return list(indices), torch.stack(tensors)
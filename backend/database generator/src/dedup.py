@@ -0,0 +1,80 @@
+import os
+from collections import defaultdict
+from tqdm import tqdm
+from common.image_hash import image_hashes, near_duplicate_pairs
+from common.image_io import decode_image
+from src.manifest import file_sha256
+
+
+def find_duplicate_images(image_paths):
+    """
+    Finds exact and near-duplicate images (re-encoded, resized or re-compressed copies).
+
+    Exact duplicates share a content hash; near duplicates have matching perceptual
+    hashes (pHash and dHash), the same ones the server uses to dedupe uploads.
+
+    Args:
+        image_paths (list): List of image file paths.
+
+    Returns:
+        list: Groups of paths (lists with 2+ entries) that show the same picture.
+    """
+    by_sha = defaultdict(list)
+    hashed_paths = []
+    hashes = []
+
+    for image_path in tqdm(image_paths, desc="Hashing images", unit="img"):
+        try:
+            by_sha[file_sha256(image_path)].append(image_path)
+            # Hashes only need a thumbnail; skip full JPEG decode
+            hashes.append(image_hashes(decode_image(image_path, 128)))
+            hashed_paths.append(image_path)
+        except Exception as e:
+            print(f"❌ Error hashing image {image_path}: {e}")
+
+    # Union-find over exact and near-duplicate pairs
+    parent = {path: path for path in hashed_paths}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    def union(a, b):
+        parent[find(a)] = find(b)
+
+    for paths in by_sha.values():
+        for path in paths[1:]:
+            if path in parent and paths[0] in parent:
+                union(paths[0], path)
+    for i, j, _ in near_duplicate_pairs(hashes):
+        union(hashed_paths[i], hashed_paths[j])
+
+    groups = defaultdict(list)
+    for path in hashed_paths:
+        groups[find(path)].append(path)
+    return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=lambda group: group[0])
+
+
+def report_duplicate_images(image_paths):
+    """
+    Prints duplicate groups so they can be removed before they bloat the index.
+
+    Args:
+        image_paths (list): List of image file paths.
+
+    Returns:
+        list: The duplicate groups.
+    """
+    groups = find_duplicate_images(image_paths)
+
+    if groups:
+        print("\n🔁 Duplicate images:")
+        for group in groups:
+            print("   " + ", ".join(os.path.basename(path) for path in group))
+        print(f"\n⚠️ {len(groups)} duplicate groups, {sum(len(group) - 1 for group in groups)} redundant images")
+    else:
+        print("\n✅ No duplicate images found")
+
+    return groups
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import numpy as np
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES, ENCODER_BACKEND, MODEL_NAME
+from common.image_io import DECODE_VERSION
+
+INITIAL_CAPACITY = 1024
+EVICTION_FRACTION = 0.1  # Share of entries dropped at once when the cache is full
+
+
+def text_sha256(text):
+    """
+    Computes the SHA-256 of a caption.
+
+    Args:
+        text (str): The caption.
+
+    Returns:
+        str: Hex digest of the UTF-8 encoded caption.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed store of CLIP embeddings that persists across builds.
+
+    Vectors live in a memory-mapped .npy matrix and a small JSON index maps
+    "<kind>:<sha256>" keys to matrix slots. Each model and encoder backend gets its own
+    directory, so entries are effectively keyed by (model name, backend, content hash)
+    and switching back and forth reuses both sets of vectors. Image keys also carry the
+    decode version ("image:d1:<sha256>", see common/image_io.py); entries made with an
+    older decode are never hit again and age out.
+
+    Args:
+        cache_dir (str): Root directory of the cache.
+        model_name (str): Name of the CLIP model producing the embeddings.
+        max_entries (int): Maximum number of vectors kept; least recently used ones are evicted.
+        backend (str): Encoder backend producing the embeddings.
+        decode_version (int): Image decode the image embeddings are made from.
+    """
+
+    def __init__(
+        self, cache_dir=EMBEDDING_CACHE_DIR, model_name=MODEL_NAME, max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+        backend=ENCODER_BACKEND, decode_version=DECODE_VERSION,
+    ):
+        model_dir = model_name.replace("/", "-") + ("" if backend == "torch" else f"-{backend}")
+        self.model_dir = os.path.join(cache_dir, model_dir)
+        self.index_path = os.path.join(self.model_dir, "index.json")
+        self.vectors_path = os.path.join(self.model_dir, "vectors.npy")
+        self.max_entries = max(1, max_entries)
+        self.decode_version = decode_version
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = {}  # key -> [slot, last_used]
+        self._free_slots = []
+        self._clock = 0
+        self._vectors = None
+
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path) or not os.path.exists(self.vectors_path):
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding="utf-8") as f:
+                state = json.load(f)
+            self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable embedding cache in {self.model_dir}: {e}")
+            return
+
+        self._entries = state["entries"]
+        self._clock = state["clock"]
+        used_slots = {slot for slot, _ in self._entries.values()}
+        self._free_slots = [slot for slot in range(len(self._vectors)) if slot not in used_slots]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key(self, kind, sha256):
+        # Text embeddings don't depend on how images are decoded
+        if kind == "image" and self.decode_version:
+            return f"{kind}:d{self.decode_version}:{sha256}"
+        return f"{kind}:{sha256}"
+
+    def get(self, kind, sha256):
+        """
+        Looks up a cached embedding.
+
+        Args:
+            kind (str): Embedding kind, "image" or "text".
+            sha256 (str): Hex digest of the image bytes or caption text.
+
+        Returns:
+            np.ndarray: A copy of the cached embedding, or None on a miss.
+        """
+        entry = self._entries.get(self._key(kind, sha256))
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._clock += 1
+        entry[1] = self._clock
+        return np.array(self._vectors[entry[0]])
+
+    def put(self, kind, sha256, embedding):
+        """
+        Stores an embedding, evicting least recently used entries if the cache is full.
+
+        Args:
+            kind (str): Embedding kind, "image" or "text".
+            sha256 (str): Hex digest of the image bytes or caption text.
+            embedding (np.ndarray): The embedding vector.
+
+        Returns:
+            None
+        """
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        key = self._key(kind, sha256)
+
+        if self._vectors is not None and self._vectors.shape[1] != embedding.shape[0]:
+            print(f"⚠️ Embedding dimension changed, clearing cache in {self.model_dir}")
+            self.clear()
+
+        if key in self._entries:
+            slot = self._entries[key][0]
+        else:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            slot = self._allocate_slot(embedding.shape[0])
+
+        self._clock += 1
+        self._vectors[slot] = embedding
+        self._entries[key] = [slot, self._clock]
+
+    def _allocate_slot(self, dimension):
+        if not self._free_slots:
+            self._grow(dimension)
+        return self._free_slots.pop()
+
+    def _grow(self, dimension):
+        """Doubles the capacity of the memory-mapped matrix."""
+        os.makedirs(self.model_dir, exist_ok=True)
+        old_capacity = 0 if self._vectors is None else len(self._vectors)
+        new_capacity = min(max(INITIAL_CAPACITY, old_capacity * 2), self.max_entries)
+
+        tmp_path = self.vectors_path + ".tmp"
+        vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, dimension))
+        if old_capacity:
+            vectors[:old_capacity] = self._vectors
+        vectors.flush()
+
+        # Release both maps before swapping files (required on Windows)
+        del vectors
+        self._vectors = None
+        os.replace(tmp_path, self.vectors_path)
+        self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+        self._free_slots.extend(range(new_capacity - 1, old_capacity - 1, -1))
+
+    def _evict(self):
+        """Drops the least recently used entries to make room."""
+        count = max(1, int(len(self._entries) * EVICTION_FRACTION))
+        oldest = sorted(self._entries.items(), key=lambda item: item[1][1])[:count]
+        for key, _ in oldest:
+            del self._entries[key]
+
+        # The index on disk must stop pointing at these slots before they are overwritten,
+        # or a crash in between would map their hashes to other images' vectors
+        self.flush()
+        self._free_slots.extend(slot for _, (slot, _) in oldest)
+        self.evictions += len(oldest)
+
+    def clear(self):
+        """Removes every entry and the backing files."""
+        self._entries = {}
+        self._free_slots = []
+        self._vectors = None
+        for path in (self.index_path, self.vectors_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def flush(self):
+        """Persists the vectors and the key index to disk."""
+        if self._vectors is None:
+            return
+
+        self._vectors.flush()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding="utf-8") as f:
+            json.dump({"clock": self._clock, "entries": self._entries}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def stats(self):
+        """
+        Returns hit/miss statistics.
+
+        Returns:
+            dict: Hits, misses, hit rate, evictions and current size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    def report(self):
+        """Prints hit/miss statistics."""
+        stats = self.stats()
+        print(
+            f"📦 Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['evictions']} evictions, "
+            f"{stats['entries']}/{stats['max_entries']} entries"
+        )
@@ -1,10 +1,27 @@
 import torch
 import numpy as np
 from src.model_loader import load_model
+from src.embedding_cache import text_sha256
 from src.preprocess import preprocess_image, tokenize_text
+from config import TEXT_BATCH_SIZE
 
-# Load the model only once and keep preprocess
-model, preprocess = load_model()  # ✅ Keeps preprocess for reuse
+# Loaded on first use so DataLoader worker processes never pull in the model
+_model = None
+_preprocess = None
+
+
+def get_model():
+    """
+    Loads the CLIP encoder once and keeps preprocess for reuse.
+
+    Returns:
+        encoder: The loaded CLIP encoder.
+        preprocess: The preprocessing function for images.
+    """
+    global _model, _preprocess
+    if _model is None:
+        _model, _preprocess = load_model()
+    return _model, _preprocess
 
 
 def generate_image_embedding(image_path):
@@ -17,17 +34,35 @@ def generate_image_embedding(image_path):
     Returns:
         np.ndarray: Normalized image embedding.
     """
+    encoder, preprocess = get_model()
     image_tensor = preprocess_image(image_path, preprocess)  # ✅ Pass preprocess function
     if image_tensor is None:
         return None
 
-    with torch.no_grad():
-        image_features = model.encode_image(image_tensor)
-    
+    image_features = encoder.encode_image(image_tensor)
+
     # Normalize the embedding
-    image_features /= image_features.norm(dim=-1, keepdim=True)
-    
-    return image_features.cpu().numpy().astype(np.float32)
+    image_features /= np.linalg.norm(image_features, axis=-1, keepdims=True)
+
+    return image_features.astype(np.float32)
+
+def generate_image_embeddings_batch(image_tensors):
+    """
+    Generates CLIP embeddings for a batch of preprocessed images in one forward pass.
+
+    Args:
+        image_tensors (torch.Tensor): Stacked preprocessed images of shape (N, 3, H, W).
+
+    Returns:
+        np.ndarray: Normalized image embeddings of shape (N, D).
+    """
+    encoder, _ = get_model()
+    image_features = encoder.encode_image(image_tensors)
+
+    # Normalize each embedding
+    image_features /= np.linalg.norm(image_features, axis=-1, keepdims=True)
+
+    return image_features.astype(np.float32)
 
 def generate_text_embedding(captions):
     """
@@ -39,20 +74,100 @@ def generate_text_embedding(captions):
     Returns:
         np.ndarray: Normalized text embedding.
     """
+    encoder, _ = get_model()
     text_tokens = tokenize_text(captions)
     if text_tokens is None:
         return None
 
-    with torch.no_grad():
-        text_features = model.encode_text(text_tokens)
+    text_features = encoder.encode_text(text_tokens)
 
     # Normalize the embeddings
-    text_features /= text_features.norm(dim=-1, keepdim=True)
+    text_features /= np.linalg.norm(text_features, axis=-1, keepdims=True)
 
     # Compute averaged text embedding
-    avg_text_embedding = text_features.mean(dim=0, keepdim=True)
+    avg_text_embedding = text_features.mean(axis=0, keepdims=True)
+
+    return avg_text_embedding.astype(np.float32)
+
+def encode_captions(captions, batch_size=TEXT_BATCH_SIZE):
+    """
+    Encodes unique captions in large batches.
+
+    A caption that cannot be tokenized (e.g. too long for CLIP) only drops itself,
+    not the rest of its batch.
+
+    Args:
+        captions (list): List of unique captions.
+        batch_size (int): Number of captions per encode_text forward pass.
+
+    Returns:
+        dict: A dictionary mapping each encodable caption to its normalized embedding.
+    """
+    encoder, _ = get_model()
+    caption_features = {}
 
-    return avg_text_embedding.cpu().numpy().astype(np.float32)
+    for start in range(0, len(captions), batch_size):
+        chunk = captions[start:start + batch_size]
+        text_tokens = tokenize_text(chunk)
+
+        if text_tokens is None:
+            # Retry one by one so only the offending captions are dropped
+            chunk_tokens = [(caption, tokenize_text([caption])) for caption in chunk]
+            chunk = [caption for caption, tokens in chunk_tokens if tokens is not None]
+            if not chunk:
+                continue
+            text_tokens = torch.cat([tokens for _, tokens in chunk_tokens if tokens is not None])
+
+        text_features = encoder.encode_text(text_tokens)
+        text_features /= np.linalg.norm(text_features, axis=-1, keepdims=True)
+
+        for caption, features in zip(chunk, text_features.astype(np.float32)):
+            caption_features[caption] = features
+
+    return caption_features
+
+def generate_text_embeddings_batch(captions_lists, batch_size=TEXT_BATCH_SIZE, cache=None):
+    """
+    Generates averaged CLIP text embeddings for many images at once.
+
+    Each distinct caption is encoded a single time, even when it is shared by many images,
+    and captions already in the cache are not encoded at all.
+
+    Args:
+        captions_lists (list): One list of captions per image.
+        batch_size (int): Number of captions per encode_text forward pass.
+        cache (EmbeddingCache): Optional persistent embedding cache.
+
+    Returns:
+        list: Averaged text embedding of shape (1, D) per image, or None if any of its captions failed.
+    """
+    unique_captions = list(dict.fromkeys(caption for captions in captions_lists for caption in captions))
+
+    caption_features = {}
+    if cache is not None:
+        for caption in unique_captions:
+            features = cache.get("text", text_sha256(caption))
+            if features is not None:
+                caption_features[caption] = features
+
+    missing_captions = [caption for caption in unique_captions if caption not in caption_features]
+    encoded = encode_captions(missing_captions, batch_size)
+    caption_features.update(encoded)
+
+    if cache is not None:
+        for caption, features in encoded.items():
+            cache.put("text", text_sha256(caption), features)
+
+    text_embeddings = []
+    for captions in captions_lists:
+        if not captions or any(caption not in caption_features for caption in captions):
+            text_embeddings.append(None)
+            continue
+
+        features = np.stack([caption_features[caption] for caption in captions])
+        text_embeddings.append(features.mean(axis=0, keepdims=True).astype(np.float32))
+
+    return text_embeddings
 
 def generate_joint_embedding(image_path, captions):
     """
@@ -72,10 +187,23 @@ def generate_joint_embedding(image_path, captions):
         print(f"⚠️ Skipping {image_path} due to missing embeddings.")
         return None
 
+    return combine_embeddings(image_embedding, text_embedding)
+
+def combine_embeddings(image_embeddings, text_embeddings):
+    """
+    Averages image and text embeddings row by row and re-normalizes the result.
+
+    Args:
+        image_embeddings (np.ndarray): Normalized image embeddings of shape (N, D).
+        text_embeddings (np.ndarray): Text embeddings of shape (N, D).
+
+    Returns:
+        np.ndarray: Normalized joint embeddings of shape (N, D).
+    """
     # Compute joint embedding using averaging
-    joint_embedding = (image_embedding + text_embedding) / 2
+    joint_embeddings = (image_embeddings + text_embeddings) / 2
 
-    # Normalize joint embedding
-    joint_embedding /= np.linalg.norm(joint_embedding)
+    # Normalize joint embeddings
+    joint_embeddings /= np.linalg.norm(joint_embeddings, axis=-1, keepdims=True)
 
-    return joint_embedding
+    return joint_embeddings.astype(np.float32)
@@ -1,58 +1,422 @@
 import faiss
+import json
 import numpy as np
 import os
+import time
+from torch.utils.data import DataLoader
 from tqdm import tqdm
-from src.embeddings import generate_joint_embedding
-from config import OUTPUT_INDEX_PATH, OUTPUT_PATHS_FILE
+from src.dataset import ImagePathDataset, collate_images
+from src.embeddings import (
+    combine_embeddings,
+    generate_image_embeddings_batch,
+    generate_text_embeddings_batch,
+    get_model,
+)
+from src.index_factory import COMPRESSED_INDEX_TYPES, REMOVABLE_INDEX_TYPES, build_index, compression_report
+from src.manifest import diff_manifest, file_sha256, image_size, load_manifest, make_entry, new_manifest
+from config import (
+    BATCH_SIZE,
+    DATABASE_DIR,
+    DEVICE,
+    ENCODER_BACKEND,
+    INDEX_TYPE,
+    KEEP_INDEX_VERSIONS,
+    NUM_WORKERS,
+    OUTPUT_FILTERS_PATH,
+    OUTPUT_INDEX_PATH,
+    OUTPUT_MANIFEST_PATH,
+    OUTPUT_METADATA_PATH,
+    OUTPUT_PATHS_FILE,
+    OUTPUT_VECTORS_PATH,
+    RERANK_CANDIDATES,
+    SHARD_BY,
+    SHARDS,
+    WRITE_RERANK_VECTORS,
+)
+from common.filters import write_filter_index
+from common.image_io import DECODE_VERSION
+from common.metadata_store import build_record, landmark_name, write_metadata_store
+from common.index_versions import new_version, prune_versions, publish, resolve
+from common.shards import assign_shard, merge_shards, read_shard_list, shard_path, write_shard_list
 
-def create_faiss_index(image_paths, captions_dict):
+def embed_images(image_paths, captions_dict, batch_size=BATCH_SIZE, num_workers=NUM_WORKERS, cache=None):
     """
-    Creates and saves a FAISS index for image-text embeddings.
+    Generates joint image-text embeddings with batched CLIP inference.
+
+    Images are decoded and preprocessed by DataLoader workers and encoded `batch_size`
+    at a time; all captions are encoded up front in large text batches. Images and
+    captions found in the cache skip CLIP entirely.
 
     Args:
         image_paths (list): List of image file paths.
         captions_dict (dict): Dictionary mapping image filenames to captions.
+        batch_size (int): Number of images per encode_image forward pass.
+        num_workers (int): Number of DataLoader worker processes (0 decodes in the main process).
+        cache (EmbeddingCache): Optional persistent embedding cache.
 
     Returns:
-        None
+        np.ndarray: Normalized joint embeddings, one row per kept image.
+        list: Image paths aligned with the embedding rows.
     """
-    embeddings = []
-    image_paths_list = []
+    start_time = time.perf_counter()
+    _, preprocess = get_model()
 
-    for image_path in tqdm(image_paths, total=len(image_paths)):
-        img_name = os.path.basename(image_path)
-        captions = captions_dict.get(img_name, ["No Caption Available"])
+    # Encode every caption first, so images without usable text are never decoded
+    captions_lists = [
+        captions_dict.get(os.path.basename(image_path), ["No Caption Available"]) for image_path in image_paths
+    ]
+    text_embeddings = generate_text_embeddings_batch(captions_lists, cache=cache)
 
-        # Generate joint embedding
-        joint_embedding = generate_joint_embedding(image_path, captions)
-
-        if joint_embedding is None:
+    candidate_paths = []
+    candidate_text = []
+    for image_path, text_embedding in zip(image_paths, text_embeddings):
+        if text_embedding is None:
             print(f"⚠️ Skipping {image_path} due to missing embeddings.")
             continue
+        candidate_paths.append(image_path)
+        candidate_text.append(text_embedding)
+
+    # Reuse cached image embeddings; only the misses are decoded and encoded
+    image_embeddings = [None] * len(candidate_paths)
+    image_hashes = [None] * len(candidate_paths)
+    if cache is not None:
+        for i, image_path in enumerate(candidate_paths):
+            try:
+                image_hashes[i] = file_sha256(image_path)
+            except OSError as e:
+                print(f"❌ Error reading image {image_path}: {e}")
+                continue
+            cached = cache.get("image", image_hashes[i])
+            if cached is not None:
+                image_embeddings[i] = cached.reshape(1, -1)
+
+    missing = [i for i, embedding in enumerate(image_embeddings) if embedding is None]
+    loader = DataLoader(
+        ImagePathDataset([candidate_paths[i] for i in missing], preprocess),
+        batch_size=max(1, batch_size),
+        num_workers=max(0, num_workers),
+        collate_fn=collate_images,
+        pin_memory=DEVICE == "cuda",
+    )
+
+    with tqdm(total=len(missing), unit="img") as progress:
+        for indices, image_tensors in loader:
+            if image_tensors is not None:
+                for i, embedding in zip(indices, generate_image_embeddings_batch(image_tensors)):
+                    candidate = missing[i]
+                    image_embeddings[candidate] = embedding.reshape(1, -1)
+                    if cache is not None and image_hashes[candidate] is not None:
+                        cache.put("image", image_hashes[candidate], embedding)
+            progress.update(len(indices))
+
+    if cache is not None:
+        cache.flush()
+        cache.report()
+
+    kept = [i for i, embedding in enumerate(image_embeddings) if embedding is not None]
+    elapsed = time.perf_counter() - start_time
+    if not kept:
+        return np.empty((0, 0), dtype=np.float32), []
+
+    embeddings = combine_embeddings(
+        np.vstack([image_embeddings[i] for i in kept]),
+        np.vstack([candidate_text[i] for i in kept]),
+    )
+    image_paths_list = [candidate_paths[i] for i in kept]
+
+    print(
+        f"⚡ Embedded {len(image_paths_list)} images in {elapsed:.1f}s "
+        f"({len(image_paths_list) / max(elapsed, 1e-9):.1f} images/sec)"
+    )
+    return embeddings, image_paths_list
+
+def build_shards(index_type, embeddings, ids, image_paths_list, captions_dict, shards, shard_by):
+    """
+    Partitions the embeddings into shards and builds one ID-mapped index per shard.
+
+    Args:
+        index_type (str): FAISS index type of every shard.
+        embeddings (np.ndarray): Normalized embeddings, one row per image.
+        ids (np.ndarray): Global FAISS ids of the rows, kept by the shards.
+        image_paths_list (list): Image paths aligned with the rows.
+        captions_dict (dict): Dictionary mapping image filenames to captions.
+        shards (int): Number of shards.
+        shard_by (str): "hash" (by filename) or "landmark" (by the first caption's landmark).
+
+    Returns:
+        list: The non-empty shard indexes.
+    """
+    keys = []
+    for image_path in image_paths_list:
+        filename = os.path.basename(image_path)
+        captions = captions_dict.get(filename)
+        keys.append(landmark_name(captions[0]) if shard_by == "landmark" and captions else filename)
+    assignment = np.array([assign_shard(key, shards) for key in keys])
+
+    shard_indexes = []
+    for shard in range(shards):
+        rows = np.flatnonzero(assignment == shard)
+        if not len(rows):
+            print(f"⚠️ Shard {shard} is empty, skipping it.")
+            continue
+        shard_indexes.append(build_index(index_type, embeddings[rows], ids[rows]))
+    print(f"🧩 Built {len(shard_indexes)} shards by {shard_by}: " + ", ".join(str(shard.ntotal) for shard in shard_indexes) + " vectors")
+    return shard_indexes
+
+def report_compression(index, index_type, embeddings, rerank_vectors, index_bytes=None):
+    """
+    Prints how much smaller a compressed index is than float32 vectors and the recall it loses.
+
+    Args:
+        index (faiss.Index): The populated index.
+        index_type (str): Its index type.
+        embeddings (np.ndarray): The float32 embeddings it was built from (row = FAISS id).
+        rerank_vectors (bool): Whether the server can re-rank with a full-precision side file.
+        index_bytes (int): Total serialized size, for sharded indexes.
+
+    Returns:
+        dict: The compression report, or None for uncompressed index types.
+    """
+    if index_type not in COMPRESSED_INDEX_TYPES:
+        return None
+
+    report = compression_report(
+        index, embeddings, k=10, rerank_candidates=RERANK_CANDIDATES if rerank_vectors else 0, index_bytes=index_bytes
+    )
+    saved = 1 - report["index_bytes"] / report["float32_bytes"]
+    message = (
+        f"🗜️ {index_type}: {report['index_bytes'] / 2**20:.2f} MB vs {report['float32_bytes'] / 2**20:.2f} MB "
+        f"of float32 vectors ({saved:.0%} saved), recall@10 {report['recall']:.3f}"
+    )
+    if "rerank_recall" in report:
+        message += f", {report['rerank_recall']:.3f} after re-ranking {RERANK_CANDIDATES} candidates"
+    print(message)
+    return report
+
+def create_faiss_index(
+    image_paths, captions_dict, batch_size=BATCH_SIZE, num_workers=NUM_WORKERS, cache=None, index_type=INDEX_TYPE,
+    rerank_vectors=WRITE_RERANK_VECTORS, shards=SHARDS, shard_by=SHARD_BY,
+):
+    """
+    Creates and saves a FAISS index for image-text embeddings.
+
+    Rows are stored in an ID-mapped index (ids 0..N-1 match the paths file lines)
+    together with a manifest, so later runs can update the index incrementally.
 
-        embeddings.append(joint_embedding)
-        image_paths_list.append(image_path)
+    Args:
+        image_paths (list): List of image file paths.
+        captions_dict (dict): Dictionary mapping image filenames to captions.
+        batch_size (int): Number of images per encode_image forward pass.
+        num_workers (int): Number of DataLoader worker processes.
+        cache (EmbeddingCache): Optional persistent embedding cache.
+        index_type (str): FAISS index type, see src.index_factory.INDEX_TYPES.
+        rerank_vectors (bool): Write the float32 side file for compressed index types.
+        shards (int): Number of index shards (1 writes a single index file).
+        shard_by (str): How images are assigned to shards, see src.faiss_index.build_shards.
 
-    if not embeddings:
+    Returns:
+        None
+    """
+    embeddings, image_paths_list = embed_images(image_paths, captions_dict, batch_size, num_workers, cache)
+
+    if not image_paths_list:
         print("❌ No embeddings generated. Please check input data.")
         return
 
-    embeddings = np.vstack(embeddings).astype(np.float32)
-
     # Create FAISS index
-    index = faiss.IndexFlatIP(embeddings.shape[1])
-    index.add(embeddings)
+    ids = np.arange(len(image_paths_list), dtype=np.int64)
+    rerank_vectors = rerank_vectors and index_type in COMPRESSED_INDEX_TYPES
+    if shards > 1:
+        index = build_shards(index_type, embeddings, ids, image_paths_list, captions_dict, shards, shard_by)
+        searchable = merge_shards(index)
+        index_bytes = sum(len(faiss.serialize_index(shard)) for shard in index)
+    else:
+        index = searchable = build_index(index_type, embeddings, ids)
+        index_bytes = None
+
+    manifest = new_manifest(embeddings.shape[1], index_type)
+    for image_id, image_path in enumerate(image_paths_list):
+        captions = captions_dict.get(os.path.basename(image_path), ["No Caption Available"])
+        manifest["entries"][image_path] = make_entry(image_path, captions, image_id)
+    manifest["next_id"] = len(image_paths_list)
+    manifest["shards"] = len(index) if shards > 1 else 1
+    manifest["shard_by"] = shard_by
+    manifest["compression"] = report_compression(searchable, index_type, embeddings, rerank_vectors, index_bytes)
+
+    save_index_files(index, manifest, captions_dict, embeddings if rerank_vectors else None)
+
+def update_faiss_index(
+    image_paths, captions_dict, batch_size=BATCH_SIZE, num_workers=NUM_WORKERS, cache=None, index_type=INDEX_TYPE,
+    rerank_vectors=WRITE_RERANK_VECTORS, shards=SHARDS, shard_by=SHARD_BY,
+):
+    """
+    Updates the saved FAISS index in place of a full rebuild.
+
+    Only new or changed images are embedded; rows of deleted or changed images are removed
+    by id. Falls back to a full build when there is no usable manifest or ID-mapped index,
+    when the index type changed, when rows must be removed from an HNSW index, or when
+    the old or new index is sharded.
+    Trained (IVF) indexes keep their existing centroids.
+
+    Args:
+        image_paths (list): List of image file paths.
+        captions_dict (dict): Dictionary mapping image filenames to captions.
+        batch_size (int): Number of images per encode_image forward pass.
+        num_workers (int): Number of DataLoader worker processes.
+        cache (EmbeddingCache): Optional persistent embedding cache.
+        index_type (str): FAISS index type, see src.index_factory.INDEX_TYPES.
+        rerank_vectors (bool): Keep the float32 side file for compressed index types.
+        shards (int): Number of index shards.
+        shard_by (str): How images are assigned to shards.
+
+    Returns:
+        None
+    """
+    manifest = load_manifest()
+    if manifest and (shards > 1 or manifest.get("shards", 1) > 1):
+        print("⚠️ Sharded indexes are rebuilt in full.")
+        create_faiss_index(image_paths, captions_dict, batch_size, num_workers, cache, index_type, rerank_vectors, shards, shard_by)
+        return
+
+    index_path = resolve(OUTPUT_INDEX_PATH)
+    index = faiss.read_index(index_path) if manifest and os.path.exists(index_path) else None
+
+    if index is None or not isinstance(index, faiss.IndexIDMap) or index.ntotal != len(manifest["entries"]):
+        print("⚠️ No usable manifest or ID-mapped index found, running a full build.")
+        create_faiss_index(image_paths, captions_dict, batch_size, num_workers, cache, index_type, rerank_vectors, shards, shard_by)
+        return
+
+    if manifest.get("index_type", "flat") != index_type:
+        print(f"⚠️ Index type changed from {manifest.get('index_type', 'flat')} to {index_type}, running a full build.")
+        create_faiss_index(image_paths, captions_dict, batch_size, num_workers, cache, index_type, rerank_vectors, shards, shard_by)
+        return
+
+    if manifest.get("encoder_backend", "torch") != ENCODER_BACKEND:
+        # Vectors from different backends are close but not identical; don't mix them in one index
+        print(f"⚠️ Encoder backend changed from {manifest.get('encoder_backend', 'torch')} to {ENCODER_BACKEND}, running a full build.")
+        create_faiss_index(image_paths, captions_dict, batch_size, num_workers, cache, index_type, rerank_vectors, shards, shard_by)
+        return
+
+    if manifest.get("decode_version", 0) != DECODE_VERSION:
+        # Same reason: unchanged rows would keep embeddings of differently decoded pixels
+        print(f"⚠️ Image decode changed from version {manifest.get('decode_version', 0)} to {DECODE_VERSION}, running a full build.")
+        create_faiss_index(image_paths, captions_dict, batch_size, num_workers, cache, index_type, rerank_vectors, shards, shard_by)
+        return
+
+    vectors = None
+    if rerank_vectors and index_type in COMPRESSED_INDEX_TYPES:
+        vectors_path = resolve(OUTPUT_VECTORS_PATH)
+        vectors = np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None
+        if vectors is None or len(vectors) != manifest["next_id"]:
+            print("⚠️ No full-precision vectors matching the index, running a full build.")
+            create_faiss_index(image_paths, captions_dict, batch_size, num_workers, cache, index_type, rerank_vectors, shards, shard_by)
+            return
+
+    to_embed, stale_ids, unchanged = diff_manifest(manifest, image_paths, captions_dict)
 
-    # Save FAISS index
-    faiss.write_index(index, OUTPUT_INDEX_PATH)
+    if stale_ids and index_type not in REMOVABLE_INDEX_TYPES:
+        print(f"⚠️ {index_type} indexes cannot remove rows, running a full build.")
+        create_faiss_index(image_paths, captions_dict, batch_size, num_workers, cache, index_type, rerank_vectors, shards, shard_by)
+        return
+    deleted = len(set(manifest["entries"]) - set(image_paths))
+    print(f"🔍 {len(unchanged)} unchanged, {len(to_embed)} new or changed, {deleted} deleted.")
+
+    if not to_embed and not stale_ids:
+        if unchanged != manifest["entries"] or not all(os.path.exists(resolve(path)) for path in (OUTPUT_METADATA_PATH, OUTPUT_FILTERS_PATH)):
+            manifest["entries"] = unchanged
+            save_index_files(index, manifest, captions_dict, vectors)
+        print("✅ FAISS index is already up to date.")
+        return
+
+    if stale_ids:
+        index.remove_ids(np.array(stale_ids, dtype=np.int64))
+
+    manifest["entries"] = unchanged
+    if to_embed:
+        embeddings, embedded_paths = embed_images(to_embed, captions_dict, batch_size, num_workers, cache)
+
+        if embedded_paths:
+            ids = np.arange(manifest["next_id"], manifest["next_id"] + len(embedded_paths), dtype=np.int64)
+            index.add_with_ids(embeddings, ids)
+
+            for image_id, image_path in zip(ids.tolist(), embedded_paths):
+                captions = captions_dict.get(os.path.basename(image_path), ["No Caption Available"])
+                manifest["entries"][image_path] = make_entry(image_path, captions, image_id)
+            manifest["next_id"] += len(embedded_paths)
+
+            if vectors is not None:
+                # New ids are appended after the existing rows
+                vectors = np.concatenate([vectors, embeddings.astype(np.float32)])
+
+    if vectors is not None and stale_ids:
+        vectors = np.array(vectors)
+        vectors[stale_ids] = 0  # Removed ids keep their row so row N stays FAISS id N
+
+    save_index_files(index, manifest, captions_dict, vectors)
+
+def save_index_files(index, manifest, captions_dict, vectors=None):
+    """
+    Saves the index, paths file, metadata store, filters, re-rank vectors and manifest as a new version.
+
+    Everything is written into a fresh versions/<version>/ directory that is then published
+    by atomically replacing the CURRENT pointer, so readers (including a running server's
+    reload watcher) never see a partially written or mixed build. Older versions beyond
+    KEEP_INDEX_VERSIONS are pruned.
+
+    Args:
+        index (faiss.Index | list): The ID-mapped FAISS index, or a list of shard indexes.
+        manifest (dict): The manifest describing the index rows.
+        captions_dict (dict): Dictionary mapping image filenames to captions.
+        vectors (np.ndarray): Full-precision vectors by FAISS id, or None for no side file.
 
-    # Save image paths
-    with open(OUTPUT_PATHS_FILE, 'w') as f:
-        for path in image_paths_list:
+    Returns:
+        str: The published version.
+    """
+    # Paths file line N and metadata record N hold the image with FAISS id N;
+    # removed ids leave an empty line / empty record
+    paths_by_id = [""] * manifest["next_id"]
+    records_by_id = [None] * manifest["next_id"]
+    for image_path, entry in manifest["entries"].items():
+        if "width" not in entry:  # Manifests written before sizes were recorded
+            entry["width"], entry["height"] = image_size(image_path)
+        captions = captions_dict.get(os.path.basename(image_path), [])
+        paths_by_id[entry["id"]] = image_path
+        records_by_id[entry["id"]] = build_record(image_path, captions, entry["width"], entry["height"])
+
+    version, directory = new_version(DATABASE_DIR)
+    index_path, paths_path, metadata_path, filters_path, vectors_path, manifest_path = (
+        resolve(path, version)
+        for path in (OUTPUT_INDEX_PATH, OUTPUT_PATHS_FILE, OUTPUT_METADATA_PATH, OUTPUT_FILTERS_PATH, OUTPUT_VECTORS_PATH, OUTPUT_MANIFEST_PATH)
+    )
+
+    if isinstance(index, list):
+        index_files = [shard_path(index_path, i, len(index)) for i in range(len(index))]
+        for shard, index_file in zip(index, index_files):
+            faiss.write_index(shard, index_file)
+        write_shard_list(index_path, index_files, manifest.get("shard_by", "hash"))
+        print(f"✅ FAISS index saved as {len(index)} shards ({sum(shard.ntotal for shard in index)} entries)")
+    else:
+        faiss.write_index(index, index_path)
+        print(f"✅ FAISS index saved ({index.ntotal} entries)")
+
+    if vectors is not None:
+        with open(vectors_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        print("✅ Re-rank vectors saved")
+    with open(paths_path, 'w') as f:
+        for path in paths_by_id:
             f.write(path + '\n')
+    write_metadata_store(metadata_path, records_by_id)
+    write_filter_index(filters_path, records_by_id)
+    with open(manifest_path, 'w', encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    publish(DATABASE_DIR, version)
+    print(f"✅ Index version {version} published in {directory}")
 
-    print(f"✅ FAISS index saved at {OUTPUT_INDEX_PATH}")
-    print(f"✅ Image paths saved at {OUTPUT_PATHS_FILE}")
+    for pruned in prune_versions(DATABASE_DIR, KEEP_INDEX_VERSIONS):
+        print(f"🗑️ Removed old index version {pruned}")
+    return version
 
 def load_faiss_index():
     """
@@ -62,16 +426,18 @@ def load_faiss_index():
         index (faiss.Index): The FAISS index.
         image_paths (list): List of image paths.
     """
-    if not os.path.exists(OUTPUT_INDEX_PATH) or not os.path.exists(OUTPUT_PATHS_FILE):
+    index_path, paths_path = resolve(OUTPUT_INDEX_PATH), resolve(OUTPUT_PATHS_FILE)
+    shard_files = read_shard_list(index_path)
+    if (not shard_files and not os.path.exists(index_path)) or not os.path.exists(paths_path):
         print("❌ FAISS index or paths file not found.")
         return None, []
 
-    # Load FAISS index
-    index = faiss.read_index(OUTPUT_INDEX_PATH)
+    # Load FAISS index (shards are searched together through one IndexShards)
+    index = merge_shards([faiss.read_index(path) for path in shard_files]) if shard_files else faiss.read_index(index_path)
 
     # Load image paths
-    with open(OUTPUT_PATHS_FILE, 'r') as f:
+    with open(paths_path, 'r') as f:
         image_paths = [line.strip() for line in f]
 
-    print(f"✅ FAISS index loaded from {OUTPUT_INDEX_PATH}")
+    print(f"✅ FAISS index loaded from {os.path.dirname(index_path)}")
     return index, image_paths
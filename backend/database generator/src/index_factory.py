@@ -0,0 +1,193 @@
+import math
+import time
+import faiss
+import numpy as np
+from config import HNSW_M, IVF_NLIST, PQ_M, TRAIN_SAMPLE_SIZE
+from common.rerank import rerank
+
+INDEX_TYPES = ("flat", "sq_fp16", "sq8", "pq", "ivf_flat", "ivf_pq", "hnsw")
+
+# Index types whose rows can be deleted in place by id
+REMOVABLE_INDEX_TYPES = ("flat", "sq_fp16", "sq8", "pq", "ivf_flat", "ivf_pq")
+
+# Index types storing lossy codes instead of float32 vectors. Their scores are
+# approximate, so the build writes a full-precision side file the server re-ranks with.
+COMPRESSED_INDEX_TYPES = ("sq_fp16", "sq8", "pq", "ivf_pq")
+
+
+def choose_nlist(num_vectors):
+    """
+    Picks the number of IVF lists for a corpus size.
+
+    Uses the usual ~4 * sqrt(N) rule, capped so every list gets at least 39 training
+    vectors (FAISS warns below that).
+
+    Args:
+        num_vectors (int): Number of vectors in the corpus.
+
+    Returns:
+        int: Number of inverted lists.
+    """
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+
+
+def pq_parameters(dimension, num_vectors, pq_m=PQ_M):
+    """
+    Picks PQ sub-quantizers and bits per code for a corpus.
+
+    PQ needs m to divide the dimension and at least 2**nbits training vectors.
+
+    Returns:
+        tuple: (m, nbits)
+    """
+    m = max(divisor for divisor in range(1, min(pq_m, dimension) + 1) if dimension % divisor == 0)
+    nbits = max(1, min(8, int(math.log2(max(num_vectors, 2)))))
+    return m, nbits
+
+
+def index_description(index_type, dimension, num_vectors, nlist=IVF_NLIST, pq_m=PQ_M, hnsw_m=HNSW_M):
+    """
+    Builds the faiss.index_factory description for an index type.
+
+    Args:
+        index_type (str): One of INDEX_TYPES.
+        dimension (int): Embedding dimension.
+        num_vectors (int): Number of vectors the index will be trained on.
+        nlist (int): Inverted lists for IVF indexes, None to pick from the corpus size.
+        pq_m (int): Sub-quantizers for PQ and IVF-PQ.
+        hnsw_m (int): Graph neighbours per node for HNSW.
+
+    Returns:
+        str: The factory description, always wrapped in an IDMap.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {', '.join(INDEX_TYPES)}")
+
+    nlist = nlist or choose_nlist(num_vectors)
+
+    if index_type == "flat":
+        description = "Flat"
+    elif index_type == "sq_fp16":
+        description = "SQfp16"
+    elif index_type == "sq8":
+        description = "SQ8"
+    elif index_type == "pq":
+        m, nbits = pq_parameters(dimension, num_vectors, pq_m)
+        description = f"PQ{m}x{nbits}"
+    elif index_type == "ivf_flat":
+        description = f"IVF{nlist},Flat"
+    elif index_type == "ivf_pq":
+        m, nbits = pq_parameters(dimension, num_vectors, pq_m)
+        description = f"IVF{nlist},PQ{m}x{nbits}"
+    else:
+        description = f"HNSW{hnsw_m},Flat"
+
+    return f"IDMap,{description}"
+
+
+def sample_training_vectors(embeddings, sample_size=TRAIN_SAMPLE_SIZE, seed=0):
+    """
+    Draws a random training sample from the embeddings.
+
+    Args:
+        embeddings (np.ndarray): Embeddings of shape (N, D).
+        sample_size (int): Maximum number of vectors to sample.
+        seed (int): Random seed, so rebuilds are reproducible.
+
+    Returns:
+        np.ndarray: The training vectors.
+    """
+    if len(embeddings) <= sample_size:
+        return embeddings
+
+    rows = np.random.default_rng(seed).choice(len(embeddings), size=sample_size, replace=False)
+    return embeddings[np.sort(rows)]
+
+
+def build_index(index_type, embeddings, ids, **kwargs):
+    """
+    Creates, trains and fills an ID-mapped inner-product FAISS index.
+
+    Args:
+        index_type (str): One of INDEX_TYPES.
+        embeddings (np.ndarray): Normalized embeddings of shape (N, D).
+        ids (np.ndarray): int64 ids of the embedding rows.
+        **kwargs: Overrides for nlist, pq_m and hnsw_m.
+
+    Returns:
+        faiss.Index: The populated index.
+    """
+    description = index_description(index_type, embeddings.shape[1], len(embeddings), **kwargs)
+    index = faiss.index_factory(embeddings.shape[1], description, faiss.METRIC_INNER_PRODUCT)
+
+    if not index.is_trained:
+        training_vectors = sample_training_vectors(embeddings)
+        start_time = time.perf_counter()
+        index.train(training_vectors)
+        print(f"🧠 Trained {description} on {len(training_vectors)} vectors in {time.perf_counter() - start_time:.1f}s")
+
+    index.add_with_ids(embeddings, ids)
+    return index
+
+
+def set_search_parameters(index, nprobe=None, ef_search=None):
+    """
+    Applies query-time parameters to an index, ignoring ones it does not support.
+
+    Args:
+        index (faiss.Index): The FAISS index.
+        nprobe (int): IVF lists visited per query.
+        ef_search (int): HNSW candidate list size per query.
+
+    Returns:
+        None
+    """
+    parameter_space = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        if value is None:
+            continue
+        try:
+            parameter_space.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass  # Parameter does not apply to this index type
+
+
+def compression_report(index, embeddings, k=10, rerank_candidates=0, num_queries=1000, seed=0, index_bytes=None):
+    """
+    Compares a compressed index with exact float32 search over the same embeddings.
+
+    Queries are a sample of the catalog embeddings themselves, and recall@k is measured
+    against the exact top-k from a flat index.
+
+    Args:
+        index (faiss.Index): The compressed, populated index (ids = embedding rows).
+        embeddings (np.ndarray): The float32 embeddings it was built from.
+        k (int): Neighbours per query.
+        rerank_candidates (int): Also measure recall after re-ranking this many candidates.
+        num_queries (int): Maximum number of queries sampled.
+        seed (int): Random seed.
+        index_bytes (int): Serialized size, for indexes that can't be serialized as one (shards).
+
+    Returns:
+        dict: index_bytes, float32_bytes, recall and (if requested) rerank_recall.
+    """
+    k = min(k, len(embeddings))
+    rows = np.random.default_rng(seed).choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+    queries = np.ascontiguousarray(embeddings[rows])
+
+    exact = faiss.IndexFlatIP(embeddings.shape[1])
+    exact.add(embeddings)
+    _, true_ids = exact.search(queries, k)
+
+    def recall(found_ids):
+        return float(np.mean([len(set(found[found >= 0]) & set(truth)) for found, truth in zip(found_ids, true_ids)])) / k
+
+    _, found_ids = index.search(queries, max(k, rerank_candidates))
+    report = {
+        "index_bytes": index_bytes if index_bytes is not None else len(faiss.serialize_index(index)),
+        "float32_bytes": embeddings.nbytes,
+        "recall": recall(found_ids[:, :k]),
+    }
+    if rerank_candidates:
+        report["rerank_recall"] = recall(rerank(found_ids, queries, embeddings, k)[1])
+    return report
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+from PIL import Image
+from config import ENCODER_BACKEND, OUTPUT_MANIFEST_PATH
+from common.image_io import DECODE_VERSION
+from common.index_versions import resolve
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    Computes the SHA-256 of a file's contents.
+
+    Args:
+        path (str): Path to the file.
+        chunk_size (int): Bytes read per iteration.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def captions_sha256(captions):
+    """
+    Computes the SHA-256 of an image's captions, so caption edits trigger a re-embed.
+
+    Args:
+        captions (list): List of captions.
+
+    Returns:
+        str: Hex digest of the captions.
+    """
+    return hashlib.sha256("\n".join(captions).encode("utf-8")).hexdigest()
+
+
+def image_size(path):
+    """
+    Reads an image's dimensions from its header, without decoding the pixels.
+
+    Args:
+        path (str): Path to the image file.
+
+    Returns:
+        tuple: (width, height), or (None, None) if the file can't be read.
+    """
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except OSError:
+        return None, None
+
+
+def make_entry(image_path, captions, image_id, sha256=None):
+    """
+    Builds the manifest entry describing one indexed image.
+
+    Args:
+        image_path (str): Path to the image file.
+        captions (list): Captions the image was embedded with.
+        image_id (int): FAISS id (and paths file line) of the image.
+        sha256 (str): Precomputed content hash, if already known.
+
+    Returns:
+        dict: The manifest entry.
+    """
+    stat = os.stat(image_path)
+    width, height = image_size(image_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256 or file_sha256(image_path),
+        "captions_sha256": captions_sha256(captions),
+        "id": image_id,
+        "width": width,
+        "height": height,
+    }
+
+
+def new_manifest(dimension, index_type, encoder_backend=ENCODER_BACKEND, decode_version=DECODE_VERSION):
+    """
+    Creates an empty manifest.
+
+    Args:
+        dimension (int): Embedding dimension of the index.
+        index_type (str): FAISS index type the rows are stored in.
+        encoder_backend (str): CLIP encoder backend that produced the embeddings.
+        decode_version (int): Image decode the embeddings were made from (common/image_io.py).
+
+    Returns:
+        dict: The manifest.
+    """
+    return {
+        "version": MANIFEST_VERSION,
+        "dimension": dimension,
+        "index_type": index_type,
+        "encoder_backend": encoder_backend,
+        "decode_version": decode_version,
+        "next_id": 0,
+        "entries": {},
+    }
+
+
+def load_manifest(manifest_path=None):
+    """
+    Loads the manifest written by the last build.
+
+    Args:
+        manifest_path (str): Path to the manifest file; defaults to the published version's.
+
+    Returns:
+        dict: The manifest, or None if it is missing or unreadable.
+    """
+    manifest_path = manifest_path or resolve(OUTPUT_MANIFEST_PATH)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, 'r', encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error loading manifest {manifest_path}: {e}")
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        print(f"⚠️ Ignoring manifest {manifest_path} with unsupported version {manifest.get('version')}")
+        return None
+
+    return manifest
+
+
+def diff_manifest(manifest, image_paths, captions_dict):
+    """
+    Compares the images on disk with the manifest.
+
+    Size and mtime are checked first; the content hash is only computed when they differ,
+    so touched-but-identical files are not re-embedded.
+
+    Args:
+        manifest (dict): The manifest from the previous build.
+        image_paths (list): List of image file paths currently on disk.
+        captions_dict (dict): Dictionary mapping image filenames to captions.
+
+    Returns:
+        list: Paths of new or changed images that need embedding.
+        list: FAISS ids to remove (deleted images and the old rows of changed ones).
+        dict: Refreshed entries of unchanged images, keyed by path.
+    """
+    entries = manifest["entries"]
+    to_embed = []
+    stale_ids = []
+    unchanged = {}
+
+    for image_path in image_paths:
+        captions = captions_dict.get(os.path.basename(image_path), ["No Caption Available"])
+        entry = entries.get(image_path)
+
+        if entry is None:
+            to_embed.append(image_path)
+            continue
+
+        stat = os.stat(image_path)
+        same_captions = entry["captions_sha256"] == captions_sha256(captions)
+
+        if same_captions and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            unchanged[image_path] = entry
+        elif same_captions and entry["sha256"] == file_sha256(image_path):
+            unchanged[image_path] = make_entry(image_path, captions, entry["id"], entry["sha256"])
+        else:
+            to_embed.append(image_path)
+            stale_ids.append(entry["id"])
+
+    current_paths = set(image_paths)
+    stale_ids.extend(entry["id"] for path, entry in entries.items() if path not in current_paths)
+
+    return to_embed, stale_ids, unchanged
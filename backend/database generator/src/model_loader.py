@@ -1,19 +1,28 @@
-import clip
-import torch
-from config import DEVICE
+from config import (
+    DEVICE,
+    ENCODER_BACKEND,
+    ENCODER_INTER_OP_THREADS,
+    ENCODER_INTRA_OP_THREADS,
+    MODEL_NAME,
+    ONNX_MODEL_DIR,
+)
+from common.encoders import load_encoder
 
-def load_model(model_name="ViT-B/32"):
+def load_model(model_name=MODEL_NAME, backend=ENCODER_BACKEND):
     """
     Loads the specified CLIP model and preprocessing function.
 
     Args:
         model_name (str): Name of the CLIP model to load.
+        backend (str): Encoder backend, one of common.encoders.ENCODER_BACKENDS.
 
     Returns:
-        model: The loaded CLIP model.
+        encoder: The loaded CLIP encoder (encode_image / encode_text return numpy arrays).
         preprocess: The preprocessing function for images.
     """
-    print(f"🔄 Loading CLIP model: {model_name} on {DEVICE}...")
-    model, preprocess = clip.load(model_name, device=DEVICE)
+    print(f"🔄 Loading CLIP model: {model_name} ({backend}) on {DEVICE}...")
+    encoder = load_encoder(
+        backend, model_name, DEVICE, ONNX_MODEL_DIR, ENCODER_INTRA_OP_THREADS, ENCODER_INTER_OP_THREADS
+    )
     print("✅ Model loaded successfully!")
-    return model, preprocess
+    return encoder, encoder.preprocess
@@ -1,7 +1,7 @@
-from PIL import Image
 import torch
 import clip
 from config import DEVICE
+from common.image_io import decode_image, preprocess_size
 
 def preprocess_image(image_path, preprocess):
     """
@@ -15,7 +15,7 @@ def preprocess_image(image_path, preprocess):
         torch.Tensor: Preprocessed image tensor.
     """
     try:
-        image = Image.open(image_path).convert("RGB")
+        image = decode_image(image_path, preprocess_size(preprocess))
         return preprocess(image).unsqueeze(0).to(DEVICE)
     except Exception as e:
         print(f"❌ Error preprocessing image {image_path}: {e}")
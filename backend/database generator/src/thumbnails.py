@@ -0,0 +1,83 @@
+import os
+from multiprocessing import Pool
+from PIL import Image
+from tqdm import tqdm
+from common.image_io import decode_image
+from common.media import THUMBNAIL_FORMATS, THUMBNAIL_SIZES, thumbnail_path
+from config import NUM_WORKERS, THUMBNAIL_DIR, THUMBNAIL_QUALITY
+
+
+def _is_fresh(image_path, filename):
+    """True if every thumbnail of the image exists and is newer than the original."""
+    source_mtime = os.path.getmtime(image_path)
+    for variant in THUMBNAIL_SIZES:
+        for fmt in THUMBNAIL_FORMATS:
+            path = thumbnail_path(THUMBNAIL_DIR, variant, filename, fmt)
+            if not os.path.exists(path) or os.path.getmtime(path) < source_mtime:
+                return False
+    return True
+
+
+def _generate_for_image(image_path):
+    """
+    Writes every thumbnail variant and format of one image.
+
+    Returns:
+        str: Error message, or None on success.
+    """
+    filename = os.path.basename(image_path)
+    try:
+        # Let the JPEG decoder downscale in the DCT domain before resizing
+        image = decode_image(image_path, max(THUMBNAIL_SIZES.values()))
+
+        for variant, size in sorted(THUMBNAIL_SIZES.items(), key=lambda item: -item[1]):
+            image.thumbnail((size, size), Image.LANCZOS)
+            for fmt in THUMBNAIL_FORMATS:
+                path = thumbnail_path(THUMBNAIL_DIR, variant, filename, fmt)
+                tmp_path = f"{path}.tmp"
+                image.save(tmp_path, format=fmt.upper(), quality=THUMBNAIL_QUALITY)
+                os.replace(tmp_path, path)
+    except Exception as e:
+        return f"{image_path}: {e}"
+    return None
+
+
+def generate_thumbnails(image_paths, num_workers=NUM_WORKERS):
+    """
+    Pre-generates WebP and JPEG thumbnails of every catalog image for the API to serve.
+
+    Up-to-date thumbnails are skipped and thumbnails of deleted images are removed, so
+    repeated builds only pay for new or changed images.
+
+    Args:
+        image_paths (list): List of image file paths.
+        num_workers (int): Number of worker processes.
+
+    Returns:
+        None
+    """
+    for variant in THUMBNAIL_SIZES:
+        os.makedirs(os.path.join(THUMBNAIL_DIR, variant), exist_ok=True)
+
+    stale = [path for path in image_paths if not _is_fresh(path, os.path.basename(path))]
+    print(f"🖼️ Generating thumbnails for {len(stale)} images ({len(image_paths) - len(stale)} up to date).")
+
+    if stale:
+        if num_workers > 0:
+            with Pool(num_workers) as pool:
+                errors = list(tqdm(pool.imap_unordered(_generate_for_image, stale), total=len(stale), unit="img"))
+        else:
+            errors = [_generate_for_image(path) for path in tqdm(stale, unit="img")]
+        for error in filter(None, errors):
+            print(f"❌ Error generating thumbnail for {error}")
+
+    # Drop thumbnails whose original is gone
+    expected = {os.path.basename(path) for path in image_paths}
+    for variant in THUMBNAIL_SIZES:
+        variant_dir = os.path.join(THUMBNAIL_DIR, variant)
+        for name in os.listdir(variant_dir):
+            source_name, _ = os.path.splitext(name)
+            if source_name not in expected:
+                os.remove(os.path.join(variant_dir, name))
+
+    print(f"✅ Thumbnails saved at {THUMBNAIL_DIR}")
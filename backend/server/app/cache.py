@@ -0,0 +1,148 @@
+# backend/server/app/cache.py
+import sys
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from settings import QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_MAX_MB, QUERY_CACHE_TTL_SECONDS
+
+
+def estimate_size(value):
+    """Rough memory footprint of a cached value in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def normalize_query(text):
+    """Case- and whitespace-insensitive cache key for a text query."""
+    return " ".join(text.lower().split())
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with optional TTL and memory cap.
+
+    Entries are evicted least-recently-used first once `max_entries` or `max_bytes` is
+    exceeded, and expire `ttl_seconds` after being stored. `check_version()` clears the
+    cache whenever the data it was computed from (e.g. the FAISS index) changes.
+    """
+
+    def __init__(self, max_entries, ttl_seconds=None, max_bytes=None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds or None
+        self.max_bytes = max_bytes or None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = estimate_size(value)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while self._data and (
+                len(self._data) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def items(self):
+        """Snapshot of unexpired (key, value) pairs, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value) for key, (value, expires_at, _) in self._data.items()
+                if expires_at is None or expires_at > now
+            ]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key][0]
+            self._remove(key)
+            return value
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def check_version(self, version):
+        """Clear the cache if `version` differs from the one seen last time."""
+        with self._lock:
+            if version == self._version:
+                return
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._bytes = 0
+            self._version = version
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Normalized query text -> CLIP text embedding
+text_embedding_cache = LRUCache(
+    QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS, int(QUERY_CACHE_MAX_MB * 2**20 / 2)
+)
+
+# (normalized query text, top_k) -> search_faiss results, cleared when a new index version is swapped in
+search_result_cache = LRUCache(
+    QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS, int(QUERY_CACHE_MAX_MB * 2**20 / 2)
+)
@@ -0,0 +1,52 @@
+# backend/server/app/index_watcher.py
+import asyncio
+import logging
+from models import published_version, registry
+from settings import INDEX_WATCH_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class IndexWatcher:
+    """
+    Hot-reloads the index when the generator publishes a new version.
+
+    A background task reads database/CURRENT every `interval` seconds (a tiny file read,
+    no directory scan) and, once the registry is ready, loads a changed version in a
+    worker thread and swaps it in. A version that fails to load is retried only after
+    a newer one is published or through POST /admin/reload?force=true.
+    """
+
+    def __init__(self, interval=INDEX_WATCH_INTERVAL_SECONDS):
+        self.interval = interval
+        self.checks = 0
+        self._task = None
+
+    async def start(self):
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not registry.is_ready:
+                continue
+            self.checks += 1
+            if published_version() == registry.index_version:
+                continue
+            try:
+                # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+                await asyncio.get_running_loop().run_in_executor(None, registry.reload)
+            except Exception as e:
+                logger.error(f"Index reload failed, still serving version {registry.index_version}: {e}", exc_info=True)
+
+
+index_watcher = IndexWatcher()
@@ -0,0 +1,119 @@
+# backend/server/app/inference.py
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from settings import INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS
+from metrics import request_id_var
+from utils import get_image_embeddings, get_text_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceScheduler:
+    """
+    Gathers CLIP encode requests from concurrent handlers into micro-batches.
+
+    A batch is dispatched once it holds `max_batch_size` requests or `max_wait_ms` after
+    its first request arrived, whichever comes first. Batches run one at a time on a
+    dedicated thread, so the event loop stays free and requests queued during a forward
+    pass are picked up together by the next batch.
+    """
+
+    def __init__(self, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait_ms=INFERENCE_MAX_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._worker = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clip-inference")
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def encode_image(self, image):
+        """Normalized (1, D) embedding of a PIL image."""
+        return await self._submit("image", image)
+
+    async def encode_text(self, text):
+        """Normalized (1, D) embedding of a text query."""
+        return await self._submit("text", text)
+
+    async def run(self, fn, *args):
+        """Run an already-batched function on the inference thread, in turn with micro-batches."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _submit(self, kind, payload):
+        if self._queue is None:
+            raise RuntimeError("Inference scheduler is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((kind, payload, future, request_id_var.get()))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            for kind, encode in (("image", get_image_embeddings), ("text", get_text_embeddings)):
+                requests = [(payload, future) for k, payload, future, _ in batch if k == kind and not future.done()]
+                if requests:
+                    request_ids = ",".join(request_id for k, _, _, request_id in batch if k == kind)
+                    logger.debug(f"Encoding {kind} batch of {len(requests)} for requests {request_ids}")
+                    await self._dispatch(encode, requests)
+
+    async def _dispatch(self, encode, requests):
+        self.batches += 1
+        self.items += len(requests)
+        try:
+            embeddings = await self.run(encode, [payload for payload, _ in requests])
+        except Exception as e:
+            if len(requests) == 1:
+                self._resolve(requests[0][1], exception=e)
+                return
+            # One bad input must not fail its neighbours: retry them one by one
+            logger.warning(f"Batch of {len(requests)} failed ({e}), retrying individually")
+            for request in requests:
+                await self._dispatch(encode, [request])
+            return
+
+        for i, (_, future) in enumerate(requests):
+            self._resolve(future, result=embeddings[i:i + 1])
+
+    @staticmethod
+    def _resolve(future, result=None, exception=None):
+        if future.done():  # Caller went away (e.g. client disconnected)
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+scheduler = InferenceScheduler()
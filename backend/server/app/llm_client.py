@@ -0,0 +1,144 @@
+# backend/server/app/llm_client.py
+import asyncio
+import logging
+import os
+from langchain.schema import HumanMessage
+from llm_health import llm_health
+from metrics import stage
+from settings import (
+    GEMINI_API_KEY,
+    LLM_FAKE_RESPONSE,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_MODEL_NAME,
+    LLM_PROVIDER,
+    LLM_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(RuntimeError):
+    """The LLM backend is down (circuit open), timed out or failed."""
+
+
+def build_chat_model(provider=LLM_PROVIDER):
+    """Chat model for `provider`: "gemini", or "fake" for local testing without network access."""
+    if provider == "fake":
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+        # Streams the canned answer one character at a time
+        return FakeListChatModel(responses=[LLM_FAKE_RESPONSE], sleep=0.01)
+
+    if provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        if GEMINI_API_KEY:
+            os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
+        return ChatGoogleGenerativeAI(model=LLM_MODEL_NAME, timeout=LLM_TIMEOUT_SECONDS, max_retries=LLM_MAX_RETRIES)
+
+    raise ValueError(f"Unknown LLM provider {provider!r}, expected 'gemini' or 'fake'")
+
+
+class LLMClient:
+    """
+    Long-lived async chat client shared by all requests.
+
+    The chat model (and with it its HTTP/gRPC connections) is created once on first
+    use. At most `max_concurrency` calls are in flight at a time, each call including
+    its wait for a slot (each chunk, for streams) is bounded by `timeout` seconds, and
+    outcomes are reported to the LLM health monitor so an unavailable backend fails fast.
+    """
+
+    def __init__(self, provider=LLM_PROVIDER, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT_SECONDS):
+        self.provider = provider
+        self.timeout = timeout
+        self.in_flight = 0
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = None
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = build_chat_model(self.provider)
+        return self._model
+
+    @property
+    def semaphore(self):
+        # Created on first use inside the running loop: on Python < 3.10 a semaphore made at
+        # import time binds to another loop and fails with "attached to a different loop"
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _check_available(self):
+        # The fake model is local, so connectivity does not matter
+        if self.provider != "fake" and not llm_health.allow_request():
+            raise LLMUnavailableError("LLM backend is unavailable")
+
+    async def _invoke(self, prompt):
+        async with self.semaphore:
+            self.in_flight += 1
+            try:
+                with stage("llm"):
+                    return await self.model.ainvoke([HumanMessage(content=prompt)])
+            finally:
+                self.in_flight -= 1
+
+    async def ainvoke(self, prompt):
+        """Full response text for `prompt`."""
+        self._check_available()
+        try:
+            response = await asyncio.wait_for(self._invoke(prompt), self.timeout)
+        except Exception as e:
+            llm_health.record_failure(e)
+            raise LLMUnavailableError(f"LLM call failed: {e or type(e).__name__}") from e
+
+        llm_health.record_success()
+        return response.content if response else ""
+
+    async def _produce(self, prompt, chunks):
+        # Reads the model's stream into `chunks` while holding a concurrency slot, so the
+        # slot is released when generation ends rather than when the client has read it all
+        try:
+            async with self.semaphore:
+                self.in_flight += 1
+                try:
+                    with stage("llm"):
+                        async for chunk in self.model.astream([HumanMessage(content=prompt)]):
+                            if chunk.content:
+                                chunks.put_nowait(chunk.content)
+                finally:
+                    self.in_flight -= 1
+            chunks.put_nowait(None)
+        except Exception as e:
+            chunks.put_nowait(e)
+
+    async def astream(self, prompt):
+        """
+        Yields the response text for `prompt` chunk by chunk as the model produces it.
+        `timeout` bounds the wait for each chunk, not the time the consumer takes to read them.
+        """
+        self._check_available()
+        chunks = asyncio.Queue()
+        producer = asyncio.ensure_future(self._produce(prompt, chunks))
+        try:
+            while True:
+                chunk = await asyncio.wait_for(chunks.get(), self.timeout)
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        except Exception as e:
+            llm_health.record_failure(e)
+            raise LLMUnavailableError(f"LLM call failed: {e or type(e).__name__}") from e
+        finally:
+            # A client that disconnects or a timeout stops the generation and frees its slot
+            producer.cancel()
+
+        llm_health.record_success()
+
+
+llm_client = LLMClient()
@@ -0,0 +1,183 @@
+# backend/server/app/llm_health.py
+import asyncio
+import logging
+import random
+import ssl
+import time
+from settings import (
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_CIRCUIT_RESET_SECONDS,
+    LLM_HEALTH_HOST,
+    LLM_HEALTH_INTERVAL_SECONDS,
+    LLM_HEALTH_MAX_BACKOFF_SECONDS,
+    LLM_HEALTH_PORT,
+    LLM_HEALTH_TIMEOUT_SECONDS,
+    LLM_PROVIDER,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMHealthMonitor:
+    """
+    Tracks whether the LLM backend is reachable, without blocking requests.
+
+    A background task opens a TLS connection to the LLM endpoint every `interval`
+    seconds while it is up, backing off exponentially (with jitter) up to `max_backoff`
+    while it is down. Handlers call `allow_request()`, which only reads cached state.
+
+    Failed LLM calls reported through `record_failure()` feed a circuit breaker: after
+    `failure_threshold` consecutive failures (or a failed probe) the circuit opens and
+    requests fail fast. Once `reset_seconds` have passed, one request is let through to
+    test the backend ("half open"); its outcome closes or re-opens the circuit.
+
+    The "fake" provider runs in process, so it is never probed and always reported up.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        host=LLM_HEALTH_HOST,
+        port=LLM_HEALTH_PORT,
+        interval=LLM_HEALTH_INTERVAL_SECONDS,
+        timeout=LLM_HEALTH_TIMEOUT_SECONDS,
+        max_backoff=LLM_HEALTH_MAX_BACKOFF_SECONDS,
+        failure_threshold=LLM_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds=LLM_CIRCUIT_RESET_SECONDS,
+        provider=LLM_PROVIDER,
+    ):
+        self.provider = provider
+        self.host = host
+        self.port = port
+        self.interval = max(1.0, interval)
+        self.timeout = timeout
+        self.max_backoff = max(self.interval, max_backoff)
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.reachable = None  # Unknown until the first probe finishes
+        self.consecutive_failures = 0
+        self.last_probe_at = None
+        self.last_error = None
+        self.probes = 0
+        self.rejected = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._task = None
+        self._wake = None
+
+    async def start(self):
+        if self.provider == "fake":
+            self.reachable = True
+            logger.info("LLM provider is fake, skipping health probes.")
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def allow_request(self):
+        """Whether a request may call the LLM now. O(1), never touches the network."""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("LLM backend recovered, closing circuit.")
+        self.state = self.CLOSED
+        self.reachable = True
+        self.consecutive_failures = 0
+        self.last_error = None
+        self._trial_in_flight = False
+
+    def record_failure(self, error=None):
+        self.consecutive_failures += 1
+        self.last_error = str(error) if error is not None else self.last_error
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        if self.state != self.OPEN:
+            logger.warning(f"LLM backend unavailable ({self.last_error}), opening circuit.")
+            if self._wake is not None:
+                self._wake.set()  # Start probing with a short backoff right away
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    async def probe(self):
+        """Open (and close) a TLS connection to the LLM endpoint. Returns True if it succeeded."""
+        self.probes += 1
+        self.last_probe_at = time.time()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=ssl.create_default_context()),
+                self.timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            self.reachable = False
+            self.last_error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            return False
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+        self.reachable = True
+        return True
+
+    async def _run(self):
+        backoff = 1.0
+        while True:
+            if await self.probe():
+                if self.state != self.CLOSED:
+                    self.record_success()
+                backoff = 1.0
+                delay = self.interval
+            else:
+                self._open()
+                delay = min(self.max_backoff, backoff) * random.uniform(0.5, 1.0)
+                backoff *= 2
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self):
+        return {
+            "provider": self.provider,
+            "host": self.host,
+            "state": self.state,
+            "reachable": self.reachable,
+            "consecutive_failures": self.consecutive_failures,
+            "last_probe_at": self.last_probe_at,
+            "last_error": self.last_error,
+            "probes": self.probes,
+            "rejected": self.rejected,
+        }
+
+
+llm_health = LLMHealthMonitor()
@@ -1,11 +1,61 @@
 # backend/server/app/config.py
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from routes import router
-from settings import STATIC_DIR, ensure_static_folder  # Import the function
+from media import router as media_router
+from models import registry
+from inference import scheduler
+from llm_health import llm_health
+from index_watcher import index_watcher
+from metrics import new_request_id, request_duration, request_id_var
+from settings import WARMUP_ON_STARTUP
+from utils import warm_up
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model and index in the background so the server binds its port immediately;
+    # /upload/ answers 503 and /ready/ reports progress until loading finishes.
+    # (run_in_executor rather than asyncio.to_thread, which needs Python 3.9)
+    app.state.model_loader = asyncio.get_running_loop().run_in_executor(
+        None, registry.load, warm_up if WARMUP_ON_STARTUP else None
+    )
+    await scheduler.start()
+    await llm_health.start()
+    await index_watcher.start()
+    yield
+    await index_watcher.stop()
+    await llm_health.stop()
+    await scheduler.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Tag logs and inference batches with a request id (the caller's X-Request-ID if sent)
+    # and record the request latency per route.
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        request_duration.observe(
+            time.perf_counter() - start_time,
+            route=route.path if route is not None else "unmatched",
+            method=request.method,
+            status=status,
+        )
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 def setup_cors():
     app.add_middleware(
@@ -16,10 +66,6 @@ def setup_cors():
         allow_headers=["*"],
     )
     app.include_router(router)
-
-    # ✅ Ensure static folder exists before mounting
-    ensure_static_folder()
-    
-    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    app.include_router(media_router)
 
 setup_cors()
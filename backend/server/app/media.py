@@ -0,0 +1,59 @@
+# backend/server/app/media.py
+import mimetypes
+import os
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from common.media import MEDIA_TYPES, THUMBNAIL_FORMATS, THUMBNAIL_SIZES, thumbnail_path
+from settings import API_BASE_URL, IMAGES_DIR, MEDIA_CACHE_MAX_AGE, MEDIA_DEFAULT_VARIANT, THUMBNAIL_DIR
+
+router = APIRouter()
+
+MEDIA_VARIANTS = ("original", *THUMBNAIL_SIZES)
+
+
+def media_url(filename, variant=MEDIA_DEFAULT_VARIANT):
+    """Public URL of a catalog image, by its stable ID (the catalog filename)."""
+    return f"{API_BASE_URL}/media/{variant}/{quote(filename)}"
+
+
+def resolve_media(variant, filename, accept):
+    # Returns (path, media type) of the best file for the request, or (None, None)
+    if variant in THUMBNAIL_SIZES:
+        formats = [fmt for fmt in THUMBNAIL_FORMATS if fmt != "webp" or "image/webp" in accept]
+        for fmt in formats:
+            path = thumbnail_path(THUMBNAIL_DIR, variant, filename, fmt)
+            if os.path.isfile(path):
+                return path, MEDIA_TYPES[fmt]
+        # Thumbnails not generated yet: fall back to the original
+
+    path = os.path.join(IMAGES_DIR, filename)
+    if os.path.isfile(path):
+        return path, mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    return None, None
+
+
+@router.get("/media/{variant}/{filename}")
+async def get_media(variant: str, filename: str, request: Request):
+    """
+    Serve a catalog image or one of its pre-generated thumbnails straight from the
+    database folder, with ETag revalidation and long-lived cache headers.
+    """
+    if variant not in MEDIA_VARIANTS or filename != os.path.basename(filename) or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="Image not found.")
+
+    path, media_type = resolve_media(variant, filename, request.headers.get("accept", ""))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found.")
+
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{media_type.split("/")[1]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={MEDIA_CACHE_MAX_AGE}",
+        "Vary": "Accept",
+    }
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
@@ -1,23 +1,14 @@
 # backend/server/app/memory.py
-from collections import defaultdict
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import HumanMessage
-from settings import GEMINI_API_KEY
-import os
+from llm_client import llm_client
+from response_cache import llm_response_cache
+from session_store import session_store
 import json
+import logging
 
-os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
-# Session memory to store query history per session
-session_memory = defaultdict(list)
-# Query Gemini AI
-def query_gemini(user_query, image_descriptions, session_id):
-    # Initialize session memory if not present
-    if session_id not in session_memory:
-        session_memory[session_id] = []
-
-    # Append the new interaction (query + relevant image captions)
-    session_memory[session_id].append((user_query, image_descriptions))
+logger = logging.getLogger(__name__)
 
+# Record a query in the session memory and return the session's recent turns
+def record_turn(user_query, image_descriptions, session_id):
     # Weighted Memory Retention Logic
     important_keywords = [
         "cost", "price", "budget", "expense", "afford", "cheap", "expensive", "worth", "fees", "ticket", "spending",
@@ -30,18 +21,19 @@ def query_gemini(user_query, image_descriptions, session_id):
     ]
     
     is_important_query = any(word in user_query.lower() for word in important_keywords)
-    print(f"Is important query: {is_important_query}")
+    logger.debug(f"Is important query: {is_important_query}")
 
     # Retain more memory if the query is important
     memory_limit = 8 if is_important_query else 1  # Adjustable weights
-    session_memory[session_id] = session_memory[session_id][-memory_limit:]
 
-    # Create a structured context using past interactions
-    full_context = "\n".join(
-        f"User: {q}\nAI: {', '.join(resp) if resp else 'No response'}" for q, resp in session_memory[session_id]
-    )
+    # Append the new interaction (query + relevant image captions), rendered once and stored that way
+    turn = f"User: {user_query}\nAI: {', '.join(image_descriptions) if image_descriptions else 'No response'}"
+    return session_store.append(session_id, turn, memory_limit)
 
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+# Build the Gemini prompt for a query from the session's recent turns
+def build_prompt(user_query, image_descriptions, history):
+    # Create a structured context using past interactions
+    full_context = "\n".join(history)
 
     # Different prompt if image descriptions are missing
     if not image_descriptions:
@@ -72,10 +64,12 @@ def query_gemini(user_query, image_descriptions, session_id):
             "### JSON Response:"
         )
 
-    response = llm.invoke([HumanMessage(content=input_text)])
+    return input_text
 
+# Normalize the raw LLM output to a JSON array string
+def parse_llm_response(content):
     try:
-        content = response.content if response else '["No relevant insights available."]'
+        content = content or '["No relevant insights available."]'
 
         # Ensure response is a JSON array
         if content.startswith("{"):  # If LLM returns an object, extract the value
@@ -86,9 +80,32 @@ def query_gemini(user_query, image_descriptions, session_id):
     except:
         return '["An error occurred while generating the response."]'
 
+# Query Gemini AI, reusing cached answers to near-identical questions about the same caption.
+# The turn is recorded either way, so follow-ups keep their context after a cache hit.
+async def query_gemini(user_query, image_descriptions, session_id, query_embedding=None):
+    history = record_turn(user_query, image_descriptions, session_id)
+    content = llm_response_cache.get(image_descriptions, user_query, query_embedding)
+    if content is None:
+        content = await llm_client.ainvoke(build_prompt(user_query, image_descriptions, history))
+        llm_response_cache.set(image_descriptions, user_query, query_embedding, content)
+    return parse_llm_response(content)
+
+# Stream the raw Gemini answer chunk by chunk; pass the joined text to parse_llm_response
+async def stream_gemini(user_query, image_descriptions, session_id, query_embedding=None):
+    history = record_turn(user_query, image_descriptions, session_id)
+    content = llm_response_cache.get(image_descriptions, user_query, query_embedding)
+    if content is not None:
+        yield content
+        return
+
+    chunks = []
+    async for chunk in llm_client.astream(build_prompt(user_query, image_descriptions, history)):
+        chunks.append(chunk)
+        yield chunk
+    llm_response_cache.set(image_descriptions, user_query, query_embedding, "".join(chunks))
 
 
 def reset_memory():
-    global session_memory
-    session_memory.clear()
+    session_store.clear()
+    llm_response_cache.clear()
     print("✅ Session memory reset successfully.")
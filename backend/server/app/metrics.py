@@ -0,0 +1,161 @@
+# backend/server/app/metrics.py
+import bisect
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Id of the request being handled, set by the request-id middleware in main.py
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+# Seconds; covers sub-millisecond cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to log records as `request_id`."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    return repr(float(value)) if not isinstance(value, bool) else str(int(value))
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with one series per label combination."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if position < len(self.buckets):
+                series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = [(key, list(series)) for key, series in sorted(self._series.items())]
+
+        for key, series in series_items:
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-2]!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    Metric read at scrape time from `collect_fn`, which returns either a number or
+    a list of (labels dict, number) pairs. `kind` may be "counter" for values that
+    only ever grow.
+    """
+
+    def __init__(self, name, help_text, collect_fn, kind="gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.collect_fn = collect_fn
+        self.kind = kind
+
+    def collect(self):
+        try:
+            values = self.collect_fn()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} could not be collected: {e}")
+            return []
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        if not isinstance(values, list):
+            values = [({}, values)]
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, kind="gauge"):
+        """Decorator registering a function as a scrape-time gauge (or counter)."""
+        def decorator(fn):
+            self.register(Gauge(name, help_text, fn, kind))
+            return fn
+        return decorator
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+stage_duration = metrics.register(Histogram(
+    "smartsight_stage_duration_seconds",
+    "Time spent per pipeline stage (decode, preprocess, encode_image, encode_text, filter, search, rerank, media, llm).",
+    ("stage",),
+))
+
+request_duration = metrics.register(Histogram(
+    "smartsight_http_request_duration_seconds",
+    "HTTP request latency by route, method and status code.",
+    ("route", "method", "status"),
+))
+
+
+@contextmanager
+def stage(name):
+    """Times the enclosed block as pipeline stage `name`."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start_time
+        stage_duration.observe(elapsed, stage=name)
+        logger.debug(f"Stage {name} took {elapsed * 1000:.1f} ms")
@@ -1,19 +1,368 @@
 # backend/server/app/models.py
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
 import torch
-import clip
 import faiss
-import numpy as np
-from PIL import Image
-from settings import FAISS_INDEX_PATH, PATHS_FILE_PATH  # Updated import
+from settings import (
+    CAPTIONS_FILE_PATH,
+    CLIP_MODEL_NAME,
+    DATABASE_DIR,
+    ENCODER_BACKEND,
+    ENCODER_INTER_OP_THREADS,
+    ENCODER_INTRA_OP_THREADS,
+    FAISS_EF_SEARCH,
+    FAISS_INDEX_PATH,
+    FAISS_MMAP,
+    FAISS_NPROBE,
+    FAISS_SHARDS_THREADED,
+    FAISS_VECTORS_PATH,
+    FILTERS_PATH,
+    INDEX_DRAIN_TIMEOUT_SECONDS,
+    METADATA_PATH,
+    ONNX_MODEL_DIR,
+    PATHS_FILE_PATH,
+    RERANK_CANDIDATES,
+)
+from common.encoders import load_encoder
+from common.filters import FilterIndex
+from common.metadata_store import MetadataStore, build_record, image_filename, parse_captions
+from common.index_versions import current_version, version_dir
+from common.shards import merge_shards, read_shard_list
+
+logger = logging.getLogger(__name__)
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
-model, preprocess = clip.load("ViT-B/32", device=device)
 
-def load_faiss_index():
-    index = faiss.read_index(FAISS_INDEX_PATH)
-    with open(PATHS_FILE_PATH, 'r') as f:
+def apply_search_parameters(index):
+    # nprobe only applies to IVF indexes and efSearch to HNSW; a flat index accepts neither
+    parameter_space = faiss.ParameterSpace()
+    for name, value in (("nprobe", FAISS_NPROBE), ("efSearch", FAISS_EF_SEARCH)):
+        try:
+            parameter_space.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass
+
+def resident_memory_mb():
+    """
+    Resident and file-backed shared memory of this process, in MB.
+
+    Shared pages of an mmap'd index are counted once per box, not once per worker.
+    Returns (None, None) when the platform offers no way to measure it.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(field) for field in f.read().split()[:3])
+        page_mb = os.sysconf("SC_PAGE_SIZE") / 2**20
+        return resident * page_mb, shared * page_mb
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None, None
+    return psutil.Process().memory_info().rss / 2**20, None
+
+def read_index(path):
+    """
+    Read a FAISS index, memory-mapped and read-only when FAISS_MMAP is enabled.
+
+    IVF inverted lists are mapped straight from the file; flat codes are mapped too on
+    FAISS builds that support IO_FLAG_MMAP_IFC and are read into memory otherwise.
+    Returns the index and whether it was mapped.
+    """
+    if FAISS_MMAP:
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return faiss.read_index(path, io_flags), True
+        except RuntimeError as e:
+            print(f"⚠️ Could not memory-map {path} ({e}), reading it into memory instead.")
+    return faiss.read_index(path), False
+
+def load_faiss_index(index_path=FAISS_INDEX_PATH):
+    start_time = time.perf_counter()
+    shard_files = read_shard_list(index_path)
+    if shard_files:
+        shards = []
+        for path in shard_files:
+            shard, mapped = read_index(path)
+            apply_search_parameters(shard)
+            shards.append(shard)
+        # Queries fan out to every shard and the per-shard top-k are merged into one
+        index = merge_shards(shards, threaded=FAISS_SHARDS_THREADED)
+        logger.info(f"Loaded {len(shards)} index shards: " + ", ".join(str(shard.ntotal) for shard in shards) + " vectors")
+    else:
+        index, mapped = read_index(index_path)
+        apply_search_parameters(index)
+
+    resident_mb, shared_mb = resident_memory_mb()
+    memory = "n/a" if resident_mb is None else f"{resident_mb:.0f} MB"
+    if shared_mb is not None:
+        memory += f" ({shared_mb:.0f} MB shared)"
+    print(
+        f"✅ FAISS index loaded successfully: {index.ntotal} vectors, mmap={mapped}, "
+        f"{time.perf_counter() - start_time:.2f}s, pid={os.getpid()}, RSS={memory}"
+    )
+    return index
+
+def load_rerank_vectors(index, vectors_path=FAISS_VECTORS_PATH):
+    """
+    Memory-map the full-precision side file of a compressed index, if re-ranking is on.
+
+    Only the rows of candidates being re-ranked are ever paged in.
+    Returns:
+        numpy.ndarray: Vectors by FAISS id, or None to serve the index's own scores.
+    """
+    if RERANK_CANDIDATES <= 0 or not os.path.exists(vectors_path):
+        return None
+    vectors = np.load(vectors_path, mmap_mode="r")
+    if vectors.ndim != 2 or vectors.shape[1] != index.d:
+        logger.warning(f"Ignoring {vectors_path}: shape {vectors.shape} doesn't match the index dimension {index.d}")
+        return None
+    logger.info(f"Re-ranking the top {RERANK_CANDIDATES} candidates with {len(vectors)} float32 vectors from {vectors_path}")
+    return vectors
+
+def load_metadata(metadata_path=METADATA_PATH, paths_file_path=PATHS_FILE_PATH):
+    """
+    Open the row-aligned metadata store written next to the index by the generator.
+
+    Indexes built before the generator wrote one only have a paths file; their records
+    are built in memory from it and the captions file instead.
+    Returns:
+        MetadataStore: Image metadata, looked up by FAISS id.
+    """
+    if os.path.exists(metadata_path):
+        start_time = time.perf_counter()
+        metadata = MetadataStore.open(metadata_path)
+        logger.info(f"Mapped metadata for {len(metadata)} rows in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        return metadata
+
+    logger.warning(f"{metadata_path} not found, building metadata from the paths and captions files; rerun the generator to create it")
+    with open(paths_file_path, 'r') as f:
         image_paths = [line.strip() for line in f]
-    print("✅ FAISS index loaded successfully.")
-    return index, image_paths
+    try:
+        captions = parse_captions(CAPTIONS_FILE_PATH)
+    except FileNotFoundError:
+        logger.error(f"Captions file not found at {CAPTIONS_FILE_PATH}")
+        captions = {}
+    records = [
+        build_record(path, captions.get(image_filename(path), [])) if path else None
+        for path in image_paths
+    ]
+    return MetadataStore.from_records(records)
+
+def load_filters(filters_path, metadata):
+    """
+    Load the per-attribute id lists behind filtered search.
+
+    Indexes built before the generator wrote them get them built from the metadata records,
+    which reads every record once.
+    Returns:
+        FilterIndex: Attribute filters over the version's FAISS ids.
+    """
+    if os.path.exists(filters_path):
+        return FilterIndex.load(filters_path)
+    logger.warning(f"{filters_path} not found, building filters from the metadata; rerun the generator to create it")
+    return FilterIndex.from_records(metadata.get(row_id) for row_id in range(len(metadata)))
+
+def published_version():
+    # Version the generator last published, "legacy" for an unversioned database folder
+    return current_version(DATABASE_DIR) or "legacy"
+
+
+class IndexVersion:
+    """
+    One generator build: the FAISS index, metadata, filters and re-rank vectors that belong together.
+
+    Searches hold a lease on the version they started with (`ModelRegistry.lease()`), so a
+    reload can swap in a new version while they finish on the old one. The old version is
+    released once its leases drain.
+    """
+
+    def __init__(self, name, index, metadata, vectors, filters):
+        self.name = name
+        self.index = index
+        self.metadata = metadata
+        self.vectors = vectors
+        self.filters = filters
+        self.loaded_at = time.time()
+        self._leases = 0
+        self._drained = threading.Condition()
+
+    @classmethod
+    def load(cls, name):
+        directory = version_dir(DATABASE_DIR, None if name == "legacy" else name)
+
+        def path(setting):
+            return os.path.join(directory, os.path.basename(setting))
+
+        index = load_faiss_index(path(FAISS_INDEX_PATH))
+        metadata = load_metadata(path(METADATA_PATH), path(PATHS_FILE_PATH))
+        vectors = load_rerank_vectors(index, path(FAISS_VECTORS_PATH))
+        filters = load_filters(path(FILTERS_PATH), metadata)
+        return cls(name, index, metadata, vectors, filters)
+
+    def acquire(self):
+        with self._drained:
+            self._leases += 1
+
+    def release_lease(self):
+        with self._drained:
+            self._leases -= 1
+            if self._leases == 0:
+                self._drained.notify_all()
+
+    def drain(self, timeout):
+        """Wait until no search is using this version. Returns False on timeout."""
+        with self._drained:
+            return self._drained.wait_for(lambda: self._leases == 0, timeout)
+
+    def close(self):
+        # Drop the references; FAISS frees the index and the OS unmaps the files
+        self.index = self.metadata = self.vectors = self.filters = None
+
+
+class ModelRegistry:
+    """
+    Holds the CLIP encoder and the served IndexVersion, loaded off the request path.
+
+    The app starts serving immediately; `load()` runs in a background thread at startup
+    and `status` moves from "starting" through "loading" / "warming_up" to "ready"
+    (or "failed", with the reason in `error`).
+    """
+
+    def __init__(self):
+        self.encoder = None
+        self.version = None
+        self.status = "starting"
+        self.error = None
+        self.load_times = {}
+        self.reloads = 0
+        self.reload_error = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._failed_version = None
+
+    @property
+    def is_ready(self):
+        return self.status == "ready"
+
+    @property
+    def index(self):
+        version = self.version
+        return version.index if version is not None else None
+
+    @property
+    def index_version(self):
+        version = self.version
+        return version.name if version is not None else None
+
+    @contextmanager
+    def lease(self):
+        """
+        The current IndexVersion, kept usable until the block exits even if a reload
+        swaps in a newer one meanwhile.
+        """
+        with self._swap_lock:
+            version = self.version
+            version.acquire()
+        try:
+            yield version
+        finally:
+            version.release_lease()
+
+    def reload(self, force=False):
+        """
+        Load the published index version in the calling thread and swap it in.
+
+        Searches keep running on the old version while the new one loads; the swap is a
+        single reference assignment, and the old version is released in the background
+        once its in-flight searches finish.
+
+        Args:
+            force (bool): Reload even if the published version is already being served,
+                or previously failed to load.
+
+        Returns:
+            bool: Whether a new version was swapped in.
+        """
+        with self._reload_lock:
+            name = published_version()
+            if not force and name in (self.index_version, self._failed_version):
+                return False
+
+            start_time = time.perf_counter()
+            try:
+                version = IndexVersion.load(name)
+            except Exception as e:
+                self._failed_version = name
+                self.reload_error = f"{name}: {e}"
+                raise
+            self._failed_version = None
+            self.reload_error = None
+
+            with self._swap_lock:
+                old, self.version = self.version, version
+            self.load_times["index"] = time.perf_counter() - start_time
+            if old is not None:
+                self.reloads += 1
+                threading.Thread(target=self._retire, args=(old,), name=f"retire-index-{old.name}", daemon=True).start()
+            logger.info(f"Serving index version {name} ({version.index.ntotal} vectors, loaded in {self.load_times['index']:.2f}s)")
+            return True
+
+    def _retire(self, version):
+        if not version.drain(INDEX_DRAIN_TIMEOUT_SECONDS):
+            # Leave it to the searches still holding it; it is freed when the last one ends
+            logger.warning(f"Index version {version.name} still in use after {INDEX_DRAIN_TIMEOUT_SECONDS}s")
+            return
+        version.close()
+        logger.info(f"Released index version {version.name}")
+
+    def load(self, warm_up=None):
+        """
+        Load everything needed to serve queries. Safe to call more than once.
+
+        Args:
+            warm_up (callable): Optional function run once everything is loaded, e.g. a
+                dummy forward pass so the first real query doesn't pay JIT/allocator costs.
+        """
+        with self._lock:
+            if self.is_ready:
+                return
+            try:
+                self.status = "loading"
+
+                start_time = time.perf_counter()
+                self.encoder = load_encoder(
+                    ENCODER_BACKEND,
+                    CLIP_MODEL_NAME,
+                    device=device,
+                    onnx_dir=ONNX_MODEL_DIR,
+                    intra_op_threads=ENCODER_INTRA_OP_THREADS,
+                    inter_op_threads=ENCODER_INTER_OP_THREADS,
+                )
+                self.load_times["model"] = time.perf_counter() - start_time
+                logger.info(f"Loaded CLIP {CLIP_MODEL_NAME} with the {ENCODER_BACKEND} backend on {self.encoder.device}")
+
+                self.reload(force=True)
+
+                if warm_up is not None:
+                    self.status = "warming_up"
+                    start_time = time.perf_counter()
+                    warm_up()
+                    self.load_times["warm_up"] = time.perf_counter() - start_time
+
+                self.status = "ready"
+                self.error = None
+                logger.info("Models ready: " + ", ".join(f"{k}={v:.2f}s" for k, v in self.load_times.items()))
+            except Exception as e:
+                self.status = "failed"
+                self.error = str(e)
+                logger.error(f"Failed to load models: {e}", exc_info=True)
+
 
-index, image_paths = load_faiss_index()
\ No newline at end of file
+registry = ModelRegistry()
@@ -0,0 +1,174 @@
+# backend/server/app/response_cache.py
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from cache import normalize_query
+from settings import (
+    RESPONSE_CACHE_DB_PATH,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticResponseCache:
+    """
+    LLM answers keyed by retrieval context and query meaning.
+
+    An answer is reused for a later query with the same context (the caption sent to
+    the LLM, None when nothing was retrieved) whose normalized text matches exactly, or
+    whose CLIP text embedding has cosine similarity >= `threshold` with the cached one,
+    so paraphrases of a question about the same landmark share one answer.
+
+    Entries are evicted least-recently-used first beyond `max_entries` and expire after
+    `ttl_seconds`. With `db_path` set they are also written to SQLite and reloaded on
+    startup, so answers survive restarts.
+    """
+
+    def __init__(self, max_entries, ttl_seconds=None, threshold=0.95, db_path=None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds or None
+        self.threshold = threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # (context, query) -> (embedding, answer, created_at)
+        self._contexts = {}  # context -> set of queries cached for it
+        self._lock = threading.Lock()
+        self._db = self._open_db(db_path) if db_path else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, context, query, embedding=None):
+        """Cached answer for the query in this context, or None."""
+        key = (context, normalize_query(query))
+        with self._lock:
+            self._expire(context)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1]
+
+            best_key = self._most_similar(context, embedding)
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.semantic_hits += 1
+            return self._entries[best_key][1]
+
+    def set(self, context, query, embedding, answer):
+        key = (context, normalize_query(query))
+        vector = None if embedding is None else np.asarray(embedding, dtype=np.float32).reshape(-1)
+        created_at = time.time()
+        with self._lock:
+            self._store(key, vector, answer, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (context, key[1], None if vector is None else vector.tobytes(), answer, created_at),
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._contexts.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "threshold": self.threshold,
+                "persistent": self._db is not None,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def _most_similar(self, context, embedding):
+        if embedding is None:
+            return None
+        keys = [
+            (context, query) for query in self._contexts.get(context, ())
+            if self._entries[(context, query)][0] is not None
+        ]
+        if not keys:
+            return None
+
+        query_vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        similarities = np.stack([self._entries[key][0] for key in keys]) @ query_vector
+        best = int(np.argmax(similarities))
+        return keys[best] if similarities[best] >= self.threshold else None
+
+    def _store(self, key, vector, answer, created_at):
+        self._entries[key] = (vector, answer, created_at)
+        self._entries.move_to_end(key)
+        self._contexts.setdefault(key[0], set()).add(key[1])
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _expire(self, context):
+        if not self.ttl_seconds:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for query in list(self._contexts.get(context, ())):
+            if self._entries[(context, query)][2] <= cutoff:
+                self._remove((context, query))
+
+    def _remove(self, key):
+        del self._entries[key]
+        queries = self._contexts[key[0]]
+        queries.discard(key[1])
+        if not queries:
+            del self._contexts[key[0]]
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses WHERE context IS ? AND query = ?", key)
+            self._db.commit()
+
+    def _open_db(self, db_path):
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "context TEXT, query TEXT NOT NULL, embedding BLOB, answer TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (context, query))"
+        )
+        if self.ttl_seconds:
+            db.execute("DELETE FROM responses WHERE created_at <= ?", (time.time() - self.ttl_seconds,))
+            db.commit()
+
+        rows = db.execute(
+            "SELECT context, query, embedding, answer, created_at FROM responses ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for context, query, embedding, answer, created_at in reversed(rows):
+            vector = None if embedding is None else np.frombuffer(embedding, dtype=np.float32)
+            self._store((context, query), vector, answer, created_at)
+        logger.info(f"Loaded {len(rows)} cached LLM responses from {db_path}")
+        return db
+
+
+llm_response_cache = SemanticResponseCache(
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_DB_PATH or None,
+)
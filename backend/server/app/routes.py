@@ -1,132 +1,341 @@
 # backend/server/app/routes.py
-from settings import API_BASE_URL, STATIC_DIR
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+from settings import (
+    ADMIN_TOKEN,
+    BATCH_SEARCH_CHUNK_SIZE,
+    BATCH_SEARCH_MAX_ARCHIVE_MB,
+    BATCH_SEARCH_MAX_ITEMS,
+    IMAGES_DIR,
+    UPLOAD_MAX_MB,
+    UPLOAD_READ_CHUNK_KB,
+)
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Optional
 import io
-import shutil
+import json
 import os
-from PIL import Image, UnidentifiedImageError
-from utils import get_image_embedding, get_joint_embedding, get_text_embedding, search_faiss
-from memory import query_gemini
+import zipfile
+import numpy as np
+from utils import combine_embeddings, decode_upload, get_image_embeddings, get_text_embeddings, search_faiss, search_faiss_batch
+from memory import parse_llm_response, query_gemini, stream_gemini
+from llm_client import LLMUnavailableError
+from models import published_version, registry
+from inference import scheduler
+from cache import normalize_query, search_result_cache, text_embedding_cache
+from upload_cache import upload_image_cache
+from response_cache import llm_response_cache
+from session_store import session_store
+from session_context import session_image_context
+from common.filters import FILTER_ATTRIBUTES
+from common.image_hash import bytes_sha256, image_hashes
+from common.image_io import ImageTooLargeError, InvalidImageError
+from media import media_url
+from llm_health import llm_health
+from llm_client import llm_client
+from metrics import RequestIdFilter, metrics, stage
 import logging
-import urllib.request
-import urllib.error
 
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
-# Configure logging to console and file
+# Configure logging to console and file, tagging every line with the request id.
+# force=True: utils.py, imported above, has already configured the root logger.
+log_handlers = [logging.StreamHandler(), logging.FileHandler("debug.log")]
+for handler in log_handlers:
+    handler.addFilter(RequestIdFilter())
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("debug.log")
-    ]
+    format='%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s',
+    handlers=log_handlers,
+    force=True,
 )
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Base directory for images, absolute path from backend/server/app/ to backend/database/images/
-BASE_IMAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "database", "images"))
-
 # Constant for no internet message
 NO_INTERNET_MESSAGE = "No internet connection, unable to query LLM."
 
-# Function to check internet connectivity
-def check_internet_connection():
-    try:
-        urllib.request.urlopen("http://www.google.com", timeout=5)
-        return True
-    except urllib.error.URLError:
-        return False
-
 @router.get("/test/")
 async def test_endpoint():
     logger.info("Test endpoint called")
     return {"message": "Test successful"}
 
+@router.get("/ready/")
+async def readiness_endpoint():
+    body = {"status": registry.status, "load_times": registry.load_times, "index_version": registry.index_version}
+    if registry.error:
+        body["error"] = registry.error
+    if registry.reload_error:
+        body["reload_error"] = registry.reload_error
+    return JSONResponse(status_code=200 if registry.is_ready else 503, content=body)
+
+@router.get("/health/llm")
+async def llm_health_endpoint():
+    return llm_health.stats()
+
+CACHES = {
+    "text_embeddings": text_embedding_cache,
+    "search_results": search_result_cache,
+    "uploads": upload_image_cache,
+    "llm_responses": llm_response_cache,
+}
+
+@router.get("/stats/cache")
+async def cache_stats_endpoint():
+    return {
+        **{name: cache.stats() for name, cache in CACHES.items()},
+        "sessions": session_store.stats(),
+    }
+
+@metrics.gauge("smartsight_model_ready", "1 once the CLIP model and FAISS index are loaded.")
+def model_ready_metric():
+    return registry.is_ready
+
+@metrics.gauge("smartsight_load_seconds", "Startup time per component (model, index, warm_up).")
+def load_seconds_metric():
+    return [({"component": component}, seconds) for component, seconds in registry.load_times.items()]
+
+@metrics.gauge("smartsight_index_vectors", "Vectors in the loaded FAISS index.")
+def index_vectors_metric():
+    return registry.index.ntotal if registry.index is not None else 0
+
+@metrics.gauge("smartsight_index_reloads_total", "Index versions hot-swapped in since startup.", kind="counter")
+def index_reloads_metric():
+    return registry.reloads
+
+@metrics.gauge("smartsight_inference_queue_depth", "CLIP encode requests waiting for the next micro-batch.")
+def inference_queue_metric():
+    return scheduler.queue_depth
+
+@metrics.gauge("smartsight_inference_batches_total", "CLIP micro-batches run.", kind="counter")
+def inference_batches_metric():
+    return scheduler.batches
+
+@metrics.gauge("smartsight_inference_items_total", "Requests encoded in CLIP micro-batches.", kind="counter")
+def inference_items_metric():
+    return scheduler.items
+
+@metrics.gauge("smartsight_llm_in_flight", "LLM calls currently running.")
+def llm_in_flight_metric():
+    return llm_client.in_flight
+
+@metrics.gauge("smartsight_llm_circuit_open", "1 while the LLM circuit breaker is open or half open.")
+def llm_circuit_metric():
+    return llm_health.state != llm_health.CLOSED
+
+@metrics.gauge("smartsight_cache_entries", "Entries per in-process cache.")
+def cache_entries_metric():
+    return [({"cache": name}, cache.stats()["entries"]) for name, cache in CACHES.items()]
+
+@metrics.gauge("smartsight_cache_hits_total", "Cache hits per in-process cache.", kind="counter")
+def cache_hits_metric():
+    return [({"cache": name}, cache.stats()["hits"]) for name, cache in CACHES.items()]
+
+@metrics.gauge("smartsight_cache_misses_total", "Cache misses per in-process cache.", kind="counter")
+def cache_misses_metric():
+    return [({"cache": name}, cache.stats()["misses"]) for name, cache in CACHES.items()]
+
+@metrics.gauge("smartsight_cache_hit_rate", "Hit rate per in-process cache since startup.")
+def cache_hit_rate_metric():
+    return [({"cache": name}, cache.stats()["hit_rate"]) for name, cache in CACHES.items()]
+
+@router.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+async def embed_text(query):
+    # Text embeddings only depend on the model, so they survive index changes
+    key = normalize_query(query)
+    embedding = text_embedding_cache.get(key)
+    if embedding is None:
+        embedding = await scheduler.encode_text(query)
+        text_embedding_cache.set(key, embedding)
+    return embedding
+
+async def embed_upload(image_bytes):
+    # Returns (embedding, canonical cache key). Exact re-uploads skip decoding and CLIP;
+    # near-duplicates (same perceptual hash) are decoded once to hash but skip CLIP.
+    image_sha = bytes_sha256(image_bytes)
+    entry = upload_image_cache.get_exact(image_sha)
+    if entry is not None:
+        logger.info("Upload cache hit (exact)")
+        return entry["embedding"], entry["key"]
+
+    try:
+        with stage("decode"):
+            image = await run_in_threadpool(decode_upload, image_bytes)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=f"Uploaded image is too large: {e}")
+    except InvalidImageError:
+        raise HTTPException(status_code=400, detail="Uploaded file is not a valid image.")
+
+    with stage("hash"):
+        hashes = await run_in_threadpool(image_hashes, image)
+    entry = upload_image_cache.find_near(image_sha, hashes)
+    if entry is not None:
+        logger.info("Upload cache hit (near-duplicate)")
+        return entry["embedding"], entry["key"]
+
+    embedding = await scheduler.encode_image(image)
+    upload_image_cache.store(image_sha, hashes, embedding)
+    return embedding, image_sha
+
+async def read_upload(upload, max_mb=UPLOAD_MAX_MB):
+    # Reads an upload in chunks and refuses it as soon as it passes max_mb,
+    # without first buffering an oversized file in memory
+    max_bytes = int(max_mb * 2**20)
+    if getattr(upload, "size", None) and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Uploaded file is larger than {max_mb:g} MB.")
+    chunks, size = [], 0
+    while chunk := await upload.read(UPLOAD_READ_CHUNK_KB * 1024):
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Uploaded file is larger than {max_mb:g} MB.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def ensure_ready():
+    if not registry.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is not ready yet (status: {registry.status}), please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+def search_filters(landmark="", state="", country="", category=""):
+    """
+    Attribute filters from the optional form fields; each takes one value or a
+    comma-separated list, e.g. state="Kerala,Goa". Returns None when none is set.
+    """
+    fields = {"landmark": landmark, "state": state, "country": country, "category": category}
+    filters = {
+        attribute: sorted({value.strip() for value in (fields[attribute] or "").split(",") if value.strip()})
+        for attribute in FILTER_ATTRIBUTES
+    }
+    filters = {attribute: values for attribute, values in filters.items() if values}
+    return filters or None
+
+def filters_cache_key(filters):
+    return tuple((attribute, tuple(value.lower() for value in values)) for attribute, values in sorted((filters or {}).items()))
+
+@router.get("/filters")
+async def list_filters():
+    """Values the search filters accept for the served index version, with image counts."""
+    ensure_ready()
+    with registry.lease() as version:
+        return {
+            "index_version": version.name,
+            **{
+                attribute: [{"value": value, "count": count} for value, count in version.filters.values(attribute)]
+                for attribute in FILTER_ATTRIBUTES
+            },
+        }
+
+@router.post("/admin/reload")
+async def reload_index(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load the index version the generator last published and swap it in without a restart.
+    Searches in flight finish on the old version. `force` reloads even an unchanged version.
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    ensure_ready()
+
+    previous = registry.index_version
+    try:
+        reloaded = await run_in_threadpool(registry.reload, force)
+    except Exception as e:
+        logger.error(f"Index reload failed, still serving version {previous}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to load index version {published_version()}: {e}")
+
+    return {
+        "reloaded": reloaded,
+        "previous_version": previous,
+        "index_version": registry.index_version,
+        "vectors": registry.index.ntotal,
+        "load_seconds": registry.load_times.get("index"),
+    }
+
 @router.post("/reset/")
 async def reset_backend():
     from memory import reset_memory
-    import shutil
 
     # Reset session memory
     reset_memory()
 
-    # Reset retrieved images and captions
-    global retrieved_images, retrieved_captions, img, similarity_percentages, is_image_found
-    retrieved_images = []
-    retrieved_captions = []
-    similarity_percentages = []
-    is_image_found = False
-    img = None
-
-    # Clear static folder
-    try:
-        for filename in os.listdir(STATIC_DIR):
-            file_path = os.path.join(STATIC_DIR, filename)
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-        logger.info("Static folder cleared successfully.")
-    except Exception as e:
-        return {"message": f"Error clearing static folder: {str(e)}"}
+    # Forget every session's last uploaded image
+    session_image_context.clear()
 
-    logger.info("Retrieved images, captions, and last uploaded image reset successfully.")
+    logger.info("Session memory and last uploaded images reset successfully.")
     return {"message": "Backend reset successfully!"}
 
-@router.post("/upload/")
-async def upload_file(
-    file: UploadFile = File(None), query: str = Form(""), session_id: str = Form("default")
-):
-    logger.info(f"Received request: file={file.filename if file else 'None'}, query='{query}', session_id='{session_id}'")
+async def retrieve(file, query, session_id, filters=None):
+    """
+    Embeds the upload and/or query, searches the index and returns the retrieval part of the response.
+    `filters` (see search_filters) restricts the search to matching images.
+    """
+    if not file and not query:
+        raise HTTPException(status_code=400, detail="Either a file or query must be provided.")
+
+    image_embedding = None
+    alpha = 0.6  # weight of image in joint embedding
+
+    # CLIP runs on the inference scheduler, batched with other concurrent requests
+    if file:
+        image_bytes = await read_upload(file)
+        if not image_bytes:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+        image_embedding, image_cache_key = await embed_upload(image_bytes)
+        session_image_context.set(session_id, image_embedding)
+    elif query:
+        # Text follow-up: reuse the embedding of this session's last uploaded image
+        image_embedding = session_image_context.get(session_id)
+
+    top_k = 5  # Increase k if needed
+    query_embedding = None
+    results = None
+    result_cache_key = None
+    if image_embedding is not None and query:
+        text_embedding = await embed_text(query)
+        query_embedding = combine_embeddings(image_embedding, text_embedding, alpha)
+    elif file:
+        # Image-only queries: copies of the same picture share their results
+        query_embedding = image_embedding
+        search_result_cache.check_version(registry.index_version)
+        result_cache_key = ("image", image_cache_key, top_k, filters_cache_key(filters))
+        results = search_result_cache.get(result_cache_key)
+    elif query:
+        # Text-only queries repeat a lot: reuse their results until a new index version is swapped in
+        search_result_cache.check_version(registry.index_version)
+        result_cache_key = (normalize_query(query), top_k, filters_cache_key(filters))
+        results = search_result_cache.get(result_cache_key)
+        if results is None:
+            query_embedding = await embed_text(query)
+    else:
+        raise ValueError("No valid input for embedding")
+
+    logger.info("Searching FAISS index")
     try:
-        if not file and not query:
-            raise HTTPException(status_code=400, detail="Either a file or query must be provided.")
-
-        image = None
-        alpha = 0.6  # weight of image in joint embedding
-
-        if file:
-            image_bytes = await file.read()
-            if not image_bytes:
-                raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-            try:
-                image = Image.open(io.BytesIO(image_bytes))
-                image.verify()
-                image = Image.open(io.BytesIO(image_bytes))
-            except UnidentifiedImageError:
-                raise HTTPException(status_code=400, detail="Uploaded file is not a valid image.")
-
-        global img
-        if 'img' not in globals():
-            img = None
-
-        query_embedding = None
-        if file and query:
-            img = image
-            query_embedding = get_joint_embedding(img, query, alpha)
-        elif file:
-            img = image
-            query_embedding = get_image_embedding(img)
-        elif query:
-            query_embedding = get_joint_embedding(img, query, alpha) if img else get_text_embedding(query)
-        else:
-            raise ValueError("No valid input for embedding")
-
-        logger.info("Searching FAISS index")
-        try:
-            results = search_faiss(query_embedding, top_k=5)  # Increase k if needed
-            if not results:
-                raise HTTPException(status_code=404, detail="No similar images found.")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"FAISS search failed: {str(e)}")
+        if results is None:
+            results = await run_in_threadpool(search_faiss, query_embedding, top_k, filters)
+            if result_cache_key is not None and results:
+                search_result_cache.set(result_cache_key, results)
+        if not results:
+            detail = "No images match the filters." if filters else "No similar images found."
+            raise HTTPException(status_code=404, detail=detail)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"FAISS search failed: {str(e)}")
 
-        retrieved_images = []
-        retrieved_captions = []
-        similarity_percentages = []
-        is_image_found = False
+    retrieved_images = []
+    original_images = []
+    retrieved_captions = []
+    similarity_percentages = []
+    is_image_found = False
 
+    with stage("media"):
         for img_path, caption, similarity in results:  # Assumes search_faiss returns (image_path, caption, similarity)
             similarity_percentage = round(similarity * 100, 2)
             similarity_percentages.append(similarity_percentage)
@@ -134,36 +343,54 @@ async def upload_file(
 
             if similarity_percentage > 50:
                 is_image_found = True
-                img_filename = os.path.basename(img_path)
-                static_img_path = os.path.join(STATIC_DIR, img_filename)
-                abs_img_path = os.path.normpath(os.path.join(BASE_IMAGE_DIR, img_filename))
-
-                try:
-                    shutil.copy(abs_img_path, static_img_path)
-                except FileNotFoundError:
+                # Paths in the index may use Windows separators
+                img_filename = os.path.basename(img_path.replace("\\", "/"))
+                if not os.path.isfile(os.path.join(IMAGES_DIR, img_filename)):
                     continue
 
-                retrieved_images.append(f"{API_BASE_URL}/static/{img_filename}")
+                # Served in place by /media/, as a thumbnail unless MEDIA_DEFAULT_VARIANT says otherwise
+                retrieved_images.append(media_url(img_filename))
+                original_images.append(media_url(img_filename, "original"))
                 retrieved_captions.append(caption)
 
-        if not is_image_found:
-            retrieved_captions = None
+    if not is_image_found:
+        retrieved_captions = None
+
+    return {
+        "similar_images": retrieved_images,
+        "original_images": original_images,
+        "retrieved_captions": retrieved_captions,
+        "similarity_scores": [float(score) for score in similarity_percentages],
+        "is_image_found": is_image_found,
+    }
+
+@router.post("/upload/")
+async def upload_file(
+    file: UploadFile = File(None), query: str = Form(""), session_id: str = Form("default"),
+    landmark: str = Form(""), state: str = Form(""), country: str = Form(""), category: str = Form(""),
+):
+    filters = search_filters(landmark, state, country, category)
+    logger.info(f"Received request: file={file.filename if file else 'None'}, query='{query}', session_id='{session_id}', filters={filters}")
+    ensure_ready()
+    try:
+        retrieval = await retrieve(file, query, session_id, filters)
+        retrieved_captions = retrieval["retrieved_captions"]
+        # Cached answers are matched on the query's CLIP text embedding
+        text_embedding = await embed_text(query) if query else None
 
-        # Check internet connection and handle LLM response
-        if check_internet_connection():
-            logger.info("Internet connection available, querying Gemini.")
-            llm_response = query_gemini(query, retrieved_captions[0] if retrieved_captions else None, session_id)
-        else:
-            logger.warning("No internet connection, skipping Gemini query.")
+        # Query Gemini unless the health monitor's circuit breaker says it is down
+        try:
+            llm_response = await query_gemini(
+                query, retrieved_captions[0] if retrieved_captions else None, session_id, text_embedding
+            )
+        except LLMUnavailableError as e:
+            logger.warning(f"Skipping Gemini query: {e}")
             llm_response = NO_INTERNET_MESSAGE
 
         # Return response with all relevant data
         return JSONResponse(content={
             "message": "Request processed successfully!",
-            "similar_images": retrieved_images,
-            "retrieved_captions": retrieved_captions,
-            "similarity_scores": [float(score) for score in similarity_percentages],
-            "is_image_found": is_image_found,
+            **retrieval,
             "llm_response": llm_response,
             "session_id": session_id
         })
@@ -173,4 +400,182 @@ async def upload_file(
         raise
     except Exception as e:
         logger.error(f"Unexpected Error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/upload/stream")
+async def upload_file_stream(
+    file: UploadFile = File(None), query: str = Form(""), session_id: str = Form("default"),
+    landmark: str = Form(""), state: str = Form(""), country: str = Form(""), category: str = Form(""),
+):
+    """
+    Same as /upload/, as Server-Sent Events: a "results" event with the retrieved
+    images as soon as the search is done, one "token" event per LLM chunk, then a
+    "done" event carrying the parsed llm_response (or an "error" event).
+    """
+    filters = search_filters(landmark, state, country, category)
+    logger.info(f"Received stream request: file={file.filename if file else 'None'}, query='{query}', session_id='{session_id}', filters={filters}")
+    ensure_ready()
+    try:
+        retrieval = await retrieve(file, query, session_id, filters)
+    except HTTPException as e:
+        logger.error(f"HTTP Exception: {e.detail}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected Error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    retrieved_captions = retrieval["retrieved_captions"]
+
+    async def events():
+        yield sse_event("results", {**retrieval, "session_id": session_id})
+
+        chunks = []
+        try:
+            text_embedding = await embed_text(query) if query else None
+            async for chunk in stream_gemini(
+                query, retrieved_captions[0] if retrieved_captions else None, session_id, text_embedding
+            ):
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+        except LLMUnavailableError as e:
+            logger.warning(f"Gemini stream failed: {e}")
+            yield sse_event("error", {"llm_response": NO_INTERNET_MESSAGE})
+            return
+
+        yield sse_event("done", {"llm_response": parse_llm_response("".join(chunks))})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif")
+
+def open_image(image_bytes):
+    try:
+        return decode_upload(image_bytes), None
+    except ImageTooLargeError as e:
+        return None, f"Image is too large: {e}"
+    except InvalidImageError:
+        return None, "Not a valid image."
+
+def read_archive_images(archive_bytes):
+    # Yields (name, image bytes, error) for every image file in a zip archive
+    max_bytes = int(UPLOAD_MAX_MB * 2**20)
+    try:
+        with zipfile.ZipFile(io.BytesIO(archive_bytes)) as archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                if info.file_size > max_bytes:
+                    yield name, None, f"Image is larger than {UPLOAD_MAX_MB:g} MB."
+                    continue
+                yield name, archive.read(info), None
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive is not a valid zip file.")
+
+async def encode_batch(encode, payloads):
+    # Encode a chunk in one forward pass; if that fails, isolate the failing inputs
+    try:
+        embeddings = await scheduler.run(encode, payloads)
+        return [embeddings[i:i + 1] for i in range(len(payloads))], [None] * len(payloads)
+    except Exception as e:
+        if len(payloads) == 1:
+            return [None], [str(e)]
+    embeddings, errors = [], []
+    for payload in payloads:
+        embedding, error = await encode_batch(encode, [payload])
+        embeddings += embedding
+        errors += error
+    return embeddings, errors
+
+@router.post("/search/batch")
+async def search_batch(
+    queries: Optional[List[str]] = Form(None),
+    files: Optional[List[UploadFile]] = File(None),
+    archive: UploadFile = File(None),
+    top_k: int = Form(5),
+    landmark: str = Form(""),
+    state: str = Form(""),
+    country: str = Form(""),
+    category: str = Form(""),
+):
+    """
+    Search many text queries and/or images in one call.
+
+    Images can be sent as repeated `files` parts and/or one zip `archive`. Images are
+    decoded chunk by chunk, so only one chunk's pixels are held at a time. Queries are
+    encoded and searched in chunks with one multi-row FAISS search each, and results
+    stream back as NDJSON, one line per query in request order. The landmark, state,
+    country and category filters apply to every query.
+    """
+    ensure_ready()
+    top_k = max(1, min(top_k, 100))
+    filters = search_filters(landmark, state, country, category)
+
+    items = [{"type": "text", "query": query, "payload": query} for query in (queries or []) if query.strip()]
+    for upload in files or []:
+        items.append({"type": "image", "filename": upload.filename, "payload": await read_upload(upload), "error": None})
+    if archive is not None:
+        for name, image_bytes, error in read_archive_images(await read_upload(archive, BATCH_SEARCH_MAX_ARCHIVE_MB)):
+            items.append({"type": "image", "filename": name, "payload": image_bytes, "error": error})
+
+    if not items:
+        raise HTTPException(status_code=400, detail="Provide at least one query, file or archive.")
+    if len(items) > BATCH_SEARCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_SEARCH_MAX_ITEMS} queries per batch.")
+
+    logger.info(f"Batch search: {len(items)} queries, top_k={top_k}, filters={filters}")
+
+    async def stream_results():
+        for start in range(0, len(items), BATCH_SEARCH_CHUNK_SIZE):
+            chunk = items[start:start + BATCH_SEARCH_CHUNK_SIZE]
+
+            images = [item for item in chunk if item["type"] == "image" and not item.get("error")]
+            if images:
+                with stage("decode"):
+                    decoded = await run_in_threadpool(lambda: [open_image(item["payload"]) for item in images])
+                for item, (image, error) in zip(images, decoded):
+                    item["payload"], item["error"] = image, error
+
+            for kind, encode in (("text", get_text_embeddings), ("image", get_image_embeddings)):
+                pending = [item for item in chunk if item["type"] == kind and not item.get("error")]
+                if pending:
+                    embeddings, errors = await encode_batch(encode, [item["payload"] for item in pending])
+                    for item, embedding, error in zip(pending, embeddings, errors):
+                        item["embedding"], item["error"] = embedding, error
+
+            searchable = [item for item in chunk if item.get("embedding") is not None]
+            if searchable:
+                matrix = np.vstack([item["embedding"] for item in searchable])
+                for item, results in zip(searchable, await run_in_threadpool(search_faiss_batch, matrix, top_k, filters)):
+                    item["results"] = results
+
+            for offset, item in enumerate(chunk):
+                line = {"index": start + offset, "type": item["type"]}
+                line["query" if item["type"] == "text" else "filename"] = item.get("query", item.get("filename"))
+                if item.get("error"):
+                    line["error"] = item["error"]
+                else:
+                    line["results"] = [
+                        {
+                            "image": img_path,
+                            "url": media_url(os.path.basename(img_path.replace("\\", "/"))),
+                            "caption": caption,
+                            "similarity": float(similarity),
+                        }
+                        for img_path, caption, similarity in item.get("results", [])
+                    ]
+                yield json.dumps(line) + "\n"
+
+            # Let go of decoded images and embeddings as soon as their lines are sent
+            for item in chunk:
+                item.pop("payload", None)
+                item.pop("embedding", None)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
@@ -0,0 +1,8 @@
+# backend/server/app/session_context.py
+from cache import LRUCache
+from settings import SESSION_CONTEXT_MAX_SESSIONS, SESSION_CONTEXT_TTL_SECONDS
+
+# session_id -> normalized CLIP embedding of the session's last uploaded image.
+# Text-only follow-ups blend it with the new query instead of re-encoding the image;
+# only the 2 KB vector is kept per session, never the decoded picture.
+session_image_context = LRUCache(SESSION_CONTEXT_MAX_SESSIONS, SESSION_CONTEXT_TTL_SECONDS)
@@ -0,0 +1,156 @@
+# backend/server/app/session_store.py
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from cache import LRUCache
+from settings import (
+    SESSION_MEMORY_MAX_MB,
+    SESSION_MEMORY_MAX_SESSIONS,
+    SESSION_MEMORY_MAX_TURNS,
+    SESSION_MEMORY_TTL_SECONDS,
+    SESSION_STORE,
+    SESSION_STORE_DB_PATH,
+)
+
+
+class SessionStore(ABC):
+    """
+    Conversation history per session, as already-rendered turn strings.
+
+    `append()` adds a turn, keeps only the session's last `keep` turns (never more than
+    `max_turns`) and returns them, oldest first, so the prompt context is a plain join.
+    """
+
+    def __init__(self, max_turns=SESSION_MEMORY_MAX_TURNS):
+        self.max_turns = max(1, max_turns)
+
+    @abstractmethod
+    def append(self, session_id, turn, keep):
+        """Adds `turn` and returns the session's last `keep` turns, oldest first."""
+
+    @abstractmethod
+    def clear(self):
+        """Forgets every session."""
+
+    @abstractmethod
+    def stats(self):
+        """Backend name, size and limits."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process store, bounded by session count, total size and idle time (LRU + TTL)."""
+
+    def __init__(
+        self,
+        max_sessions=SESSION_MEMORY_MAX_SESSIONS,
+        ttl_seconds=SESSION_MEMORY_TTL_SECONDS,
+        max_bytes=int(SESSION_MEMORY_MAX_MB * 2**20),
+        max_turns=SESSION_MEMORY_MAX_TURNS,
+    ):
+        super().__init__(max_turns)
+        self._sessions = LRUCache(max_sessions, ttl_seconds, max_bytes)
+
+    def append(self, session_id, turn, keep):
+        turns = self._sessions.get(session_id, ())
+        turns = (*turns, turn)[-min(keep, self.max_turns):]
+        self._sessions.set(session_id, turns)  # Also refreshes the session's TTL
+        return list(turns)
+
+    def clear(self):
+        self._sessions.clear()
+
+    def stats(self):
+        return {"backend": "memory", "max_turns": self.max_turns, **self._sessions.stats()}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Store in a SQLite file, shared by every uvicorn worker on the host.
+
+    Sessions idle for longer than `ttl_seconds` are dropped, and the least recently
+    active ones once there are more than `max_sessions`.
+    """
+
+    def __init__(
+        self,
+        db_path=SESSION_STORE_DB_PATH,
+        max_sessions=SESSION_MEMORY_MAX_SESSIONS,
+        ttl_seconds=SESSION_MEMORY_TTL_SECONDS,
+        max_turns=SESSION_MEMORY_MAX_TURNS,
+    ):
+        super().__init__(max_turns)
+        self.db_path = db_path
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds or None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_turns ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, turn TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS session_turns_session ON session_turns (session_id, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS session_turns_updated ON session_turns (updated_at)")
+
+    def append(self, session_id, turn, keep):
+        keep = min(keep, self.max_turns)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self.ttl_seconds:
+                    self._db.execute("DELETE FROM session_turns WHERE updated_at <= ?", (now - self.ttl_seconds,))
+                self._db.execute(
+                    "INSERT INTO session_turns (session_id, turn, updated_at) VALUES (?, ?, ?)", (session_id, turn, now)
+                )
+                self._db.execute(
+                    "DELETE FROM session_turns WHERE session_id = ? AND id NOT IN "
+                    "(SELECT id FROM session_turns WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                    (session_id, session_id, keep),
+                )
+                # Touch the kept turns so the whole session shares one last-activity time
+                self._db.execute("UPDATE session_turns SET updated_at = ? WHERE session_id = ?", (now, session_id))
+                self._db.execute(
+                    "DELETE FROM session_turns WHERE session_id IN (SELECT session_id FROM session_turns "
+                    "GROUP BY session_id ORDER BY MAX(updated_at) DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,),
+                )
+                rows = self._db.execute(
+                    "SELECT turn FROM session_turns WHERE session_id = ? ORDER BY id", (session_id,)
+                ).fetchall()
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [row[0] for row in rows]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM session_turns")
+
+    def stats(self):
+        with self._lock:
+            sessions, turns = self._db.execute(
+                "SELECT COUNT(DISTINCT session_id), COUNT(*) FROM session_turns"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.db_path,
+            "sessions": sessions,
+            "turns": turns,
+            "max_sessions": self.max_sessions,
+            "max_turns": self.max_turns,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def create_session_store(backend=SESSION_STORE):
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Unknown session store {backend!r}, expected 'memory' or 'sqlite'")
+
+
+session_store = create_session_store()
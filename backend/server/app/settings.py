@@ -1,23 +1,126 @@
 # backend/server/app/settings.py
 from dotenv import load_dotenv
 import os
+import sys
 
 
 load_dotenv()  # Load environment variables from .env file
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/server/app/ → backend/server/
-STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+# Make backend/common (shared with the database generator) importable
+sys.path.append(os.path.dirname(BASE_DIR))
+# Generator builds live in database/versions/<version>/ with database/CURRENT naming the
+# published one; the paths below name the files inside a version (or the database folder
+# itself for indexes built before versioning)
+DATABASE_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "database"))
 FAISS_INDEX_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "flickr8k_faiss_index.faiss"))
 PATHS_FILE_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "flickr8k_faiss_index.paths"))
+METADATA_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "flickr8k_faiss_index.meta"))
+FILTERS_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "flickr8k_faiss_index.filters.npz"))
 CAPTIONS_FILE_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "captions.txt"))
+IMAGES_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "images"))
+THUMBNAIL_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "thumbnails"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# CLIP model and startup warm-up (one dummy forward pass before reporting ready)
+CLIP_MODEL_NAME = os.getenv("CLIP_MODEL_NAME", "ViT-B/32")
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# CLIP encoder backend: "torch", "torch_int8", "onnx" or "onnx_int8" (see common/encoders.py).
+# ONNX models are written by the generator's export_onnx.py. Thread counts of 0 keep the
+# library defaults; on CPU nodes set the intra-op count to the cores available per worker.
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.abspath(os.path.join(BASE_DIR, "..", "database", "onnx")))
+ENCODER_INTRA_OP_THREADS = int(os.getenv("ENCODER_INTRA_OP_THREADS", "0"))
+ENCODER_INTER_OP_THREADS = int(os.getenv("ENCODER_INTER_OP_THREADS", "0"))
+
+# Micro-batching of CLIP inference across concurrent requests
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+
+# /search/batch: queries encoded and searched per chunk, and the most accepted per call
+BATCH_SEARCH_CHUNK_SIZE = int(os.getenv("BATCH_SEARCH_CHUNK_SIZE", "64"))
+BATCH_SEARCH_MAX_ITEMS = int(os.getenv("BATCH_SEARCH_MAX_ITEMS", "10000"))
+BATCH_SEARCH_MAX_ARCHIVE_MB = float(os.getenv("BATCH_SEARCH_MAX_ARCHIVE_MB", "512"))
+
+# Uploaded images: largest file accepted and most pixels decoded (checked from the header,
+# before decoding); uploads are read in UPLOAD_READ_CHUNK_KB chunks and refused once too big
+UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "20"))
+UPLOAD_MAX_PIXELS = int(os.getenv("UPLOAD_MAX_PIXELS", "40000000"))
+UPLOAD_READ_CHUNK_KB = int(os.getenv("UPLOAD_READ_CHUNK_KB", "1024"))
+
+# Query cache: normalized text query -> embedding and -> top-k results (0 disables TTL / memory cap)
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "10000"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+QUERY_CACHE_MAX_MB = float(os.getenv("QUERY_CACHE_MAX_MB", "64"))
+
+# Upload dedup: exact byte hash + perceptual hash -> image embedding
+UPLOAD_CACHE_MAX_ENTRIES = int(os.getenv("UPLOAD_CACHE_MAX_ENTRIES", "2048"))
+
+# Per-session image context for text follow-ups: sessions kept and how long they live
+SESSION_CONTEXT_MAX_SESSIONS = int(os.getenv("SESSION_CONTEXT_MAX_SESSIONS", "10000"))
+SESSION_CONTEXT_TTL_SECONDS = float(os.getenv("SESSION_CONTEXT_TTL_SECONDS", "1800"))
+
+# Conversation memory used in LLM prompts: "memory" (per process) or "sqlite" (shared by workers)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory").lower()
+SESSION_STORE_DB_PATH = os.getenv("SESSION_STORE_DB_PATH", os.path.join(BASE_DIR, "sessions.sqlite3"))
+SESSION_MEMORY_MAX_SESSIONS = int(os.getenv("SESSION_MEMORY_MAX_SESSIONS", "10000"))
+SESSION_MEMORY_TTL_SECONDS = float(os.getenv("SESSION_MEMORY_TTL_SECONDS", "86400"))
+SESSION_MEMORY_MAX_TURNS = int(os.getenv("SESSION_MEMORY_MAX_TURNS", "8"))
+SESSION_MEMORY_MAX_MB = float(os.getenv("SESSION_MEMORY_MAX_MB", "32"))
+
+# Memory-map the FAISS index so uvicorn workers share its pages through the OS page cache
+FAISS_MMAP = os.getenv("FAISS_MMAP", "true").lower() in ("1", "true", "yes")
+
+# Hot reload: poll database/CURRENT every INDEX_WATCH_INTERVAL_SECONDS (0 disables; POST
+# /admin/reload works either way) and release a replaced version once its searches finish
+INDEX_WATCH_INTERVAL_SECONDS = float(os.getenv("INDEX_WATCH_INTERVAL_SECONDS", "10"))
+INDEX_DRAIN_TIMEOUT_SECONDS = float(os.getenv("INDEX_DRAIN_TIMEOUT_SECONDS", "60"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # If set, /admin/* requires an X-Admin-Token header
+
+# Sharded indexes (generator --shards N) are searched one thread per shard, merging the
+# per-shard top-k; set FAISS_SHARDS_THREADED=false to search them one after another
+FAISS_SHARDS_THREADED = os.getenv("FAISS_SHARDS_THREADED", "true").lower() in ("1", "true", "yes")
+
+# Query-time FAISS parameters (only used by IVF / HNSW indexes)
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+# Compressed indexes (SQ / PQ codes) come with their float32 vectors in a side file; the
+# top RERANK_CANDIDATES approximate hits are re-scored exactly from it (0 disables)
+FAISS_VECTORS_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "database", "flickr8k_faiss_index.vectors.npy"))
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+
+# LLM client: "gemini", or "fake" to serve LLM_FAKE_RESPONSE locally (no network or API key needed)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-2.0-flash")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_FAKE_RESPONSE = os.getenv("LLM_FAKE_RESPONSE", '["This is a canned response from the fake LLM."]')
+
+# LLM response cache: answers reused for queries about the same caption whose CLIP text
+# embeddings have a cosine similarity of at least RESPONSE_CACHE_SIMILARITY; set
+# RESPONSE_CACHE_DB_PATH to persist them
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+RESPONSE_CACHE_DB_PATH = os.getenv("RESPONSE_CACHE_DB_PATH", "")
+
+# LLM health monitor: endpoint probed in the background, probe cadence and circuit breaker
+LLM_HEALTH_HOST = os.getenv("LLM_HEALTH_HOST", "generativelanguage.googleapis.com")
+LLM_HEALTH_PORT = int(os.getenv("LLM_HEALTH_PORT", "443"))
+LLM_HEALTH_INTERVAL_SECONDS = float(os.getenv("LLM_HEALTH_INTERVAL_SECONDS", "30"))
+LLM_HEALTH_TIMEOUT_SECONDS = float(os.getenv("LLM_HEALTH_TIMEOUT_SECONDS", "3"))
+LLM_HEALTH_MAX_BACKOFF_SECONDS = float(os.getenv("LLM_HEALTH_MAX_BACKOFF_SECONDS", "300"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "3"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
 # Base API URL (set dynamically or use default)
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
-def ensure_static_folder():
-    """Ensure the static folder exists before use."""
-    if not os.path.exists(STATIC_DIR):
-        os.makedirs(STATIC_DIR)
-        print(f"✅ Created missing static folder at: {STATIC_DIR}")
+# Media: variant returned in result URLs ("small", "medium" or "original") and browser cache lifetime
+MEDIA_DEFAULT_VARIANT = os.getenv("MEDIA_DEFAULT_VARIANT", "medium")
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", "86400"))
@@ -0,0 +1,76 @@
+# backend/server/app/upload_cache.py
+from cache import LRUCache
+from common.image_hash import nearest_duplicate, pack_hashes
+from settings import UPLOAD_CACHE_MAX_ENTRIES
+
+
+class UploadImageCache:
+    """
+    Remembers the CLIP embedding of recently uploaded images.
+
+    Exact re-uploads are found by the SHA-256 of the raw bytes, before the image is even
+    decoded. Re-encoded or resized copies are found by comparing perceptual hashes
+    (pHash + dHash) against every cached entry in one vectorized pass over packed uint64
+    arrays, rebuilt only after the entries change. Each picture has one canonical `key`
+    (the hash of the first upload), shared by all its copies, so per-picture results can
+    be cached elsewhere under it.
+    """
+
+    def __init__(self, max_entries=UPLOAD_CACHE_MAX_ENTRIES):
+        self._entries = LRUCache(max_entries)  # canonical sha -> entry
+        self._aliases = LRUCache(max_entries * 4)  # sha of any copy -> canonical sha
+        self._packed = None  # (keys, phashes, dhashes) of the entries, most recently used first
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def get_exact(self, sha256):
+        key = self._aliases.get(sha256, sha256)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+        return entry
+
+    def _packed_hashes(self):
+        if self._packed is None:
+            items = self._entries.items()[::-1]
+            phashes, dhashes = pack_hashes([entry["hashes"] for _, entry in items])
+            self._packed = ([key for key, _ in items], phashes, dhashes)
+        return self._packed
+
+    def find_near(self, sha256, hashes):
+        keys, phashes, dhashes = self._packed_hashes()
+        match = nearest_duplicate(hashes, phashes, dhashes)
+        entry = self._entries.get(keys[match]) if match is not None else None  # Also refreshes its LRU position
+        if entry is None:
+            self.misses += 1
+            return None
+        self._aliases.set(sha256, entry["key"])
+        self.near_hits += 1
+        return entry
+
+    def store(self, sha256, hashes, embedding):
+        entry = {"key": sha256, "hashes": hashes, "embedding": embedding}
+        self._entries.set(sha256, entry)
+        self._packed = None
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self._aliases.clear()
+        self._packed = None
+
+    def stats(self):
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.exact_hits + self.near_hits,
+            "exact_hits": self.exact_hits,
+            "near_duplicate_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self._entries.evictions,
+        }
+
+
+upload_image_cache = UploadImageCache()
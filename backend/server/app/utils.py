@@ -3,39 +3,53 @@ import torch
 import numpy as np
 from PIL import Image
 import clip
-import faiss
-import os
 import logging
-from models import model, preprocess, index, image_paths
-from settings import CAPTIONS_FILE_PATH
+from models import registry
+from metrics import stage
+from settings import FAISS_SHARDS_THREADED, RERANK_CANDIDATES, UPLOAD_MAX_PIXELS
+from common.filters import filtered_search
+from common.image_io import decode_image, preprocess_size
+from common.rerank import rerank
 
 # Set up logging for debugging and verification
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_captions():
+def decode_upload(image_bytes):
     """
-    Load captions from the captions file into a dictionary with lowercase keys.
+    Validate and decode an uploaded image in one pass, at reduced size for JPEGs.
+    Raises InvalidImageError / ImageTooLargeError (common.image_io).
     Returns:
-        dict: A dictionary mapping filenames to captions.
-    """
-    captions_dict = {}
-    try:
-        with open(CAPTIONS_FILE_PATH, 'r', encoding="utf-8") as f:
-            for line in f:
-                parts = line.strip().split(",", 1)
-                if len(parts) == 2:
-                    key = parts[0].strip().lower()  # Normalize to lowercase
-                    captions_dict[key] = parts[1].strip()
-                    #logger.info(f"Loaded caption for {key}")
-        logger.info(f"Loaded {len(captions_dict)} captions from {CAPTIONS_FILE_PATH}")
-    except FileNotFoundError:
-        logger.error(f"Captions file not found at {CAPTIONS_FILE_PATH}")
-    except Exception as e:
-        logger.error(f"Failed to load captions: {str(e)}")
-    return captions_dict
-
-captions_dict = load_captions()
+        PIL.Image.Image: RGB image, at least as large as the encoder's input.
+    """
+    return decode_image(image_bytes, preprocess_size(registry.encoder.preprocess), UPLOAD_MAX_PIXELS)
+
+def get_image_embeddings(images):
+    """
+    Generate embeddings for a batch of images in a single CLIP forward pass.
+    Args:
+        images (list[PIL.Image.Image]): The input images.
+    Returns:
+        numpy.ndarray: Normalized image embeddings, one row per image.
+    """
+    encoder = registry.encoder
+    with stage("preprocess"):
+        processed_images = torch.stack([encoder.preprocess(image) for image in images])
+    with stage("encode_image"):
+        embeddings = encoder.encode_image(processed_images)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+def get_text_embeddings(texts):
+    """
+    Generate embeddings for a batch of texts in a single CLIP forward pass.
+    Args:
+        texts (list[str]): The input texts.
+    Returns:
+        numpy.ndarray: Normalized text embeddings, one row per text.
+    """
+    with stage("encode_text"):
+        embeddings = registry.encoder.encode_text(clip.tokenize(texts))
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
 
 def get_image_embedding(image: Image.Image):
     """
@@ -45,10 +59,7 @@ def get_image_embedding(image: Image.Image):
     Returns:
         numpy.ndarray: Normalized image embedding.
     """
-    processed_image = preprocess(image).unsqueeze(0).to("cuda" if torch.cuda.is_available() else "cpu")
-    with torch.no_grad():
-        embedding = model.encode_image(processed_image).cpu().numpy()
-    return embedding / np.linalg.norm(embedding)
+    return get_image_embeddings([image])
 
 def get_text_embedding(text: str):
     """
@@ -58,13 +69,26 @@ def get_text_embedding(text: str):
     Returns:
         numpy.ndarray: Normalized text embedding.
     """
-    text_tokenized = clip.tokenize([text]).to("cuda" if torch.cuda.is_available() else "cpu")
-    with torch.no_grad():
-        embedding = model.encode_text(text_tokenized).cpu().numpy()
-    return embedding / np.linalg.norm(embedding)
+    return get_text_embeddings([text])
 
-import numpy as np
-from PIL import Image
+def combine_embeddings(image_embedding, text_embedding, alpha: float = 0.5):
+    """
+    Blend normalized image and text embeddings into a normalized joint embedding.
+
+    Args:
+        image_embedding (numpy.ndarray): Normalized image embedding.
+        text_embedding (numpy.ndarray): Normalized text embedding.
+        alpha (float): Weight for image embedding (0 to 1).
+                       The text embedding weight is (1 - alpha).
+
+    Returns:
+        numpy.ndarray: Normalized weighted joint embedding.
+    """
+    # Weighted combination
+    joint_embedding = alpha * image_embedding + (1 - alpha) * text_embedding
+
+    # Normalize
+    return joint_embedding / np.linalg.norm(joint_embedding)
 
 def get_joint_embedding(image: Image.Image, text: str, alpha: float = 0.5):
     """
@@ -79,41 +103,80 @@ def get_joint_embedding(image: Image.Image, text: str, alpha: float = 0.5):
     Returns:
         numpy.ndarray: Normalized weighted joint embedding.
     """
-    image_embedding = get_image_embedding(image)
-    text_embedding = get_text_embedding(text)
-
-    # Weighted combination
-    joint_embedding = alpha * image_embedding + (1 - alpha) * text_embedding
-
-    # Normalize
-    return joint_embedding / np.linalg.norm(joint_embedding)
+    return combine_embeddings(get_image_embedding(image), get_text_embedding(text), alpha)
 
 
 
-def search_faiss(query_embedding, top_k=1):
+def search_faiss(query_embedding, top_k=1, filters=None):
     # Search the FAISS index for the top_k most similar images and retrieve their captions.
     # Args:
     #     query_embedding (numpy.ndarray): The embedding to search with.
     #     top_k (int): Number of top results to return (default is 1).
+    #     filters (dict): Optional attribute -> accepted values, e.g. {"state": ["Kerala"]}.
     # Returns:
     #     list: A list of tuples containing (image_path, caption, similarity_score).
 
-    similarity_scores, indices = index.search(query_embedding, top_k)
-    results = []
-    
-    for i, idx in enumerate(indices[0]):
-        if idx == -1:
-            continue
-        
-        img_path = image_paths[idx]
-        caption = captions_dict.get(os.path.basename(img_path).lower(), "No caption found")
-
-        similarity_score = similarity_scores[0][i]
-        # similarity_score = 1 / (1 + similarity_score)  # Converts L2 distance to similarity if needed
-
-        logger.info(f"Image: {img_path}, Similarity: {similarity_score*100:.2f}%")
+    results = search_faiss_batch(query_embedding, top_k, filters)[0]
 
-        results.append((img_path, caption, similarity_score))
+    for img_path, caption, similarity_score in results:
+        logger.debug(f"Image: {img_path}, Similarity: {similarity_score*100:.2f}%")
 
     return results
 
+def search_faiss_batch(query_embeddings, top_k=1, filters=None):
+    # Search the FAISS index for many queries with a single multi-row index.search call.
+    # Args:
+    #     query_embeddings (numpy.ndarray): One embedding per row.
+    #     top_k (int): Number of top results to return per query.
+    #     filters (dict): Optional attribute -> accepted values, applied to every query.
+    #         FAISS skips non-matching ids while it scans, so there is no post-filtering.
+    # Returns:
+    #     list: One list of (image_path, caption, similarity_score) tuples per query row.
+
+    queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+    batch_results = []
+
+    # The index, metadata and vectors of one version; a concurrent reload can't swap them mid-search
+    with registry.lease() as version:
+        selection = None
+        if filters:
+            with stage("filter"):
+                selection = version.filters.select(filters)
+        if version.vectors is None:
+            with stage("search"):
+                similarity_scores, indices = filtered_search(version.index, queries, top_k, selection, FAISS_SHARDS_THREADED)
+        else:
+            # Compressed index: over-fetch candidates, then score them exactly
+            with stage("search"):
+                _, candidates = filtered_search(
+                    version.index, queries, max(top_k, RERANK_CANDIDATES), selection, FAISS_SHARDS_THREADED
+                )
+            with stage("rerank"):
+                similarity_scores, indices = rerank(candidates, queries, version.vectors, top_k)
+
+        for row_scores, row_indices in zip(similarity_scores, indices):
+            results = []
+            for similarity_score, idx in zip(row_scores, row_indices):
+                if idx == -1:
+                    continue
+
+                record = version.metadata.get(int(idx))
+                if record is None:
+                    continue
+                img_path = record["path"]
+                caption = record["captions"][0] if record["captions"] else "No caption found"
+                # similarity_score = 1 / (1 + similarity_score)  # Converts L2 distance to similarity if needed
+
+                results.append((img_path, caption, similarity_score))
+            batch_results.append(results)
+
+    return batch_results
+
+def warm_up():
+    """
+    Run one image encode, text encode and FAISS search on dummy inputs so the first
+    real query doesn't pay one-off JIT/allocator costs.
+    """
+    embedding = get_joint_embedding(Image.new("RGB", (224, 224)), "warm up", alpha=0.5)
+    search_faiss(embedding.astype(np.float32), top_k=1)
+    logger.info("Warm-up forward pass completed")
@@ -0,0 +1,16 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# The server and generator import shared code as `common.*` and server modules flat
+# (`from settings import ...`), so make both importable the same way here.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_APP_DIR = os.path.join(BACKEND_DIR, "server", "app")
+for path in (SERVER_APP_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# The generator's modules (`config`, `src.*`) go last, so server modules win any name clash
+GENERATOR_DIR = os.path.join(BACKEND_DIR, "database generator")
+if GENERATOR_DIR not in sys.path:
+    sys.path.append(GENERATOR_DIR)
@@ -0,0 +1,94 @@
+# backend/tests/test_cache.py
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+import cache  # noqa: E402
+from cache import LRUCache, normalize_query  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  Taj   MAHAL\tat night ") == "taj mahal at night"
+
+
+def test_evicts_least_recently_used_first():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert lru.evictions == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    lru = LRUCache(max_entries=10, ttl_seconds=60)
+    lru.set("a", 1)
+
+    clock.now += 59
+    assert lru.get("a") == 1
+    clock.now += 1
+    assert lru.get("a") is None
+    assert lru.expirations == 1
+    assert len(lru) == 0
+
+
+def test_items_skips_expired_entries(clock):
+    lru = LRUCache(max_entries=10, ttl_seconds=10)
+    lru.set("old", 1)
+    clock.now += 5
+    lru.set("new", 2)
+    clock.now += 6
+
+    assert lru.items() == [("new", 2)]
+
+
+def test_memory_cap_evicts_until_under_budget():
+    lru = LRUCache(max_entries=100, max_bytes=cache.estimate_size("x" * 100) * 2)
+    for key in "abc":
+        lru.set(key, key * 100)
+
+    assert lru.get("a") is None
+    assert lru.get("b") is not None and lru.get("c") is not None
+    assert lru.stats()["bytes"] <= lru.max_bytes
+
+
+def test_overwriting_a_key_keeps_the_byte_count_exact():
+    lru = LRUCache(max_entries=10)
+    lru.set("a", "x" * 10)
+    lru.set("a", "y" * 1000)
+
+    assert len(lru) == 1
+    assert lru.stats()["bytes"] == cache.estimate_size("y" * 1000)
+
+
+def test_check_version_clears_only_on_change():
+    lru = LRUCache(max_entries=10)
+    lru.check_version("v1")
+    lru.set("a", 1)
+
+    lru.check_version("v1")
+    assert lru.get("a") == 1
+
+    lru.check_version("v2")
+    assert lru.get("a") is None
+    assert lru.invalidations == 1
@@ -0,0 +1,55 @@
+# backend/tests/test_embedding_cache.py
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")  # The generator's config picks its device with torch
+
+from src.embedding_cache import EmbeddingCache  # noqa: E402
+
+
+def vector(i, dimension=4):
+    return np.full(dimension, i, dtype=np.float32)
+
+
+def new_cache(tmp_path, max_entries=10):
+    return EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model", max_entries=max_entries, decode_version=1)
+
+
+def test_entries_survive_a_flush(tmp_path):
+    cache = new_cache(tmp_path)
+    cache.put("image", "a", vector(1))
+    cache.put("text", "b", vector(2))
+    cache.flush()
+
+    reopened = new_cache(tmp_path)
+    assert np.array_equal(reopened.get("image", "a"), vector(1))
+    assert np.array_equal(reopened.get("text", "b"), vector(2))
+    assert reopened.get("image", "b") is None
+
+
+def test_decode_version_only_keys_images(tmp_path):
+    cache = new_cache(tmp_path)
+    cache.put("image", "a", vector(1))
+    cache.put("text", "a", vector(2))
+    cache.flush()
+
+    older_decode = EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model", max_entries=10, decode_version=0)
+    assert older_decode.get("image", "a") is None
+    assert np.array_equal(older_decode.get("text", "a"), vector(2))
+
+
+def test_evicted_slots_are_not_reused_behind_the_index(tmp_path):
+    cache = new_cache(tmp_path, max_entries=10)
+    for i in range(10):
+        cache.put("image", str(i), vector(i))
+    cache.flush()
+
+    # Fills evicted slots with new vectors, then "crashes" before the next flush
+    for i in range(10, 15):
+        cache.put("image", str(i), vector(i))
+
+    reopened = new_cache(tmp_path, max_entries=10)
+    for i in range(15):
+        found = reopened.get("image", str(i))
+        assert found is None or np.array_equal(found, vector(i))
+    assert cache.evictions == 5
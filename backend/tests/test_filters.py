@@ -0,0 +1,176 @@
+# backend/tests/test_filters.py
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+
+from common.filters import FilterIndex, Selection, filtered_search, write_filter_index  # noqa: E402
+from common.metadata_store import build_record  # noqa: E402
+from common.shards import merge_shards  # noqa: E402
+
+RECORDS = [
+    build_record("images/0.jpg", ["Golden Temple, in Amritsar, Punjab, is the holiest Sikh shrine."]),
+    build_record("images/1.jpg", ["Amber Fort, Rajasthan – A hilltop fort near Jaipur."]),
+    None,  # Removed id
+    build_record("images/3.jpg", ["Eiffel Tower, in Paris, France, is an iron lattice tower."]),
+    build_record("images/4.jpg", ["Jaisalmer Fort, Rajasthan – A living fort of yellow sandstone."]),
+]
+
+
+def test_selection_bitmap_bit_order():
+    # Id i is bit i % 8 of byte i // 8, the layout faiss.IDSelectorBitmap reads
+    selection = Selection(np.array([0, 3, 8, 15], dtype=np.int64))
+
+    assert selection.bitmap.tolist() == [0b00001001, 0b10000001]
+    assert [selection.selector.is_member(i) for i in range(17)] == [i in (0, 3, 8, 15) for i in range(17)]
+
+
+def test_selection_contains():
+    selection = Selection(np.array([0, 3, 8, 15], dtype=np.int64))
+
+    assert selection.contains(np.array([[0, 1, 3], [15, 16, -1]])).tolist() == [[True, False, True], [True, False, False]]
+
+
+def test_empty_selection_has_no_selector():
+    selection = Selection(np.empty(0, dtype=np.int64))
+    assert len(selection) == 0
+    assert selection.selector is None
+
+
+def test_select_ors_values_and_ands_attributes():
+    filters = FilterIndex.from_records(RECORDS)
+
+    assert filters.select({"state": ["Rajasthan"]}).ids.tolist() == [1, 4]
+    assert filters.select({"state": ["rajasthan", "PUNJAB"]}).ids.tolist() == [0, 1, 4]
+    assert filters.select({"state": ["Rajasthan"], "category": ["fort"]}).ids.tolist() == [1, 4]
+    assert filters.select({"country": ["France"], "category": ["fort"]}).ids.tolist() == []
+    assert filters.select({"state": ["Atlantis"]}).ids.tolist() == []
+
+
+def test_select_without_filters_means_no_filtering():
+    filters = FilterIndex.from_records(RECORDS)
+    assert filters.select({}) is None
+    assert filters.select({"state": []}) is None
+
+
+def test_select_rejects_unknown_attributes():
+    with pytest.raises(ValueError):
+        FilterIndex.from_records(RECORDS).select({"colour": ["red"]})
+
+
+def test_selections_are_cached():
+    filters = FilterIndex.from_records(RECORDS)
+    assert filters.select({"state": ["Rajasthan"]}) is filters.select({"state": ["rajasthan"]})
+
+
+def test_written_filters_load_back(tmp_path):
+    path = str(tmp_path / "index.filters.npz")
+    write_filter_index(path, RECORDS)
+    loaded = FilterIndex.load(path)
+
+    assert loaded.values("state") == FilterIndex.from_records(RECORDS).values("state")
+    assert loaded.values("state")[0] == ("Rajasthan", 2)
+    assert loaded.select({"country": ["india"]}).ids.tolist() == [0, 1, 4]
+
+
+def id_mapped(vectors, ids):
+    index = faiss.IndexIDMap(faiss.IndexFlatIP(vectors.shape[1]))
+    index.add_with_ids(vectors, ids)
+    return index
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors, np.arange(len(vectors), dtype=np.int64)
+
+
+def brute_force(vectors, queries, k, allowed):
+    scores = queries @ vectors.T
+    scores[:, ~np.isin(np.arange(len(vectors)), allowed)] = -np.inf
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def test_filtered_search_only_returns_selected_ids(corpus):
+    vectors, ids = corpus
+    allowed = ids[::7]
+    _, found = filtered_search(id_mapped(vectors, ids), vectors[:10], 5, Selection(allowed))
+
+    assert np.array_equal(found, brute_force(vectors, vectors[:10], 5, allowed))
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_filtered_search_over_shards_merges_global_ids(corpus, threaded):
+    vectors, ids = corpus
+    allowed = ids[::7]
+    shards = [id_mapped(vectors[shard::3], ids[shard::3]) for shard in range(3)]
+
+    scores, found = filtered_search(
+        merge_shards(shards, threaded=False), vectors[:10], 5, Selection(allowed), threaded=threaded
+    )
+
+    assert np.array_equal(found, brute_force(vectors, vectors[:10], 5, allowed))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+@pytest.fixture(scope="module")
+def trained_pq():
+    # Training dominates, so it happens once; every index is a filled copy
+    vectors = np.random.default_rng(1).standard_normal((500, 16)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.index_factory(vectors.shape[1], "IDMap,PQ4x4", faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors)
+    return index
+
+
+@pytest.fixture
+def pq_index(trained_pq):
+    def build(vectors, ids):
+        index = faiss.clone_index(trained_pq)
+        index.add_with_ids(vectors, ids)
+        return index
+    return build
+
+
+@pytest.mark.parametrize("step", [2, 7, 97])
+def test_filtered_search_on_pq_keeps_its_ranking(corpus, pq_index, step):
+    # IndexPQ rejects SearchParameters, so it over-fetches and drops non-matching ids
+    vectors, ids = corpus
+    allowed = ids[::step]
+    index = pq_index(vectors, ids)
+
+    scores, found = filtered_search(index, vectors[:10], 5, Selection(allowed))
+
+    all_scores, ranked = index.search(vectors[:10], len(ids))
+    for row in range(10):
+        expected = ranked[row][np.isin(ranked[row], allowed)][:5]
+        assert np.array_equal(found[row], expected)
+        assert np.array_equal(scores[row], all_scores[row][np.isin(ranked[row], allowed)][:5])
+
+
+def test_filtered_search_on_pq_pads_when_fewer_match(corpus, pq_index):
+    vectors, ids = corpus
+    scores, found = filtered_search(pq_index(vectors, ids), vectors[:3], 5, Selection(ids[:3]))
+
+    assert np.array_equal(np.sort(found, axis=1), np.tile([-1, -1, 0, 1, 2], (3, 1)))
+    assert np.isneginf(scores[:, 3:]).all()
+
+
+def test_filtered_search_over_pq_shards(corpus, pq_index):
+    vectors, ids = corpus
+    allowed = ids[::7]
+    shards = [pq_index(vectors[shard::2], ids[shard::2]) for shard in range(2)]
+
+    _, found = filtered_search(merge_shards(shards, threaded=False), vectors[:10], 5, Selection(allowed))
+
+    assert np.isin(found, allowed).all()
+
+
+def test_filtered_search_with_nothing_selected(corpus):
+    vectors, ids = corpus
+    scores, found = filtered_search(id_mapped(vectors, ids), vectors[:2], 3, Selection(np.empty(0, dtype=np.int64)))
+
+    assert (found == -1).all()
+    assert np.isneginf(scores).all()
@@ -0,0 +1,92 @@
+# backend/tests/test_image_hash.py
+import io
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from common.image_hash import (  # noqa: E402
+    dhash,
+    hamming_distance,
+    image_hashes,
+    is_near_duplicate,
+    near_duplicate_pairs,
+    nearest_duplicate,
+    pack_hashes,
+    phash,
+)
+
+
+def synthetic_photo(seed, size=(320, 240)):
+    """A smooth random image, closer to a photo than white noise."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    return Image.fromarray(small).resize(size, Image.BICUBIC)
+
+
+def reencode(image, quality=60, size=None):
+    if size:
+        image = image.resize(size, Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def test_hashes_are_64_bit():
+    image = synthetic_photo(0)
+    assert 0 <= phash(image) < 2**64
+    assert 0 <= dhash(image) < 2**64
+
+
+def test_dhash_of_horizontal_gradient_is_all_ones():
+    # Every pixel is brighter than its left neighbour
+    gradient = Image.fromarray(np.tile(np.arange(0, 256, 4, dtype=np.uint8), (64, 1)))
+    assert dhash(gradient) == 2**64 - 1
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(2**64 - 1, 0) == 64
+
+
+def test_recompressed_and_resized_copy_is_a_near_duplicate():
+    original = synthetic_photo(1)
+    copy = reencode(original, quality=50, size=(160, 120))
+
+    assert is_near_duplicate(image_hashes(original), image_hashes(copy))
+
+
+def test_different_pictures_are_not_near_duplicates():
+    assert not is_near_duplicate(image_hashes(synthetic_photo(1)), image_hashes(synthetic_photo(2)))
+
+
+def test_near_duplicate_pairs_matches_pairwise_check():
+    images = [synthetic_photo(1), reencode(synthetic_photo(1)), synthetic_photo(2), synthetic_photo(3)]
+    hashes = [image_hashes(image) for image in images]
+
+    expected = {
+        (i, j) for i in range(len(hashes)) for j in range(i + 1, len(hashes))
+        if is_near_duplicate(hashes[i], hashes[j])
+    }
+    pairs = near_duplicate_pairs(hashes, chunk_size=2)  # Exercise the chunk boundaries
+
+    assert {(i, j) for i, j, _ in pairs} == expected
+    assert (0, 1) in expected
+    for i, j, distance in pairs:
+        assert distance == hamming_distance(hashes[i][0], hashes[j][0])
+
+
+def test_near_duplicate_pairs_of_nothing():
+    assert near_duplicate_pairs([]) == []
+
+
+def test_nearest_duplicate_picks_the_closest_match():
+    top_bit = 2**63
+    hashes = [(0b1111, 0), (0b0111, 0), (top_bit, 0), (0b0011, 2**64 - 1)]
+    phashes, dhashes = pack_hashes(hashes)
+
+    assert nearest_duplicate((0b0111, 0), phashes, dhashes) == 1
+    assert nearest_duplicate((top_bit | 1, 0), phashes, dhashes) == 2  # 64-bit hashes keep their top bit
+    assert nearest_duplicate((0b0011, 2**64 - 1), phashes, dhashes) == 3  # dHash must agree too
+    assert nearest_duplicate((2**64 - 1, 0), phashes, dhashes) is None
+    assert nearest_duplicate((0, 0), *pack_hashes([])) is None
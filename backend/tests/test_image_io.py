@@ -0,0 +1,57 @@
+# backend/tests/test_image_io.py
+import io
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from common.image_io import ImageTooLargeError, InvalidImageError, decode_image, preprocess_size  # noqa: E402
+
+
+def encoded(size, fmt="JPEG"):
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)).resize(size, Image.BICUBIC)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_jpeg_decodes_at_reduced_size_but_never_below_target():
+    image = decode_image(encoded((2000, 1000)), target_size=224)
+
+    assert image.mode == "RGB"
+    assert image.size == (500, 250)  # 1/4 scale; 1/8 would make the short side 125 px
+    assert min(image.size) >= 224
+
+
+def test_without_target_size_decodes_in_full():
+    assert decode_image(encoded((2000, 1000))).size == (2000, 1000)
+
+
+def test_other_formats_decode_at_full_size():
+    image = decode_image(encoded((1000, 800), "PNG"), target_size=224)
+    assert image.size == (1000, 800)
+    assert image.mode == "RGB"
+
+
+def test_pixel_limit_is_checked_before_decoding():
+    with pytest.raises(ImageTooLargeError):
+        decode_image(encoded((1000, 1000)), target_size=224, max_pixels=999_999)
+
+
+def test_invalid_and_truncated_data_are_rejected():
+    with pytest.raises(InvalidImageError):
+        decode_image(b"not an image")
+    with pytest.raises(InvalidImageError):
+        decode_image(encoded((600, 400))[:200])
+
+
+def test_preprocess_size_reads_the_resize_transform():
+    class Resize:
+        size = 336
+
+    class Compose:
+        transforms = [Resize()]
+
+    assert preprocess_size(Compose()) == 336
+    assert preprocess_size(lambda image: image) == 224
@@ -0,0 +1,57 @@
+# backend/tests/test_index_versions.py
+import os
+from common.index_versions import (
+    CURRENT_FILENAME,
+    current_version,
+    new_version,
+    prune_versions,
+    publish,
+    resolve,
+)
+
+
+def test_unversioned_database_resolves_to_itself(tmp_path):
+    database_dir = str(tmp_path)
+    assert current_version(database_dir) is None
+    assert resolve(os.path.join(database_dir, "index.faiss")) == os.path.join(database_dir, "index.faiss")
+
+
+def test_publish_points_readers_at_the_new_version(tmp_path):
+    database_dir = str(tmp_path)
+    name, directory = new_version(database_dir)
+
+    # Not visible until published
+    assert current_version(database_dir) is None
+
+    publish(database_dir, name)
+    assert current_version(database_dir) == name
+    assert resolve(os.path.join(database_dir, "index.faiss")) == os.path.join(directory, "index.faiss")
+    assert not os.path.exists(os.path.join(database_dir, CURRENT_FILENAME + ".tmp"))
+
+
+def test_resolve_with_an_explicit_version(tmp_path):
+    database_dir = str(tmp_path)
+    path = resolve(os.path.join(database_dir, "index.meta"), "20240101T000000000000Z")
+    assert path == os.path.join(database_dir, "versions", "20240101T000000000000Z", "index.meta")
+
+
+def test_empty_current_file_means_unversioned(tmp_path):
+    (tmp_path / CURRENT_FILENAME).write_text("\n")
+    assert current_version(str(tmp_path)) is None
+
+
+def test_prune_keeps_the_newest_and_the_published_version(tmp_path):
+    database_dir = str(tmp_path)
+    names = ["20240101T000000000000Z", "20240102T000000000000Z", "20240103T000000000000Z", "20240104T000000000000Z"]
+    for name in names:
+        os.makedirs(os.path.join(database_dir, "versions", name))
+    publish(database_dir, names[0])  # E.g. rolled back to the oldest build
+
+    deleted = prune_versions(database_dir, keep=2)
+
+    assert sorted(deleted) == names[1:2]
+    assert sorted(os.listdir(os.path.join(database_dir, "versions"))) == [names[0], names[2], names[3]]
+
+
+def test_prune_without_versions(tmp_path):
+    assert prune_versions(str(tmp_path), keep=1) == []
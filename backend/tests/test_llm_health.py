@@ -0,0 +1,99 @@
+# backend/tests/test_llm_health.py
+import asyncio
+import pytest
+
+pytest.importorskip("dotenv")
+
+import llm_health  # noqa: E402
+from llm_health import LLMHealthMonitor  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_health.time, "monotonic", fake)
+    return fake
+
+
+def monitor(**kwargs):
+    return LLMHealthMonitor(**{"failure_threshold": 3, "reset_seconds": 30, "provider": "gemini", **kwargs})
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = monitor()
+    breaker.record_failure(TimeoutError("slow"))
+    breaker.record_failure(TimeoutError("slow"))
+    assert breaker.state == LLMHealthMonitor.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure(TimeoutError("slow"))
+    assert breaker.state == LLMHealthMonitor.OPEN
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = monitor()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == LLMHealthMonitor.CLOSED
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = monitor(failure_threshold=1)
+    breaker.record_failure()
+
+    clock.now += 29
+    assert not breaker.allow_request()
+
+    clock.now += 1
+    assert breaker.allow_request()
+    assert breaker.state == LLMHealthMonitor.HALF_OPEN
+    assert not breaker.allow_request()  # Only one trial at a time
+
+
+def test_successful_trial_closes_the_circuit(clock):
+    breaker = monitor(failure_threshold=1)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == LLMHealthMonitor.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_the_circuit(clock):
+    breaker = monitor(failure_threshold=5)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.record_failure()  # One failure is enough while half open
+    assert breaker.state == LLMHealthMonitor.OPEN
+    assert not breaker.allow_request()
+
+
+def test_fake_provider_is_never_probed():
+    breaker = monitor(provider="fake")
+
+    async def run():
+        await breaker.start()
+        await breaker.stop()
+
+    asyncio.run(run())
+    assert breaker.probes == 0
+    assert breaker.reachable is True
+    assert breaker.allow_request()
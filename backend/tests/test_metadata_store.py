@@ -0,0 +1,52 @@
+# backend/tests/test_metadata_store.py
+import pytest
+from common.metadata_store import MetadataStore, build_record, caption_attributes, landmark_name, write_metadata_store
+
+
+def test_landmark_name_is_the_first_clause():
+    assert landmark_name("Ajanta Caves, in Maharashtra, are rock-cut Buddhist caves.") == "Ajanta Caves"
+    assert landmark_name("Hogenakkal Falls – A waterfall in Tamil Nadu.") == "Hogenakkal Falls"
+    assert landmark_name("Big Ben (Elizabeth Tower), London") == "Big Ben"
+    assert landmark_name("") == ""
+
+
+def test_caption_attributes():
+    assert caption_attributes(["Mysore Palace, built in 1912 in Karnataka, is a royal residence."]) == {
+        "landmark": "Mysore Palace", "state": "Karnataka", "country": "India", "category": "palace",
+    }
+    # The landmark name wins over other keywords in the caption
+    assert caption_attributes(["Humayun's Tomb, in Delhi, has a Persian-style garden and a mosque."])["category"] == "tomb"
+    assert caption_attributes(["Eiffel Tower, in Paris, France, is an iron lattice tower."])["country"] == "France"
+    assert caption_attributes([])["landmark"] == ""
+
+
+def test_store_round_trip_with_removed_ids(tmp_path):
+    records = [build_record("images\\0.jpg", ["Golden Temple, Amritsar"], 640, 480), None, build_record("images/2.jpg", [])]
+    path = str(tmp_path / "index.meta")
+    write_metadata_store(path, records)
+
+    store = MetadataStore.open(path)
+    assert len(store) == 3
+    assert store.get(0)["filename"] == "0.jpg"  # Windows separators are normalized
+    assert store.get(0)["width"] == 640
+    assert store.get(1) is None
+    assert store.get(2)["captions"] == []
+    assert store.get(3) is None and store.get(-1) is None
+
+
+def test_empty_store():
+    assert len(MetadataStore.from_records([])) == 0
+
+
+def test_truncated_store_is_rejected(tmp_path):
+    path = tmp_path / "index.meta"
+    write_metadata_store(str(path), [build_record("images/0.jpg", ["Amber Fort, Rajasthan"])])
+    path.write_bytes(path.read_bytes()[:-5])
+
+    with pytest.raises(ValueError):
+        MetadataStore.open(str(path))
+
+
+def test_bad_magic_is_rejected():
+    with pytest.raises(ValueError):
+        MetadataStore(b"NOTMETA!" + bytes(16))
@@ -0,0 +1,78 @@
+# backend/tests/test_response_cache.py
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+import response_cache  # noqa: E402
+from response_cache import SemanticResponseCache  # noqa: E402
+
+CONTEXT = "Taj Mahal, in Agra, is a white marble mausoleum."
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_exact_hit_ignores_case_and_whitespace():
+    cache = SemanticResponseCache(max_entries=10)
+    cache.set(CONTEXT, "When was it  built?", None, '["1653"]')
+
+    assert cache.get(CONTEXT, "when was it built?") == '["1653"]'
+    assert cache.hits == 1 and cache.semantic_hits == 0
+
+
+def test_answers_are_scoped_to_their_context():
+    cache = SemanticResponseCache(max_entries=10)
+    cache.set(CONTEXT, "When was it built?", None, '["1653"]')
+
+    assert cache.get("Amber Fort, Rajasthan", "When was it built?") is None
+    assert cache.get(None, "When was it built?") is None
+
+
+def test_semantic_hit_above_threshold_only():
+    cache = SemanticResponseCache(max_entries=10, threshold=0.95)
+    cache.set(CONTEXT, "When was it built?", unit([1, 0, 0]), '["1653"]')
+
+    assert cache.get(CONTEXT, "What year was it constructed?", unit([1, 0.1, 0])) == '["1653"]'
+    assert cache.semantic_hits == 1
+    assert cache.get(CONTEXT, "How do I get there?", unit([0, 1, 0])) is None
+
+
+def test_evicts_least_recently_used():
+    cache = SemanticResponseCache(max_entries=2)
+    cache.set(CONTEXT, "a", None, "A")
+    cache.set(CONTEXT, "b", None, "B")
+    cache.get(CONTEXT, "a")
+    cache.set(CONTEXT, "c", None, "C")
+
+    assert cache.get(CONTEXT, "b") is None
+    assert cache.get(CONTEXT, "a") == "A"
+    assert cache.evictions == 1
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = SemanticResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set(CONTEXT, "q", None, "answer")
+
+    now[0] += 61
+    assert cache.get(CONTEXT, "q") is None
+    assert len(cache) == 0
+
+
+def test_answers_survive_a_restart_with_sqlite(tmp_path):
+    db_path = str(tmp_path / "responses.sqlite3")
+    first = SemanticResponseCache(max_entries=10, db_path=db_path)
+    first.set(CONTEXT, "When was it built?", unit([1, 0, 0]), '["1653"]')
+    first.set(None, "Hello", None, '["Hi"]')
+
+    second = SemanticResponseCache(max_entries=10, db_path=db_path)
+    assert second.get(CONTEXT, "WHEN was it built?") == '["1653"]'
+    assert second.get(CONTEXT, "Construction year?", unit([1, 0.05, 0])) == '["1653"]'
+    assert second.get(None, "hello") == '["Hi"]'
+
+    second.clear()
+    assert len(SemanticResponseCache(max_entries=10, db_path=db_path)) == 0
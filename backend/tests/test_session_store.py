@@ -0,0 +1,37 @@
+# backend/tests/test_session_store.py
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from session_store import InMemorySessionStore, SessionStore, SQLiteSessionStore  # noqa: E402
+
+
+def test_base_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemorySessionStore(max_sessions=2, max_turns=3)
+    return SQLiteSessionStore(db_path=str(tmp_path / "sessions.db"), max_sessions=2, max_turns=3)
+
+
+def test_append_keeps_the_last_turns(store):
+    assert store.append("a", "one", keep=8) == ["one"]
+    store.append("a", "two", keep=8)
+    assert store.append("a", "three", keep=8) == ["one", "two", "three"]
+    assert store.append("a", "four", keep=8) == ["two", "three", "four"]  # Never more than max_turns
+    assert store.append("a", "five", keep=1) == ["five"]
+
+
+def test_sessions_are_separate_and_bounded(store):
+    store.append("a", "a1", keep=3)
+    store.append("b", "b1", keep=3)
+    store.append("c", "c1", keep=3)  # Drops "a", the least recently active
+
+    assert store.append("a", "a2", keep=3) == ["a2"]
+    store.clear()
+    assert store.append("b", "b2", keep=3) == ["b2"]
@@ -0,0 +1,47 @@
+# backend/tests/test_shards.py
+import os
+import pytest
+from common.shards import assign_shard, read_shard_list, shard_list_path, shard_path, write_shard_list
+
+
+def test_shard_file_names():
+    assert shard_path("/db/index.faiss", 1, 4) == "/db/index.shard-1-of-4.faiss"
+    assert shard_list_path("/db/index.faiss") == "/db/index.shards.json"
+
+
+def test_assign_shard_is_stable_and_in_range():
+    keys = [f"{i}.jpg" for i in range(200)]
+    assignments = [assign_shard(key, 4) for key in keys]
+
+    assert assignments == [assign_shard(key, 4) for key in keys]
+    assert set(assignments) == {0, 1, 2, 3}
+
+
+def test_shard_list_round_trip(tmp_path):
+    index_path = str(tmp_path / "index.faiss")
+    assert read_shard_list(index_path) is None
+
+    files = [shard_path(index_path, i, 2) for i in range(2)]
+    write_shard_list(index_path, files, "landmark")
+
+    assert read_shard_list(index_path) == files
+    assert not os.path.exists(shard_list_path(index_path) + ".tmp")
+
+
+def test_merged_shards_keep_global_ids():
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    from common.shards import merge_shards
+
+    vectors = np.eye(6, dtype=np.float32)
+    shards = []
+    for shard_ids in ([0, 2, 4], [1, 3, 5]):
+        shard = faiss.IndexIDMap(faiss.IndexFlatIP(6))
+        shard.add_with_ids(vectors[shard_ids], np.array(shard_ids, dtype=np.int64) + 100)
+        shards.append(shard)
+    merged = merge_shards(shards, threaded=False)
+
+    _, ids = merged.search(vectors, 1)
+    # No per-shard offsets: each row comes back with the id it was added with
+    assert ids[:, 0].tolist() == [100, 101, 102, 103, 104, 105]
+    assert merged.ntotal == 6
@@ -0,0 +1,34 @@
+# backend/tests/test_upload_cache.py
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("dotenv")
+
+from upload_cache import UploadImageCache  # noqa: E402
+
+
+def test_exact_and_near_duplicate_uploads_share_one_entry():
+    uploads = UploadImageCache(max_entries=4)
+    uploads.store("a", (0b1111, 0b1111), "embedding a")
+
+    assert uploads.get_exact("a")["embedding"] == "embedding a"
+    assert uploads.find_near("b", (0b0111, 0b1111))["key"] == "a"
+    assert uploads.get_exact("b")["key"] == "a"  # The copy is now an exact alias
+    assert uploads.find_near("c", (2**64 - 1, 0)) is None
+    assert (uploads.exact_hits, uploads.near_hits, uploads.misses) == (2, 1, 1)
+
+
+def test_near_duplicates_see_stored_and_evicted_entries():
+    uploads = UploadImageCache(max_entries=2)
+    assert uploads.find_near("x", (1, 1)) is None
+
+    uploads.store("a", (1, 1), "embedding a")
+    assert uploads.find_near("x", (1, 1))["key"] == "a"
+
+    uploads.store("b", (2**64 - 1, 2**64 - 1), "embedding b")
+    uploads.store("c", (2**64 - 2**32, 2**64 - 2**32), "embedding c")  # Evicts "a"
+    assert uploads.find_near("y", (1, 1)) is None
+    assert uploads.find_near("z", (2**64 - 1, 2**64 - 1))["key"] == "b"
+
+    uploads.clear()
+    assert uploads.find_near("z", (2**64 - 1, 2**64 - 1)) is None
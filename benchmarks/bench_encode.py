@@ -0,0 +1,80 @@
+"""
+CLIP encode latency and throughput through the server's own embedding functions,
+on the bundled images and captions, for any encoder backend and thread count.
+
+    python benchmarks/bench_encode.py --backend onnx_int8 --threads 4 --batch-sizes 1 8 16 32
+"""
+import argparse
+import time
+from harness import bundled_captions, bundled_images, latency_summary, print_table, time_calls, use_server, write_results
+
+use_server()
+from models import device, registry  # noqa: E402
+from settings import CLIP_MODEL_NAME, ENCODER_BACKEND, ONNX_MODEL_DIR  # noqa: E402
+from utils import decode_upload, get_image_embeddings, get_text_embeddings  # noqa: E402
+from common.encoders import ENCODER_BACKENDS, load_encoder  # noqa: E402
+from common.image_io import decode_image  # noqa: E402
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def throughput(encode, items, batch_size):
+    """Items per second when `encode` is given `batch_size` items at a time."""
+    encode(items[:batch_size])  # Warm-up at this shape
+    start_time = time.perf_counter()
+    for start in range(0, len(items), batch_size):
+        encode(items[start:start + batch_size])
+    return len(items) / (time.perf_counter() - start_time)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CLIP image/text encode latency and throughput.")
+    parser.add_argument("--images", type=int, default=64, help="Bundled images to encode (default: 64)")
+    parser.add_argument("--texts", type=int, default=128, help="Bundled captions to encode (default: 128)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16, 32])
+    parser.add_argument("--backend", choices=ENCODER_BACKENDS, default=ENCODER_BACKEND, help=f"Encoder backend (default: {ENCODER_BACKEND})")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (default: library default)")
+    parser.add_argument("--interop-threads", type=int, default=0, help="Inter-op threads (default: library default)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/encode-<commit>-<time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start_time = time.perf_counter()
+    registry.encoder = load_encoder(args.backend, CLIP_MODEL_NAME, device, ONNX_MODEL_DIR, args.threads, args.interop_threads)
+    print(f"✅ Loaded {CLIP_MODEL_NAME} ({args.backend}) on {registry.encoder.device} in {time.perf_counter() - start_time:.1f}s")
+
+    paths = bundled_images(args.images)
+    texts = bundled_captions(args.texts)
+    uploads = [read_bytes(path) for path in paths]
+    images = [decode_upload(data) for data in uploads]
+
+    results = [
+        # Full-resolution decode vs. the server's reduced-size JPEG decode
+        {"name": "decode/full", "latency": latency_summary(time_calls(decode_image, uploads))},
+        {"name": "decode", "latency": latency_summary(time_calls(decode_upload, uploads))},
+        {"name": "encode_image/single", "latency": latency_summary(time_calls(lambda image: get_image_embeddings([image]), images))},
+        {"name": "encode_text/single", "latency": latency_summary(time_calls(lambda text: get_text_embeddings([text]), texts))},
+    ]
+    for batch_size in args.batch_sizes:
+        results.append({
+            "name": f"encode_image/batch-{batch_size}",
+            "batch_size": batch_size,
+            "items_per_sec": throughput(get_image_embeddings, images, batch_size),
+        })
+        results.append({
+            "name": f"encode_text/batch-{batch_size}",
+            "batch_size": batch_size,
+            "items_per_sec": throughput(get_text_embeddings, texts, batch_size),
+        })
+
+    print_table(results, ["latency.p50_ms", "latency.p95_ms", "latency.p99_ms", "items_per_sec"])
+    write_results("encode", {**vars(args), "model": CLIP_MODEL_NAME, "device": registry.encoder.device}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+End-to-end /upload/ latency and throughput under concurrent load, with the LLM
+replaced by the server's fake provider so no network access or API key is needed.
+
+Starts its own server (LLM_PROVIDER=fake) unless --url points at a running one:
+
+    python benchmarks/bench_http.py --concurrency 1 8 32 --requests 200
+
+Inputs are cycled from the bundled images and captions, each request with its own
+session id. Repeated inputs hit the server's caches, so keep --requests at or below
+the catalog size (394 images) for mostly cold measurements.
+"""
+import argparse
+import http.client
+import json
+import mimetypes
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from harness import SERVER_APP_DIR, bundled_captions, bundled_images, latency_summary, print_table, write_results
+
+SCENARIOS = ("text", "image", "image_text")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, startup_timeout):
+    env = {**os.environ, "LLM_PROVIDER": "fake", "WARMUP_ON_STARTUP": "true"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVER_APP_DIR,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Server exited with code {process.returncode} during startup.")
+        try:
+            status, _ = request(url, "GET", "/ready/")
+            if status == 200:
+                return process, url
+        except OSError:
+            pass
+        time.sleep(1)
+    process.terminate()
+    raise SystemExit(f"❌ Server not ready after {startup_timeout}s.")
+
+
+_connections = threading.local()
+
+
+def request(url, method, path, body=None, headers=None):
+    """Sends one request on this thread's keep-alive connection. Returns (status, body bytes)."""
+    parsed = urllib.parse.urlsplit(url)
+    connection = getattr(_connections, "connection", None)
+    if connection is None or getattr(_connections, "url", None) != url:
+        connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=120)
+        _connections.connection, _connections.url = connection, url
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.read()
+    except (OSError, http.client.HTTPException):
+        connection.close()
+        _connections.connection = None
+        raise
+
+
+def multipart(fields, file_path=None):
+    """Encodes form fields (and optionally one file as "file") as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    if file_path:
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        with open(file_path, "rb") as f:
+            data = f.read()
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{os.path.basename(file_path)}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode() + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def make_inputs(scenario, count):
+    images = bundled_images()
+    # Short questions built from the captions, e.g. "Ajanta Caves, in Maharashtra, India"
+    queries = [" ".join(caption.split()[:6]) for caption in bundled_captions()]
+    inputs = []
+    for i in range(count):
+        fields = {"session_id": f"bench-{uuid.uuid4().hex[:12]}"}
+        file_path = None
+        if scenario in ("text", "image_text"):
+            fields["query"] = queries[i % len(queries)]
+        if scenario in ("image", "image_text"):
+            file_path = images[i % len(images)]
+        inputs.append(multipart(fields, file_path))
+    return inputs
+
+
+def run_load(url, inputs, concurrency):
+    durations = []
+    errors = {}
+    lock = threading.Lock()
+
+    def send(item):
+        body, headers = item
+        start_time = time.perf_counter()
+        try:
+            status, _ = request(url, "POST", "/upload/", body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start_time
+        with lock:
+            if status == 200:
+                durations.append(elapsed)
+            else:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, inputs))
+    wall_seconds = time.perf_counter() - start_time
+
+    return {
+        "latency": latency_summary(durations),
+        "requests_per_sec": len(durations) / wall_seconds,
+        "errors": errors,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end /upload/ load test with a fake LLM.")
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one (start it with LLM_PROVIDER=fake)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency (default: 200)")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per scenario (default: 5)")
+    parser.add_argument("--startup-timeout", type=int, default=300, help="Seconds to wait for /ready/ (default: 300)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/http-<commit>-<time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    process = None
+    url = args.url
+    if url is None:
+        print("🔄 Starting server with LLM_PROVIDER=fake...")
+        process, url = start_server(free_port(), args.startup_timeout)
+
+    try:
+        results = []
+        for scenario in args.scenarios:
+            run_load(url, make_inputs(scenario, args.warmup), 1)
+            for concurrency in args.concurrency:
+                result = run_load(url, make_inputs(scenario, args.requests), concurrency)
+                results.append({"name": f"upload/{scenario}/c{concurrency}", "concurrency": concurrency, **result})
+                print(f"📏 {results[-1]['name']}: {result['requests_per_sec']:.1f} req/s, errors {result['errors'] or 0}")
+
+        status, body = request(url, "GET", "/stats/cache")
+        cache_stats = json.loads(body) if status == 200 else None
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print_table(results, ["latency.p50_ms", "latency.p95_ms", "latency.p99_ms", "requests_per_sec"])
+    write_results("http", {**vars(args), "cache_stats": cache_stats}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
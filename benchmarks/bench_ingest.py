@@ -0,0 +1,69 @@
+"""
+Database generator ingest throughput: batched joint embedding of the bundled catalog
+and index build time per index type. Nothing is written to backend/database.
+
+    python benchmarks/bench_ingest.py --batch-sizes 16 32 64 --workers 4
+"""
+import argparse
+import time
+from harness import bundled_images, print_table, use_generator, write_results
+
+use_generator()
+import numpy as np  # noqa: E402
+from src.captions_loader import load_captions  # noqa: E402
+from src.embeddings import get_model  # noqa: E402
+from src.faiss_index import embed_images  # noqa: E402
+from src.index_factory import INDEX_TYPES, build_index  # noqa: E402
+from config import NUM_WORKERS  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Embedding and index build throughput of the database generator.")
+    parser.add_argument("--images", type=int, help="Only embed the first N bundled images (default: all)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32])
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help=f"DataLoader workers (default: {NUM_WORKERS})")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/ingest-<commit>-<time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # The embedding cache is deliberately not used: every run measures real CLIP work
+    image_paths = [path for path in bundled_images(args.images) if path.lower().endswith((".jpg", ".jpeg"))]
+    captions_dict = load_captions()
+    get_model()
+
+    results = []
+    embeddings = None
+    for batch_size in args.batch_sizes:
+        start_time = time.perf_counter()
+        embeddings, kept_paths = embed_images(image_paths, captions_dict, batch_size=batch_size, num_workers=args.workers)
+        elapsed = time.perf_counter() - start_time
+        results.append({
+            "name": f"embed/batch-{batch_size}",
+            "batch_size": batch_size,
+            "images": len(kept_paths),
+            "seconds": elapsed,
+            "images_per_sec": len(kept_paths) / elapsed,
+        })
+
+    ids = np.arange(len(embeddings), dtype=np.int64)
+    for index_type in args.types:
+        start_time = time.perf_counter()
+        build_index(index_type, embeddings, ids)
+        elapsed = time.perf_counter() - start_time
+        results.append({
+            "name": f"build/{index_type}",
+            "index_type": index_type,
+            "vectors": len(embeddings),
+            "build_seconds": elapsed,
+            "vectors_per_sec": len(embeddings) / elapsed,
+        })
+
+    print_table(results, ["images_per_sec", "build_seconds", "vectors_per_sec"])
+    write_results("ingest", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+FAISS search latency, throughput and recall on synthetic corpora of 100k-1M vectors
+and on the bundled catalog index.
+
+    python benchmarks/bench_search.py --sizes 100000 1000000 --types flat ivf_flat hnsw
+"""
+import argparse
+import os
+import time
+import numpy as np
+from harness import DATABASE_DIR, latency_summary, print_table, time_calls, use_generator, write_results
+
+use_generator()
+import faiss  # noqa: E402
+from benchmark_index import make_queries, make_synthetic_vectors, recall_at_k  # noqa: E402
+from src.index_factory import COMPRESSED_INDEX_TYPES, INDEX_TYPES, build_index, set_search_parameters  # noqa: E402
+from common.filters import Selection, filtered_search  # noqa: E402
+from common.rerank import rerank  # noqa: E402
+from common.index_versions import resolve  # noqa: E402
+from common.shards import merge_shards  # noqa: E402
+
+CATALOG_INDEX_PATH = resolve(os.path.join(DATABASE_DIR, "flickr8k_faiss_index.faiss"))
+
+
+class Reranked:
+    """Over-fetches candidates from a compressed index and re-scores them exactly, as the server does."""
+
+    def __init__(self, index, vectors, candidates):
+        self.index = index
+        self.vectors = vectors
+        self.candidates = candidates
+
+    def search(self, queries, k):
+        _, ids = self.index.search(queries, max(k, self.candidates))
+        return rerank(ids, queries, self.vectors, k)
+
+
+class Filtered:
+    """Searches only a random subset of the ids, through the same IDSelector path as the server's filters."""
+
+    def __init__(self, index, selection):
+        self.index = index
+        self.selection = selection
+
+    def search(self, queries, k):
+        return filtered_search(self.index, queries, k, self.selection)
+
+
+def measure(index, queries, k, batch_size, true_ids=None):
+    """
+    Single-query latency percentiles, batched throughput and recall against `true_ids`.
+
+    Returns:
+        dict: The measurements.
+        np.ndarray: Ids returned for each query.
+    """
+    found_ids = np.empty((len(queries), k), dtype=np.int64)
+
+    def search_one(i):
+        _, found_ids[i:i + 1] = index.search(queries[i:i + 1], k)
+
+    durations = time_calls(search_one, list(range(len(queries))))
+
+    start_time = time.perf_counter()
+    for start in range(0, len(queries), batch_size):
+        index.search(queries[start:start + batch_size], k)
+    batch_seconds = time.perf_counter() - start_time
+
+    result = {
+        "latency": latency_summary(durations),
+        "single_queries_per_sec": len(queries) / sum(durations),
+        "batched_queries_per_sec": len(queries) / batch_seconds,
+    }
+    if true_ids is not None:
+        result["recall"] = recall_at_k(found_ids, true_ids)
+    return result, found_ids
+
+
+def bench_corpus(label, vectors, args):
+    queries = make_queries(vectors, args.queries, seed=args.seed + 1)
+    ids = np.arange(len(vectors), dtype=np.int64)
+    k = min(args.k, len(vectors))
+    results = []
+    true_ids = None
+    rng = np.random.default_rng(args.seed + 2)
+    selections = {
+        fraction: Selection(np.sort(rng.choice(ids, max(1, int(len(ids) * fraction)), replace=False)))
+        for fraction in args.filter_selectivity
+    }
+    filtered_true_ids = {}
+
+    # Flat first: its results are the exact ground truth for recall
+    for index_type in ["flat"] + [t for t in args.types if t != "flat"]:
+        start_time = time.perf_counter()
+        index = build_index(index_type, vectors, ids)
+        build_seconds = time.perf_counter() - start_time
+        set_search_parameters(index, nprobe=args.nprobe, ef_search=args.ef_search)
+
+        result, found_ids = measure(index, queries, k, args.batch_size, true_ids)
+        if index_type == "flat":
+            true_ids = found_ids
+            # Exact ground truth for a filter is the filtered flat search
+            for fraction, selection in selections.items():
+                _, filtered_true_ids[fraction] = Filtered(index, selection).search(queries, k)
+            if "flat" not in args.types:
+                continue
+            result["recall"] = 1.0
+
+        results.append({
+            "name": f"search/{label}/{index_type}",
+            "index_type": index_type,
+            "num_vectors": len(vectors),
+            "build_seconds": build_seconds,
+            "index_bytes": len(faiss.serialize_index(index)),
+            **result,
+        })
+        print(f"📏 {results[-1]['name']}: p50 {result['latency']['p50_ms']:.3f} ms, recall {result['recall']:.3f}")
+
+        for fraction, selection in selections.items():
+            result, _ = measure(Filtered(index, selection), queries, k, args.batch_size, filtered_true_ids[fraction])
+            results.append({
+                "name": f"search/{label}/{index_type}/filter-{fraction:g}",
+                "index_type": index_type,
+                "num_vectors": len(vectors),
+                "filter_selectivity": fraction,
+                **result,
+            })
+            print(f"📏 {results[-1]['name']}: p50 {result['latency']['p50_ms']:.3f} ms, recall {result['recall']:.3f}")
+
+        if args.shards > 1:
+            # Same corpus split round-robin into shards, searched one thread per shard
+            shards = [build_index(index_type, vectors[shard::args.shards], ids[shard::args.shards]) for shard in range(args.shards)]
+            for shard in shards:
+                set_search_parameters(shard, nprobe=args.nprobe, ef_search=args.ef_search)
+            result, _ = measure(merge_shards(shards), queries, k, args.batch_size, true_ids)
+            results.append({
+                "name": f"search/{label}/{index_type}/shards-{args.shards}",
+                "index_type": index_type,
+                "num_vectors": len(vectors),
+                "shards": args.shards,
+                **result,
+            })
+            print(f"📏 {results[-1]['name']}: p50 {result['latency']['p50_ms']:.3f} ms, recall {result['recall']:.3f}")
+
+        if index_type in COMPRESSED_INDEX_TYPES and args.rerank_candidates:
+            result, _ = measure(Reranked(index, vectors, args.rerank_candidates), queries, k, args.batch_size, true_ids)
+            results.append({
+                "name": f"search/{label}/{index_type}+rerank",
+                "index_type": index_type,
+                "num_vectors": len(vectors),
+                "rerank_candidates": args.rerank_candidates,
+                **result,
+            })
+            print(f"📏 {results[-1]['name']}: p50 {result['latency']['p50_ms']:.3f} ms, recall {result['recall']:.3f}")
+    return results
+
+
+def bench_catalog(args):
+    index = faiss.read_index(CATALOG_INDEX_PATH)
+    set_search_parameters(index, nprobe=args.nprobe, ef_search=args.ef_search)
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if not isinstance(inner, faiss.IndexFlat):
+        print("⚠️ Catalog index is not flat, benchmarking it without recall.")
+        vectors = np.random.default_rng(args.seed).standard_normal((args.queries, index.d)).astype(np.float32)
+        queries = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    else:
+        queries = make_queries(inner.reconstruct_n(0, inner.ntotal), args.queries, seed=args.seed + 1)
+
+    result, _ = measure(index, queries, min(args.k, index.ntotal), args.batch_size)
+    return [{"name": "search/catalog", "num_vectors": index.ntotal, **result}]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="FAISS search latency, throughput and recall.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100_000], help="Synthetic corpus sizes (default: 100000)")
+    parser.add_argument("--dimension", type=int, default=512, help="Synthetic vector dimension (default: 512)")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--queries", type=int, default=1000, help="Queries per case (default: 1000)")
+    parser.add_argument("-k", type=int, default=5, help="Neighbours per query, as /upload/ uses (default: 5)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Rows per search call for throughput (default: 64)")
+    parser.add_argument("--nprobe", type=int, default=16, help="IVF lists visited, like FAISS_NPROBE (default: 16)")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW efSearch, like FAISS_EF_SEARCH (default: 64)")
+    parser.add_argument("--rerank-candidates", type=int, default=50, help="Candidates re-ranked for compressed types, like RERANK_CANDIDATES; 0 skips (default: 50)")
+    parser.add_argument("--filter-selectivity", type=float, nargs="*", default=[], help="Also search with filters matching these fractions of the ids, e.g. 0.01 0.1 (default: off)")
+    parser.add_argument("--shards", type=int, default=0, help="Also search each index split into N shards in parallel (default: off)")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads (default: 1)")
+    parser.add_argument("--no-catalog", action="store_true", help="Skip the bundled catalog index")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/search-<commit>-<time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    faiss.omp_set_num_threads(args.threads)
+
+    results = []
+    if not args.no_catalog and os.path.exists(CATALOG_INDEX_PATH):
+        results += bench_catalog(args)
+
+    for size in args.sizes:
+        print(f"🔄 Generating {size} synthetic {args.dimension}-d vectors...")
+        vectors = make_synthetic_vectors(size, args.dimension, seed=args.seed)
+        results += bench_corpus(f"synthetic-{size}", vectors, args)
+        del vectors
+
+    print_table(results, ["latency.p50_ms", "latency.p95_ms", "latency.p99_ms", "batched_queries_per_sec", "recall"])
+    write_results("search", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
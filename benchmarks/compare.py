@@ -0,0 +1,91 @@
+"""
+Compares two benchmark result files and flags regressions.
+
+    python benchmarks/compare.py baseline.json candidate.json --threshold 0.10
+
+Cases are matched by name. Latencies and durations (*_ms, *_seconds) regress when
+they grow, throughputs (*_per_sec) and recall when they shrink, by more than the
+threshold. Exits with status 1 if anything regressed.
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(result, prefix=""):
+    """Numeric fields of a result as {"latency.p50_ms": value, ...}."""
+    values = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f"{prefix}{key}"] = float(value)
+    return values
+
+
+def direction(metric):
+    """+1 if higher is better, -1 if lower is better, 0 if the metric is not compared."""
+    name = metric.rsplit(".", 1)[-1]
+    if name.endswith("_per_sec") or name == "recall":
+        return 1
+    if name.endswith(("_ms", "_seconds")) and name != "max_ms":
+        return -1
+    return 0
+
+
+def compare(baseline, candidate, threshold):
+    baseline_results = {result["name"]: flatten(result) for result in baseline["results"]}
+    rows = []
+    for result in candidate["results"]:
+        before = baseline_results.get(result["name"])
+        if before is None:
+            continue
+        for metric, new in flatten(result).items():
+            sign = direction(metric)
+            old = before.get(metric)
+            if not sign or not old:
+                continue
+            change = (new - old) / old
+            regressed = sign * change < -threshold
+            improved = sign * change > threshold
+            rows.append((result["name"], metric, old, new, change, regressed, improved))
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change tolerated (default: 0.10)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        sys.exit(f"❌ Cannot compare a {baseline.get('benchmark')} run with a {candidate.get('benchmark')} run.")
+
+    for label, run in (("baseline", baseline), ("candidate", candidate)):
+        environment = run.get("environment", {})
+        print(f"{label:<10} {(environment.get('commit') or '?')[:8]}{' (dirty)' if environment.get('dirty') else ''}  {run.get('created_at')}")
+
+    rows = compare(baseline, candidate, args.threshold)
+    regressions = [row for row in rows if row[5]]
+    print(f"\n{'case':<36} {'metric':<28} {'baseline':>12} {'candidate':>12} {'change':>8}")
+    for name, metric, old, new, change, regressed, improved in rows:
+        flag = "  ❌ regression" if regressed else "  ✅ improved" if improved else ""
+        print(f"{name:<36} {metric:<28} {old:>12.3f} {new:>12.3f} {change:>+7.1%}{flag}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
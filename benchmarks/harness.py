@@ -0,0 +1,196 @@
+"""Shared helpers for the benchmark scripts: paths, timing, percentiles and JSON results."""
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.join(REPO_ROOT, "backend", "database")
+IMAGES_DIR = os.path.join(DATABASE_DIR, "images")
+CAPTIONS_PATH = os.path.join(DATABASE_DIR, "captions.txt")
+GENERATOR_DIR = os.path.join(REPO_ROOT, "backend", "database generator")
+SERVER_APP_DIR = os.path.join(REPO_ROOT, "backend", "server", "app")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Relative --output paths are taken from where the script was started, even after use_generator()
+INVOCATION_DIR = os.getcwd()
+
+
+def use_generator():
+    """
+    Makes the database generator's modules importable.
+
+    The generator resolves its data paths relative to its own directory, so this
+    also changes into it.
+    """
+    sys.path.insert(0, GENERATOR_DIR)
+    os.chdir(GENERATOR_DIR)
+
+
+def use_server():
+    """Makes the server's flat modules (settings, models, utils, ...) importable."""
+    sys.path.insert(0, SERVER_APP_DIR)
+
+
+def bundled_images(limit=None):
+    """Sorted paths of the images shipped in backend/database/images."""
+    paths = sorted(
+        os.path.join(IMAGES_DIR, name) for name in os.listdir(IMAGES_DIR)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+
+def bundled_captions(limit=None):
+    """Distinct captions from backend/database/captions.txt, in file order."""
+    captions = []
+    with open(CAPTIONS_PATH, encoding="utf-8") as f:
+        for line in f:
+            _, _, caption = line.strip().partition(",")
+            if caption:
+                captions.append(caption)
+    captions = list(dict.fromkeys(captions))
+    return captions[:limit] if limit else captions
+
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def latency_summary(seconds):
+    """
+    Summarizes per-call durations.
+
+    Args:
+        seconds (list): Durations in seconds.
+
+    Returns:
+        dict: count, mean and p50/p95/p99/max latency in milliseconds.
+    """
+    values = sorted(seconds)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": 1000 * sum(values) / len(values),
+        "p50_ms": 1000 * percentile(values, 0.50),
+        "p95_ms": 1000 * percentile(values, 0.95),
+        "p99_ms": 1000 * percentile(values, 0.99),
+        "max_ms": 1000 * values[-1],
+    }
+
+
+def time_calls(fn, inputs, warmup=3):
+    """
+    Calls `fn` once per input and times each call.
+
+    Args:
+        fn (callable): Function taking one input.
+        inputs (list): Inputs, cycled through for the warm-up calls too.
+        warmup (int): Untimed calls made first.
+
+    Returns:
+        list: Duration of each timed call in seconds.
+    """
+    for i in range(min(warmup, len(inputs))):
+        fn(inputs[i])
+
+    durations = []
+    for item in inputs:
+        start_time = time.perf_counter()
+        fn(item)
+        durations.append(time.perf_counter() - start_time)
+    return durations
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info():
+    """Commit and machine details stored with every result file."""
+    info = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    for module_name in ("numpy", "faiss", "torch"):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            info[module_name] = getattr(module, "__version__", "unknown")
+    return info
+
+
+def write_results(benchmark, parameters, results, output=None):
+    """
+    Writes results as JSON, by default to benchmarks/results/<benchmark>-<commit>-<time>.json.
+
+    Args:
+        benchmark (str): Benchmark name.
+        parameters (dict): The arguments it ran with.
+        results (list): One dict per measured case, each with a unique "name".
+        output (str): Optional explicit output path.
+
+    Returns:
+        str: The path written.
+    """
+    environment = environment_info()
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        commit = (environment["commit"] or "nogit")[:8]
+        output = os.path.join(RESULTS_DIR, f"{benchmark}-{commit}-{stamp}.json")
+    output = os.path.join(INVOCATION_DIR, output)
+
+    with open(output, "w") as f:
+        json.dump({
+            "benchmark": benchmark,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "environment": environment,
+            "parameters": parameters,
+            "results": results,
+        }, f, indent=2)
+    print(f"✅ Results saved at {output}")
+    return output
+
+
+def print_table(results, columns):
+    """Prints selected result fields as an aligned table."""
+    rows = [[str(result.get("name"))] + [_format_cell(_lookup(result, column)) for column in columns] for result in results]
+    header = ["case"] + columns
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    print("  ".join(name.ljust(width) for name, width in zip(header, widths)))
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def _lookup(result, column):
+    value = result
+    for part in column.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return "-" if value is None else str(value)